@@ -6,7 +6,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.db import IntegrityError
 from .models import UserProfile
-from challenges.models import BrazilState
+from challenges.models import BrazilState, UserStanding
 
 def register(request):
     """Registra um novo usuário"""
@@ -45,11 +45,12 @@ def profile(request):
             current_state=initial_state
         )
     
-    # Estatísticas do usuário
-    submissions = request.user.submissions.all()
+    # Estatísticas do usuário (classificação materializada, sem contar as submissões)
+    submissions = request.user.submissions.select_related('challenge')
     completed_challenges = profile.completed_challenges.all()
-    total_submissions = submissions.count()
-    accepted_submissions = submissions.filter(status='accepted').count()
+    standing = UserStanding.objects.filter(user=request.user).first()
+    total_submissions = standing.total_attempts if standing else 0
+    accepted_submissions = standing.accepted_count if standing else 0
     
     # Calcula taxa de sucesso
     success_rate = 0
@@ -1,6 +1,9 @@
 # challenges/admin.py
 from django.contrib import admin
-from .models import ProgrammingLanguage, BrazilState, Challenge, Submission
+from .models import (
+    ProgrammingLanguage, BrazilState, Challenge, ChallengeTestCase, Submission, SubmissionTestResult, CachedVerdict,
+    UserStanding, JudgeWorkerHeartbeat
+)
 
 @admin.register(ProgrammingLanguage)
 class ProgrammingLanguageAdmin(admin.ModelAdmin):
@@ -14,6 +17,16 @@ class BrazilStateAdmin(admin.ModelAdmin):
     search_fields = ('name', 'abbreviation')
     ordering = ('order',)
 
+class ChallengeTestCaseInline(admin.TabularInline):
+    """Índice do armazenamento em arquivos (edite Challenge.test_cases ou use manage.py test_data import)"""
+    model = ChallengeTestCase
+    extra = 0
+    can_delete = False
+    readonly_fields = ('position', 'imported', 'input_size', 'output_size', 'input_hash', 'output_hash')
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Challenge)
 class ChallengeAdmin(admin.ModelAdmin):
     list_display = ('title', 'state', 'difficulty', 'points', 'language')
@@ -27,9 +40,19 @@ class ChallengeAdmin(admin.ModelAdmin):
             'fields': ('description', 'input_description', 'output_description', 'example_input', 'example_output')
         }),
         ('Configurações', {
-            'fields': ('test_cases', 'time_limit')
+            'fields': ('test_cases', 'time_limit', 'memory_limit', 'comparison_mode', 'float_tolerance')
         }),
     )
+    inlines = [ChallengeTestCaseInline]
+
+class SubmissionTestResultInline(admin.TabularInline):
+    model = SubmissionTestResult
+    extra = 0
+    can_delete = False
+    readonly_fields = ('test_index', 'verdict', 'cpu_time', 'wall_time', 'peak_memory_kb', 'output_hash')
+    
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
@@ -37,3 +60,31 @@ class SubmissionAdmin(admin.ModelAdmin):
     list_filter = ('status', 'language', 'challenge')
     search_fields = ('user__username', 'challenge__title')
     readonly_fields = ('submitted_at',)
+    inlines = [SubmissionTestResultInline]
+
+@admin.register(SubmissionTestResult)
+class SubmissionTestResultAdmin(admin.ModelAdmin):
+    list_display = ('submission', 'test_index', 'verdict', 'cpu_time', 'wall_time', 'peak_memory_kb')
+    list_filter = ('verdict', 'submission__challenge')
+    list_select_related = ('submission__user', 'submission__challenge')
+    readonly_fields = ('submission', 'test_index', 'verdict', 'cpu_time', 'wall_time', 'peak_memory_kb', 'output_hash')
+
+@admin.register(CachedVerdict)
+class CachedVerdictAdmin(admin.ModelAdmin):
+    list_display = ('challenge', 'source_hash', 'status', 'hits', 'created_at')
+    list_filter = ('status', 'challenge')
+    readonly_fields = ('challenge', 'source_hash', 'test_set_version', 'status', 'result', 'hits', 'created_at')
+
+@admin.register(JudgeWorkerHeartbeat)
+class JudgeWorkerHeartbeatAdmin(admin.ModelAdmin):
+    list_display = ('worker_id', 'started_at', 'last_seen')
+    readonly_fields = ('worker_id', 'started_at', 'last_seen')
+
+@admin.register(UserStanding)
+class UserStandingAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_points', 'completed_challenges', 'total_attempts', 'success_rate', 'updated_at')
+    search_fields = ('user__username',)
+    list_select_related = ('user',)
+    # Mantida pelos vereditos; para corrigir, manage.py standings rebuild
+    readonly_fields = ('user', 'total_points', 'completed_challenges', 'total_attempts', 'accepted_count',
+                       'success_rate', 'first_attempt_date', 'completion_date', 'completion_time_days', 'updated_at')
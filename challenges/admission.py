@@ -0,0 +1,347 @@
+# challenges/admission.py
+#
+# Controle de admissão das compilações e execuções, compartilhado por todos
+# os processos da máquina (workers do gunicorn, judge_worker).
+#
+# O orçamento é único: vagas de execução (núcleos), vagas de compilação e
+# memória, em unidades de MEMORY_UNIT_MB. Cada vaga e cada unidade é um
+# arquivo travado com flock enquanto está em uso, então a vaga de um processo
+# que morreu volta sozinha ao orçamento. O que não cabe espera em uma fila por
+# tipo (run/compile), atendida por ordem de chegada: só o primeiro da fila
+# tenta reservar, e reserva tudo de uma vez (vaga + memória) ou nada.
+#
+# Layout: <TEMP_DIR>/admission/{run,compile,memory}/<n>.lock,
+#         <TEMP_DIR>/admission/queue/<tipo>/<chegada>-<pid>-<thread>, stats.json
+
+import contextlib
+import fcntl
+import json
+import math
+import os
+import random
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('run', 'compile')
+STATS_FILE = 'stats.json'
+LOCK_FILE = '.lock'
+SLOW_ADMISSION = 1.0  # segundos de espera a partir dos quais a admissão é registrada no log
+
+
+class AdmissionCancelled(Exception):
+    """A execução foi cancelada enquanto esperava na fila"""
+
+
+def get_admission_settings():
+    config = settings.CODE_EXECUTION.get('ADMISSION', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'dir': Path(config.get('DIR') or Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'admission'),
+        'run_slots': config.get('RUN_SLOTS') or 0,          # 0 = núcleos disponíveis
+        'compile_slots': config.get('COMPILE_SLOTS') or 0,  # 0 = metade dos núcleos
+        'memory_mb': config.get('MEMORY_MB') or 0,          # 0 = MEMORY_FRACTION da RAM
+        'memory_fraction': config.get('MEMORY_FRACTION', 0.75),
+        'memory_unit_mb': config.get('MEMORY_UNIT_MB', 64),
+        'poll_interval': config.get('POLL_INTERVAL', 0.02),
+    }
+
+
+def available_cores():
+    """Núcleos utilizáveis: afinidade do processo, limitada pela cota do cgroup (cpu.max)"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        quota, period = Path('/sys/fs/cgroup/cpu.max').read_text().split()
+        if quota != 'max':
+            cores = min(cores, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cores)
+
+
+def total_memory_mb():
+    """RAM da máquina, limitada pelo cgroup (memory.max) em containers"""
+    memory = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    try:
+        limit = Path('/sys/fs/cgroup/memory.max').read_text().strip()
+        if limit != 'max':
+            memory = min(memory, int(limit))
+    except (OSError, ValueError):
+        pass
+    return memory // (1024 * 1024)
+
+
+class Ticket:
+    """Reserva concedida: quanto esperou na fila (s) e a memória reservada (MB)"""
+
+    def __init__(self, kind, memory_mb=0, wait_time=0.0):
+        self.kind = kind
+        self.memory_mb = memory_mb
+        self.wait_time = wait_time
+        self._fds = []
+
+
+class AdmissionController:
+
+    def __init__(self, root, run_slots, compile_slots, memory_units, memory_unit_mb, poll_interval=0.02):
+        self.root = Path(root)
+        self.capacity = {'run': run_slots, 'compile': compile_slots, 'memory': memory_units}
+        self.memory_unit_mb = memory_unit_mb
+        self.poll_interval = poll_interval
+        for pool in self.capacity:
+            (self.root / pool).mkdir(parents=True, exist_ok=True)
+        for kind in KINDS:
+            (self.root / 'queue' / kind).mkdir(parents=True, exist_ok=True)
+
+    def memory_units(self, memory_mb):
+        """Unidades de memória de uma reserva (o orçamento inteiro, no máximo)"""
+        return min(math.ceil(memory_mb / self.memory_unit_mb), self.capacity['memory']) if memory_mb > 0 else 0
+
+    @contextlib.contextmanager
+    def admit(self, kind, memory_mb=0, cancel_token=None):
+        """Espera a vez na fila de kind e reserva uma vaga + memory_mb até o fim do bloco"""
+        ticket = self.acquire(kind, memory_mb, cancel_token)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def acquire(self, kind, memory_mb=0, cancel_token=None):
+        units = self.memory_units(memory_mb)
+        start_time = time.monotonic()
+
+        # Fast path: fila vazia e orçamento livre, sem entrar na fila
+        fds = self._try_reserve(kind, units) if not self._queue_entries(kind) else None
+        if fds is None:
+            fds = self._wait_in_queue(kind, units, cancel_token)
+
+        ticket = Ticket(kind, units * self.memory_unit_mb, time.monotonic() - start_time)
+        ticket._fds = fds
+        if ticket.wait_time >= SLOW_ADMISSION:
+            logger.info(f"[ADMISSION] {kind} admitted after {ticket.wait_time:.2f}s ({ticket.memory_mb}MB)")
+        self._record(kind, ticket.wait_time)
+        return ticket
+
+    def release(self, ticket):
+        for fd in ticket._fds:
+            _unlock(fd)
+        ticket._fds = []
+
+    def _wait_in_queue(self, kind, units, cancel_token):
+        queue_dir = self.root / 'queue' / kind
+        name = f'{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}'
+        # O arquivo já entra na fila travado: fila viva = arquivos com flock
+        staging = self.root / 'queue' / f'.{name}'
+        marker = os.open(staging, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(marker, fcntl.LOCK_EX)
+        os.rename(staging, queue_dir / name)
+        try:
+            while True:
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise AdmissionCancelled()
+                if self._queue_head(kind) == name:
+                    fds = self._try_reserve(kind, units)
+                    if fds is not None:
+                        return fds
+                time.sleep(self.poll_interval)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(queue_dir / name)
+            _unlock(marker)
+
+    def _queue_entries(self, kind):
+        return sorted(os.listdir(self.root / 'queue' / kind))
+
+    def _queue_head(self, kind):
+        """Primeiro da fila ainda vivo; entradas de processos mortos são removidas"""
+        for name in self._queue_entries(kind):
+            if _is_locked(self.root / 'queue' / kind / name, remove_stale=True):
+                return name
+        return None
+
+    def _try_reserve(self, kind, units):
+        """Trava uma vaga de kind e units unidades de memória, tudo ou nada"""
+        fds = []
+        for pool, count in ((kind, 1), ('memory', units)):
+            taken = self._lock_free_slots(pool, count)
+            fds.extend(taken)
+            if len(taken) < count:
+                for fd in fds:
+                    _unlock(fd)
+                return None
+        return fds
+
+    def _lock_free_slots(self, pool, count):
+        taken = []
+        capacity = self.capacity[pool]
+        if not count:
+            return taken
+        # Começa em um ponto aleatório: processos concorrentes não disputam os mesmos arquivos
+        offset = random.randrange(capacity)
+        for i in range(capacity):
+            fd = os.open(self.root / pool / f'{(offset + i) % capacity}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            taken.append(fd)
+            if len(taken) == count:
+                break
+        return taken
+
+    def _record(self, kind, wait_time):
+        """Contadores de espera compartilhados entre processos (stats.json)"""
+        try:
+            with _FileLock(self.root / LOCK_FILE):
+                stats = self._read_stats()
+                entry = stats.setdefault(kind, {'admitted': 0, 'queued': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+                entry['admitted'] += 1
+                if wait_time > self.poll_interval:
+                    entry['queued'] += 1
+                entry['total_wait'] += wait_time
+                entry['max_wait'] = max(entry['max_wait'], wait_time)
+                entry['last_wait'] = wait_time
+                with open(self.root / STATS_FILE, 'w', encoding='utf-8') as stats_file:
+                    json.dump(stats, stats_file)
+        except OSError as e:
+            logger.debug(f"[ADMISSION] Could not update stats: {e}")
+
+    def _read_stats(self):
+        try:
+            with open(self.root / STATS_FILE, encoding='utf-8') as stats_file:
+                return json.load(stats_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _in_use(self, pool):
+        return sum(_is_locked(self.root / pool / f'{i}.lock') for i in range(self.capacity[pool]))
+
+    def status(self):
+        """Ocupação atual, profundidade das filas e tempos de espera acumulados"""
+        stats = self._read_stats()
+        status = {
+            'memory': {
+                'capacity_mb': self.capacity['memory'] * self.memory_unit_mb,
+                'in_use_mb': self._in_use('memory') * self.memory_unit_mb,
+            },
+        }
+        for kind in KINDS:
+            entry = stats.get(kind, {})
+            admitted = entry.get('admitted', 0)
+            status[kind] = {
+                'slots': self.capacity[kind],
+                'in_use': self._in_use(kind),
+                'queue_depth': sum(
+                    _is_locked(self.root / 'queue' / kind / name) for name in self._queue_entries(kind)
+                ),
+                'admitted': admitted,
+                'queued': entry.get('queued', 0),
+                'avg_wait': entry.get('total_wait', 0.0) / admitted if admitted else 0.0,
+                'max_wait': entry.get('max_wait', 0.0),
+                'last_wait': entry.get('last_wait', 0.0),
+            }
+        return status
+
+    def reset_stats(self):
+        with _FileLock(self.root / LOCK_FILE):
+            (self.root / STATS_FILE).unlink(missing_ok=True)
+
+
+def _unlock(fd):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _is_locked(path, remove_stale=False):
+    """True se algum processo (ou thread) mantém o flock do arquivo"""
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    else:
+        if remove_stale:
+            # Dono morreu sem sair da fila
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+class _FileLock:
+    """flock exclusivo em um arquivo, como context manager"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        _unlock(self.fd)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Controlador do processo; None se desabilitado ou indisponível"""
+    global _controller
+    config = get_admission_settings()
+    if not config['enabled']:
+        return None
+    with _controller_lock:
+        if _controller is None:
+            cores = available_cores()
+            memory_mb = config['memory_mb'] or int(total_memory_mb() * config['memory_fraction'])
+            try:
+                _controller = AdmissionController(
+                    config['dir'],
+                    run_slots=config['run_slots'] or cores,
+                    compile_slots=config['compile_slots'] or max(1, cores // 2),
+                    memory_units=max(1, memory_mb // config['memory_unit_mb']),
+                    memory_unit_mb=config['memory_unit_mb'],
+                    poll_interval=config['poll_interval'],
+                )
+            except OSError as e:
+                logger.warning(f"[ADMISSION] Admission control unavailable: {e}")
+                return None
+            logger.info(
+                f"[ADMISSION] Budget: {_controller.capacity['run']} runs, {_controller.capacity['compile']} compiles, "
+                f"{_controller.capacity['memory'] * config['memory_unit_mb']}MB"
+            )
+        return _controller
+
+
+@contextlib.contextmanager
+def admission(kind, memory_mb=0, cancel_token=None):
+    """
+    Bloco executado dentro do orçamento global: espera (em ordem de chegada)
+    até haver uma vaga de kind ('run' ou 'compile') e memory_mb livres.
+    Levanta AdmissionCancelled se cancel_token for cancelado na espera.
+    Sem controle de admissão, entra direto.
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        yield Ticket(kind)
+        return
+    with controller.admit(kind, memory_mb, cancel_token) as ticket:
+        yield ticket
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ChallengesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'challenges'
+    
+    def ready(self):
+        import challenges.checks
+        import challenges.signals
@@ -0,0 +1,271 @@
+# challenges/artifact_cache.py
+#
+# Cache em disco dos artefatos de compilação (binários C/C++, arquivos .class
+# e mensagens de erro de compilação), endereçado pelo conteúdo.
+#
+# A chave é o sha256 da linguagem, versão do compilador, flags, nome do
+# arquivo e código-fonte. Um acerto pula o compilador por completo, inclusive
+# para erros de compilação já conhecidos. O tamanho é limitado e as entradas
+# menos usadas recentemente (mtime) são removidas primeiro.
+#
+# Layout: <TEMP_DIR>/artifact_cache/<ab>/<chave>/{meta.json, files/...}
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+META_FILE = 'meta.json'
+FILES_DIR = 'files'
+STATS_FILE = 'stats.json'
+LOCK_FILE = '.lock'
+
+
+def get_cache_settings():
+    config = settings.CODE_EXECUTION.get('ARTIFACT_CACHE', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'max_size_mb': config.get('MAX_SIZE_MB', 256),
+        'dir': Path(config.get('DIR') or Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'artifact_cache'),
+    }
+
+
+_toolchain_versions = {}
+_toolchain_lock = threading.Lock()
+
+
+def toolchain_version(*command):
+    """
+    Primeira linha da saída de `<compilador> --version` (cacheada por processo).
+    Retorna None se o compilador não puder ser executado.
+    """
+    with _toolchain_lock:
+        if command not in _toolchain_versions:
+            version = None
+            try:
+                proc = subprocess.run(list(command), capture_output=True, text=True, timeout=10)
+                output = (proc.stdout or proc.stderr).strip()
+                if proc.returncode == 0 and output:
+                    version = output.splitlines()[0]
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.debug(f"[CACHE] Could not detect toolchain version for {command[0]}: {e}")
+            _toolchain_versions[command] = version
+        return _toolchain_versions[command]
+
+
+class ArtifactCache:
+    """Cache de artefatos de compilação com despejo LRU limitado por tamanho"""
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(language, toolchain, flags, source_name, source):
+        digest = hashlib.sha256()
+        for part in (language, toolchain, '\0'.join(flags), source_name):
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(source if isinstance(source, bytes) else source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return self.root / key[:2] / key
+
+    def fetch(self, key, dest_dir):
+        """
+        Copia os artefatos da entrada para dest_dir e devolve os metadados
+        ({'result', 'files'}), ou None se não houver entrada.
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(entry_dir / META_FILE, encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            for name in meta['files']:
+                # Cópia, não hardlink: a submissão não pode alterar o artefato cacheado
+                shutil.copy2(entry_dir / FILES_DIR / name, os.path.join(dest_dir, name))
+            os.utime(entry_dir)  # marca como usado recentemente
+        except (OSError, ValueError, KeyError):
+            # Entrada ausente, incompleta ou removida pelo despejo concorrente
+            self._bump('misses')
+            return None
+
+        self._bump('hits')
+        return meta
+
+    def store(self, key, result, source_dir=None, files=()):
+        """Grava uma entrada de forma atômica (diretório temporário + rename)"""
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix='.tmp_', dir=self.root)
+        try:
+            os.mkdir(os.path.join(build_dir, FILES_DIR))
+            for name in files:
+                shutil.copy2(os.path.join(source_dir, name), os.path.join(build_dir, FILES_DIR, name))
+            with open(os.path.join(build_dir, META_FILE), 'w', encoding='utf-8') as meta_file:
+                json.dump({'result': result, 'files': list(files)}, meta_file)
+            os.rename(build_dir, entry_dir)
+        except OSError as e:
+            # Outro processo gravou a mesma entrada primeiro, ou disco cheio
+            logger.debug(f"[CACHE] Could not store {key[:12]}: {e}")
+            shutil.rmtree(build_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def _entries(self):
+        """(mtime, tamanho, diretório) de cada entrada"""
+        entries = []
+        for shard in self.root.iterdir():
+            if not shard.is_dir() or shard.name.startswith('.'):
+                continue
+            for entry_dir in shard.iterdir():
+                try:
+                    size = sum(f.stat().st_size for f in entry_dir.rglob('*') if f.is_file())
+                    entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+                except OSError:
+                    continue
+        return entries
+
+    def evict(self):
+        """Remove as entradas menos usadas até caber em max_bytes"""
+        with self._locked():
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            evicted = 0
+            for _, size, entry_dir in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                evicted += 1
+        logger.info(f"[CACHE] Evicted {evicted} artifact(s), {total / (1024 * 1024):.1f}MB in use")
+
+    def clear(self):
+        with self._locked():
+            for entry_dir in self.root.iterdir():
+                if entry_dir.is_dir():
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+            (self.root / STATS_FILE).unlink(missing_ok=True)
+
+    def _locked(self):
+        return _FileLock(self.root / LOCK_FILE)
+
+    def _bump(self, counter):
+        """Contadores de acerto/falha compartilhados entre processos (stats.json)"""
+        try:
+            with self._locked():
+                stats = self._read_stats()
+                stats[counter] = stats.get(counter, 0) + 1
+                with open(self.root / STATS_FILE, 'w', encoding='utf-8') as stats_file:
+                    json.dump(stats, stats_file)
+        except OSError as e:
+            logger.debug(f"[CACHE] Could not update stats: {e}")
+
+    def _read_stats(self):
+        try:
+            with open(self.root / STATS_FILE, encoding='utf-8') as stats_file:
+                return json.load(stats_file)
+        except (OSError, ValueError):
+            return {}
+
+    def stats(self):
+        stats = self._read_stats()
+        entries = self._entries()
+        hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+
+class _FileLock:
+    """flock exclusivo em um arquivo, como context manager"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache():
+    """Cache compartilhado do processo; None se desabilitado ou indisponível"""
+    global _cache
+    config = get_cache_settings()
+    if not config['enabled']:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ArtifactCache(config['dir'], config['max_size_mb'] * 1024 * 1024)
+            except OSError as e:
+                logger.warning(f"[CACHE] Artifact cache unavailable: {e}")
+                return None
+        return _cache
+
+
+def cached_compile(language, toolchain_command, flags, source_path, compile_fn):
+    """
+    Envolve uma compilação com o cache de artefatos.
+
+    compile_fn() compila source_path no próprio diretório e retorna
+    (result, files): result é o dict de resultado (sem caminhos absolutos) e
+    files os nomes dos artefatos gerados nesse diretório, ou None quando o
+    resultado não deve ser cacheado (ex.: timeout, compilador ausente).
+
+    Em um acerto os artefatos são copiados para o diretório do fonte e o
+    result cacheado é devolvido com 'cached': True.
+    """
+    cache = get_artifact_cache()
+    toolchain = toolchain_version(*toolchain_command) if cache else None
+    if cache is None or toolchain is None:
+        result, _ = compile_fn()
+        return result
+
+    start_time = time.time()
+    work_dir, source_name = os.path.split(source_path)
+    with open(source_path, 'rb') as source_file:
+        key = cache.make_key(language, toolchain, flags, source_name, source_file.read())
+
+    meta = cache.fetch(key, work_dir)
+    if meta is not None:
+        logger.debug(f"[CACHE] Hit {key[:12]} ({language})")
+        return dict(meta['result'], compile_time=(time.time() - start_time) * 1000, cached=True)
+
+    result, files = compile_fn()
+    if files is not None:
+        cache.store(key, result, work_dir, files)
+    return result
@@ -0,0 +1,18 @@
+# challenges/checks.py
+#
+# Verificações de implantação (manage.py check --deploy).
+
+from django.conf import settings
+from django.core.checks import Error, register, Tags
+
+
+@register(Tags.compatibility, deploy=True)
+def check_test_data_dir(app_configs, **kwargs):
+    """Os casos importados só existem no armazenamento: ele precisa de um diretório persistente"""
+    if settings.CODE_EXECUTION.get('TEST_DATA', {}).get('DIR'):
+        return []
+    return [Error(
+        "CODE_EXECUTION['TEST_DATA']['DIR'] não configurado",
+        hint='Defina TEST_DATA_DIR com um diretório persistente (ex.: o disco do Render).',
+        id='challenges.E001',
+    )]
@@ -0,0 +1,270 @@
+# challenges/execution_engine.py
+#
+# Motor único de avaliação: compile-once, run-many para qualquer linguagem.
+#
+# O motor prepara o diretório de trabalho, grava o fonte, compila uma vez via
+# backend (challenges/language_backends.py) e executa o mesmo artefato contra
+# todos os casos de teste (em paralelo quando habilitado), comparando a saída
+# em fluxo (challenges/output_compare.py). Cada etapa — preparação,
+# compilação, execução, limpeza — é cronometrada separadamente e reportada em
+# 'timings'. Os casos de teste vêm do armazenamento em arquivos
+# (challenges/test_data.py): a entrada vira o stdin pelo descritor e a saída
+# esperada é comparada por mmap. Cache de artefatos, pools e paralelismo
+# ficam nos backends e no motor, e valem para todas as linguagens. Toda
+# compilação e execução passa pelo orçamento global de núcleos e memória
+# (challenges/admission.py).
+
+import os
+import shutil
+import tempfile
+import time
+import logging
+import traceback
+
+from django.conf import settings
+
+from .admission import admission, AdmissionCancelled
+from .language_backends import get_backend
+from .output_compare import OutputComparator
+from .parallel_grading import run_test_cases, grading_parallelism
+from .grading_events import test_result_reporter
+from .process_runner import wall_time_limit, get_resource_settings, measured_time
+from .test_data import load_test_cases, case_input, expected_output, TestDataMissing
+from .verdict_cache import cached_evaluation
+
+logger = logging.getLogger(__name__)
+
+MIN_GRADING_WALL_TIME_MS = 5000  # máquina carregada não vira tempo limite
+
+
+class ExecutionLimits:
+    """Limites de um caso de teste: CPU (ms), memória (MB) e relógio (ms)"""
+
+    def __init__(self, time_limit_ms, memory_limit_mb=None, wall_limit_ms=None):
+        self.time_limit_ms = time_limit_ms
+        self.memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else get_resource_settings()['memory_mb']
+        # Limite exato de CPU, mas folga de relógio
+        self.wall_limit_ms = wall_limit_ms or max(wall_time_limit(time_limit_ms), MIN_GRADING_WALL_TIME_MS)
+
+    @classmethod
+    def for_challenge(cls, challenge):
+        return cls(challenge.time_limit, challenge.memory_limit)
+
+
+class _Stopwatch:
+    """Acumula a duração (ms) de cada etapa em timings[nome]"""
+
+    def __init__(self):
+        self.timings = {}
+
+    def stage(self, name):
+        return _Stage(self.timings, name)
+
+
+class _Stage:
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings[self.name] = round((time.perf_counter() - self.start) * 1000, 3)
+
+
+def create_work_dir(prefix):
+    """Diretório de trabalho (fonte + artefatos) de uma avaliação"""
+    base_dir = settings.CODE_EXECUTION.get('TEMP_DIR') or tempfile.gettempdir()
+    os.makedirs(base_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix=prefix, dir=base_dir)
+
+
+def evaluate_code(language, code, test_cases, limits, comparison_mode='exact', float_tolerance=None,
+                  progress=None, work_prefix='submission_'):
+    """
+    Compila code uma vez e executa contra test_cases (StoredTestCase do
+    armazenamento ou dicts {input, output}). Retorna o resultado da
+    avaliação: 'status' no vocabulário de Submission, 'message',
+    'compile_time', 'execution_time' (soma do tempo de CPU dos testes),
+    'test_results' ([{'test_case': i, 'result': {...}}]) e 'timings'.
+    Falhas do próprio juiz (não do código) vêm com 'judge_error': True.
+    """
+    backend = get_backend(language)
+    language_name = getattr(language, 'name', language)
+    total = len(test_cases)
+    stopwatch = _Stopwatch()
+    work_dir = None
+
+    try:
+        logger.info(f"[ENGINE] Evaluating {language_name} code - {total} test cases")
+
+        with stopwatch.stage('prepare'):
+            work_dir = create_work_dir(work_prefix)
+            source_path = os.path.join(work_dir, backend.source_name(code))
+            with open(source_path, 'w', encoding='utf-8') as source_file:
+                source_file.write(code)
+
+        # Compilação única (Python apenas usa o arquivo gravado)
+        if progress:
+            progress('compile_started', language=language_name)
+        with stopwatch.stage('compile'):
+            with admission('compile', backend.compile_memory_mb) as ticket:
+                build = backend.compile(source_path)
+        stopwatch.timings['compile_wait'] = round(ticket.wait_time * 1000, 3)
+        if progress:
+            progress(
+                'compile_finished',
+                success=build['success'],
+                compile_time=round(build.get('compile_time', 0), 2),
+                cached=bool(build.get('cached')),
+            )
+        if not build['success']:
+            return dict(build, timings=stopwatch.timings)
+
+        compile_time = build['compile_time']
+        logger.info(f"[ENGINE] Build ready in {compile_time:.2f}ms")
+
+        run_waits = []
+
+        def run_one(i, test_case, cancel_token):
+            with expected_output(test_case) as expected:
+                return check_one(i, test_case, expected, cancel_token)
+
+        def check_one(i, test_case, expected, cancel_token):
+            # A saída é comparada enquanto o programa escreve (sem guardá-la)
+            comparator = OutputComparator(expected, comparison_mode, float_tolerance)
+            try:
+                with admission('run', backend.run_memory_mb(limits), cancel_token) as ticket:
+                    run_waits.append(ticket.wait_time)
+                    result = backend.run(build, case_input(test_case), limits, cancel_token, comparator)
+            except AdmissionCancelled:
+                return {'success': False, 'status': 'runtime_error', 'message': 'Execução cancelada', 'execution_time': 0,
+                        'judge_error': True}
+            except Exception as e:
+                logger.error(f"[ENGINE] Error in test case {i}: {e}")
+                return {'success': False, 'status': 'runtime_error', 'message': f'Erro no teste {i}: {str(e)}',
+                        'judge_error': True}
+
+            if not result['success']:
+                return result
+
+            mismatch = comparator.finish()
+            result['output_hash'] = comparator.output_hash
+            if mismatch:
+                logger.info(f"[ENGINE] Wrong answer: Teste {i}: {mismatch}")
+                return {
+                    'success': False,
+                    'status': 'wrong_answer',
+                    'message': f'Resposta incorreta no teste {i} (linha {mismatch.line}, coluna {mismatch.column})',
+                    'test_case': i,
+                    'line': mismatch.line,
+                    'column': mismatch.column,
+                    'expected': mismatch.expected,
+                    'actual': mismatch.actual,
+                    'output_hash': comparator.output_hash,
+                    'execution_time': result['execution_time'],
+                    'cpu_time': result.get('cpu_time'),
+                    'peak_memory_kb': result.get('peak_memory_kb'),
+                }
+
+            logger.debug(f"[ENGINE] Test case {i} passed")
+            return result
+
+        # Testes em paralelo (fail-fast) quando habilitado; veredito idêntico ao sequencial
+        with stopwatch.stage('run'):
+            results, failed_test_case = run_test_cases(
+                test_cases, run_one, max_workers=grading_parallelism(),
+                on_result=test_result_reporter(progress, total)
+            )
+        stopwatch.timings['run_wait'] = round(sum(run_waits) * 1000, 3)
+        # Soma do tempo de CPU de cada teste (sem compilação nem sobrecarga do juiz)
+        execution_time = sum(measured_time(result) for result in results)
+        test_results = [{'test_case': i, 'result': result} for i, result in enumerate(results, 1)]
+        summary = {
+            'compile_time': compile_time,
+            'execution_time': execution_time,
+            'test_results': test_results,
+            'total_tests': total,
+            'timings': stopwatch.timings,
+        }
+
+        if failed_test_case:
+            # Cópia: o resultado do teste fica intacto em test_results
+            return dict(results[-1], failed_test_case=failed_test_case, passed_tests=failed_test_case - 1, **summary)
+
+        logger.info(f"[ENGINE] All tests passed - Compile: {compile_time:.2f}ms, Run: {execution_time:.2f}ms")
+        return {
+            'status': 'accepted',
+            'message': f'Todos os {total} testes passaram',
+            'passed_tests': total,
+            **summary
+        }
+
+    except Exception as e:
+        logger.error(f"[ENGINE] Critical error in evaluation: {e}")
+        logger.error(f"[ENGINE] Traceback: {traceback.format_exc()}")
+        return {'status': 'runtime_error', 'message': f'Erro crítico: {str(e)}', 'timings': stopwatch.timings,
+                'judge_error': True}
+
+    finally:
+        # Cleanup do diretório de trabalho (fonte + artefatos)
+        if work_dir:
+            with stopwatch.stage('cleanup'):
+                shutil.rmtree(work_dir, ignore_errors=True)
+        logger.debug(f"[ENGINE] Stage timings: {stopwatch.timings}")
+
+
+def run_submission(submission, progress=None, use_cache=True):
+    """
+    Avalia a submissão com os limites e o modo de comparação do desafio e grava
+    o veredito. Código idêntico já avaliado contra os mesmos testes recebe o
+    veredito do cache (challenges/verdict_cache.py), salvo com use_cache=False.
+    """
+    challenge = submission.challenge
+
+    def evaluate():
+        try:
+            test_cases = load_test_cases(challenge)
+        except TestDataMissing as e:
+            logger.error(f"[ENGINE] {e}")
+            return {'status': 'runtime_error', 'message': str(e), 'judge_error': True}
+        return evaluate_code(
+            submission.language, submission.code, test_cases,
+            ExecutionLimits.for_challenge(challenge),
+            comparison_mode=challenge.comparison_mode,
+            float_tolerance=challenge.float_tolerance,
+            progress=progress,
+            work_prefix=f'submission_{submission.id}_',
+        )
+
+    result = cached_evaluation(submission, evaluate, progress) if use_cache else evaluate()
+
+    submission.status = result['status']
+    if result['status'] not in ('accepted', 'wrong_answer'):
+        submission.error_message = result['message']
+    if 'execution_time' in result:
+        submission.execution_time = result['execution_time']
+    submission.save()
+    return result
+
+
+def run_code(language, code, input_data, limits):
+    """
+    Compila e executa code uma vez com input_data, sem caso de teste.
+    Retorna o resultado da execução (com 'output') ou a falha de compilação.
+    """
+    backend = get_backend(language)
+    work_dir = create_work_dir('run_')
+    try:
+        source_path = os.path.join(work_dir, backend.source_name(code))
+        with open(source_path, 'w', encoding='utf-8') as source_file:
+            source_file.write(code)
+        with admission('compile', backend.compile_memory_mb):
+            build = backend.compile(source_path)
+        if not build['success']:
+            return build
+        with admission('run', backend.run_memory_mb(limits)):
+            return backend.run(build, input_data, limits)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
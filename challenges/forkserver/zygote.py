@@ -0,0 +1,232 @@
+# challenges/forkserver/zygote.py
+#
+# Zygote do fork server de Python (cliente em challenges/python_forkserver.py).
+#
+# Roda como `python3 zygote.py <socket>` com o interpretador já inicializado e
+# os módulos mais usados já importados. Para cada conexão no socket unix:
+#
+#   1. recebe um cabeçalho JSON ({"script", "timeout", "cpu_limit", "memory_mb"}) e os
+#      descritores de stdin/stdout/stderr via SCM_RIGHTS; com "argv" (e "cwd",
+#      "env") no lugar de "script", o filho faz exec do programa (C, C++, JVM);
+#   2. faz fork de um monitor, que faz fork do processo da submissão (com
+#      limites de recurso e stdio ligado aos descritores recebidos);
+#   3. o monitor envia {"pid": ...} assim que o filho existe e, ao final,
+#      {"exit_code", "signal", "timed_out", "wall_time", "cpu_time",
+#      "max_rss_kb"} obtidos com wait4.
+#
+# O zygote termina quando o stdin (pipe do processo Django) fecha.
+#
+# Este arquivo não importa nada do Django: roda em um interpretador limpo.
+
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+import types
+
+# Pré-importados: os filhos herdam estes módulos já carregados
+import math
+import collections
+import itertools
+import functools
+import heapq
+import bisect
+import re
+import string
+
+READY = b'READY\n'
+MAX_HEADER = 64 * 1024
+MAX_FILE_SIZE = 64 * 1024 * 1024  # Limite de escrita em disco (arquivos criados pela submissão)
+
+
+class Timeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise Timeout()
+
+
+def set_limits(request):
+    """Limites de recurso do processo da submissão"""
+    cpu_limit = max(1, math.ceil(request.get('cpu_limit') or request['timeout']))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (MAX_FILE_SIZE, MAX_FILE_SIZE))
+    memory_mb = request.get('memory_mb') or 0
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_submission(request, fds):
+    """Processo da submissão: nunca retorna"""
+    exit_code = 1
+    try:
+        os.setsid()  # grupo próprio: o timeout mata a árvore inteira
+        for signum in (signal.SIGPIPE, signal.SIGCHLD, signal.SIGALRM, signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, signal.SIG_DFL)
+
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        os.closerange(3, os.sysconf('SC_OPEN_MAX') if hasattr(os, 'sysconf') else 1024)
+
+        set_limits(request)
+
+        if 'argv' in request:
+            # Programa nativo: exec a partir do zygote (processo pequeno), então o
+            # ru_maxrss reportado não herda o tamanho do processo Django
+            os.chdir(request.get('cwd') or '/')
+            argv = request['argv']
+            try:
+                if request.get('env') is not None:
+                    os.execvpe(argv[0], argv, request['env'])
+                os.execvp(argv[0], argv)
+            except OSError as e:
+                os.write(2, f'{argv[0]}: {e.strerror}\n'.encode('utf-8'))
+                exit_code = 127
+                return
+
+        script = request['script']
+        script_dir = os.path.dirname(script)
+        os.chdir(script_dir)
+        sys.argv = [script]
+        sys.path[0] = script_dir
+
+        sys.stdin = sys.__stdin__ = open(0, 'r', encoding='utf-8', closefd=False)
+        sys.stdout = sys.__stdout__ = open(1, 'w', encoding='utf-8', closefd=False)
+        sys.stderr = sys.__stderr__ = open(2, 'w', encoding='utf-8', closefd=False, buffering=1)
+
+        # Estado aleatório herdado do zygote seria igual em todos os filhos
+        if 'random' in sys.modules:
+            sys.modules['random'].seed()
+
+        try:
+            # Equivalente a `python3 script.py` (runpy importaria pkgutil a cada fork)
+            main = types.ModuleType('__main__')
+            main.__file__ = script
+            main.__builtins__ = __builtins__
+            sys.modules['__main__'] = main
+            with open(script, 'rb') as source:
+                code = compile(source.read(), script, 'exec')
+            exec(code, main.__dict__)
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException as e:
+            # Traceback só com os frames da submissão, como no `python3 script.py`
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != script:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb or e.__traceback__)
+            exit_code = 1
+
+        try:
+            sys.stdout.flush()
+        except Exception:
+            exit_code = exit_code or 1
+        try:
+            sys.stderr.flush()
+        except Exception:
+            pass
+    finally:
+        os._exit(exit_code & 0xFF)
+
+
+def send(conn, message):
+    conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def monitor(conn):
+    """Processo monitor de uma execução: nunca retorna"""
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        message, fds, _, _ = socket.recv_fds(conn, MAX_HEADER, 3)
+        request = json.loads(message)
+
+        start = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            run_submission(request, fds)
+
+        for fd in fds:
+            os.close(fd)
+        send(conn, {'pid': pid})
+
+        timed_out = False
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, request['timeout'])
+        try:
+            _, status, rusage = os.wait4(pid, 0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        except Timeout:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, status, rusage = os.wait4(pid, 0)
+        wall_time = time.monotonic() - start
+
+        send(conn, {
+            'exit_code': os.WEXITSTATUS(status) if os.WIFEXITED(status) else None,
+            'signal': os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+            'timed_out': timed_out,
+            'wall_time': wall_time,
+            'cpu_time': rusage.ru_utime + rusage.ru_stime,
+            'max_rss_kb': rusage.ru_maxrss,
+        })
+        os._exit(0)
+    except BaseException:
+        os._exit(1)
+
+
+def serve(socket_path):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # monitores são recolhidos automaticamente
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(sys.stdin, selectors.EVENT_READ)
+
+    sys.stdout.buffer.write(READY)
+    sys.stdout.flush()
+
+    try:
+        while True:
+            for key, _ in selector.select():
+                if key.fileobj is sys.stdin:
+                    # Processo Django morreu ou pediu para encerrar
+                    if not os.read(sys.stdin.fileno(), 1024):
+                        return
+                    continue
+
+                conn, _ = listener.accept()
+                if os.fork() == 0:
+                    listener.close()
+                    monitor(conn)
+                conn.close()
+    finally:
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1])
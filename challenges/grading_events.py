@@ -0,0 +1,82 @@
+# challenges/grading_events.py
+#
+# Eventos de progresso da avaliação (compilação, cada caso de teste, veredito).
+#
+# Quem avalia (judge_worker ou a avaliação inline) grava GradingEvent no banco
+# via GradingProgress; a view SSE `submission_events` lê os eventos novos e os
+# envia ao navegador. O banco é o único canal entre os dois processos, como na
+# fila de avaliação.
+
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import GradingEvent
+
+logger = logging.getLogger(__name__)
+
+
+def get_events_settings():
+    config = settings.CODE_EXECUTION.get('GRADING_EVENTS', {})
+    return {
+        'poll_interval': config.get('POLL_INTERVAL', 0.3),
+        'stream_lifetime': config.get('STREAM_LIFETIME', 60),
+        'keepalive': config.get('KEEPALIVE', 15),
+        'retention': config.get('RETENTION', 24 * 3600),
+    }
+
+
+class GradingProgress:
+    """
+    Callback de progresso: progress('test_finished', test=3, passed=True, ...).
+    Deve ser chamado só pela thread que avalia (run_test_cases garante isso).
+    Falhas ao gravar nunca interrompem a avaliação.
+    """
+
+    def __init__(self, submission):
+        self.submission_id = submission.id
+        # Uma nova tentativa (fila reenfileirou) continua a sequência anterior
+        last_seq = GradingEvent.objects.filter(submission_id=self.submission_id).aggregate(last=Max('seq'))['last']
+        self.seq = last_seq or 0
+
+    def __call__(self, kind, **data):
+        self.seq += 1
+        try:
+            GradingEvent.objects.create(submission_id=self.submission_id, seq=self.seq, kind=kind, data=data)
+        except Exception as e:
+            logger.warning(f"[EVENTS] Could not record {kind} for submission {self.submission_id}: {e}")
+
+
+def format_sse(event_id, kind, data):
+    """Um evento no formato text/event-stream"""
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+def purge_old_events():
+    """Remove eventos de avaliações antigas (o resultado fica na Submission)"""
+    cutoff = timezone.now() - timedelta(seconds=get_events_settings()['retention'])
+    deleted, _ = GradingEvent.objects.filter(created_at__lt=cutoff).delete()
+    if deleted:
+        logger.info(f"[EVENTS] Purged {deleted} old grading events")
+    return deleted
+
+
+def test_result_reporter(progress, total):
+    """Adapta progress ao on_result de run_test_cases (None se não há progresso)"""
+    if progress is None:
+        return None
+    
+    def on_result(index, result):
+        progress(
+            'test_finished',
+            test=index,
+            total=total,
+            passed=bool(result.get('success')),
+            status='accepted' if result.get('success') else (result.get('status') or result.get('error', 'runtime_error')),
+            execution_time=round(result.get('execution_time', 0) or 0, 2),
+        )
+    return on_result
@@ -0,0 +1,286 @@
+# challenges/javac_daemon.py
+#
+# Compilador Java residente para o juiz.
+#
+# O javac é ele mesmo uma JVM: chamado por linha de comando, cada compilação
+# paga a inicialização da JVM e o aquecimento do compilador (segundos). O
+# daemon (challenges/jvm/CompilerDaemon.java) é um processo java de longa
+# duração que compila com a API javax.tools em memória e devolve os bytes
+# das classes ou os diagnósticos pelo stdin/stdout, como o pool de JVMs.
+#
+# Uma compilação por vez por daemon (um daemon por processo Django). O limite
+# de tempo é aplicado aqui: um daemon que estoura o prazo ou morre é morto e
+# o próximo é iniciado na compilação seguinte. Se o daemon não puder ser usado
+# (JRE sem compilador, falha ao iniciar) a compilação volta ao javac de linha
+# de comando.
+
+import os
+import selectors
+import struct
+import subprocess
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+from .jvm_pool import ensure_worker_classes, WorkerCrashed, WorkerUnavailable
+
+logger = logging.getLogger(__name__)
+
+DAEMON_SOURCE = Path(__file__).resolve().parent / 'jvm' / 'CompilerDaemon.java'
+DAEMON_CLASS = 'CompilerDaemon'
+
+READY = 0x4A415643
+UNAVAILABLE = 0x4E4F4A43
+OP_COMPILE = 1
+
+STATUS_OK = 0
+STATUS_COMPILE_ERROR = 1
+STATUS_INTERNAL_ERROR = 2
+
+STARTUP_TIMEOUT = 30   # segundos para o daemon ficar pronto (inclui aquecer o javac)
+RESTART_INTERVAL = 60  # segundos sem tentar de novo após o daemon não iniciar
+
+
+class CompilerTimeout(Exception):
+    """A compilação passou do limite de tempo (o daemon foi morto)"""
+
+
+def get_compiler_daemon_settings():
+    java_settings = settings.CODE_EXECUTION.get('JAVA', {})
+    daemon_settings = java_settings.get('COMPILER_DAEMON', {})
+    return {
+        'enabled': daemon_settings.get('ENABLED', False),
+        'heap_mb': daemon_settings.get('HEAP_MB', 256),
+        'max_compiles': daemon_settings.get('MAX_COMPILES', 500),
+        'java': java_settings.get('RUNTIME_PATH', 'java'),
+        'javac': java_settings.get('COMPILER_PATH', 'javac'),
+    }
+
+
+def split_compile_flags(flags):
+    """
+    COMPILE_FLAGS são do javac de linha de comando: as -J... vão para a JVM
+    do daemon e o resto para o compilador.
+    """
+    jvm_flags = [flag[2:] for flag in flags if flag.startswith('-J')]
+    compiler_flags = [flag for flag in flags if not flag.startswith('-J')]
+    return jvm_flags, compiler_flags
+
+
+def _utf(text):
+    data = text.encode('utf-8')
+    return struct.pack('>H', len(data)) + data
+
+
+class CompilerDaemon:
+    """Um processo CompilerDaemon; compile() envia um fonte e lê a resposta"""
+
+    def __init__(self, java_path='java', javac_path='javac', heap_mb=256, jvm_flags=()):
+        self.compiles = 0
+        classes_dir = ensure_worker_classes(javac_path, DAEMON_SOURCE)
+        command = [
+            java_path,
+            f'-Xmx{heap_mb}m',
+            '-XX:+UseSerialGC',
+            '-Dfile.encoding=UTF-8',
+            *jvm_flags,
+            '-cp', classes_dir, DAEMON_CLASS,
+        ]
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise WorkerUnavailable('Java Runtime não encontrado')
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+        self._buffer = bytearray()
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        try:
+            ready = self._read_int(deadline)
+            if ready == UNAVAILABLE:
+                reason = self._read_exact(self._read_short(deadline), deadline).decode('utf-8', errors='ignore')
+                raise WorkerUnavailable(reason)
+        except (WorkerCrashed, TimeoutError):
+            self.kill()
+            raise WorkerUnavailable('Daemon do compilador não iniciou')
+        except WorkerUnavailable:
+            self.kill()
+            raise
+        if ready != READY:
+            self.kill()
+            raise WorkerUnavailable('Handshake inválido do daemon do compilador')
+        logger.info(f"[JAVAC-DAEMON] Daemon {self.process.pid} ready")
+
+    def _read_exact(self, size, deadline):
+        while len(self._buffer) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError()
+            if not self._selector.select(timeout=remaining):
+                continue
+            chunk = os.read(self.process.stdout.fileno(), 65536)
+            if not chunk:
+                raise WorkerCrashed()
+            self._buffer.extend(chunk)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _read_int(self, deadline):
+        return struct.unpack('>i', self._read_exact(4, deadline))[0]
+
+    def _read_short(self, deadline):
+        return struct.unpack('>H', self._read_exact(2, deadline))[0]
+
+    def compile(self, source_name, source, options, timeout):
+        """
+        Compila source (bytes) como source_name com as opções do javac.
+        Retorna {'status', 'classes': {nome binário: bytes}, 'diagnostics'}.
+        Levanta CompilerTimeout ou WorkerCrashed (em ambos o daemon é morto).
+        """
+        self.compiles += 1
+        request = b''.join([
+            struct.pack('>i', OP_COMPILE),
+            _utf(source_name),
+            struct.pack('>i', len(source)), source,
+            struct.pack('>i', len(options)),
+            *(_utf(option) for option in options),
+        ])
+        deadline = time.monotonic() + timeout
+
+        try:
+            self.process.stdin.write(request)
+            self.process.stdin.flush()
+
+            status = self._read_int(deadline)
+            classes = {}
+            for _ in range(self._read_int(deadline)):
+                name = self._read_exact(self._read_short(deadline), deadline).decode('utf-8')
+                classes[name] = self._read_exact(self._read_int(deadline), deadline)
+            diagnostics = self._read_exact(self._read_int(deadline), deadline).decode('utf-8', errors='ignore')
+        except TimeoutError:
+            self.kill()
+            raise CompilerTimeout()
+        except (WorkerCrashed, BrokenPipeError, OSError):
+            self.kill()
+            raise WorkerCrashed()
+
+        return {'status': status, 'classes': classes, 'diagnostics': diagnostics}
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+        try:
+            self._selector.close()
+        except Exception:
+            pass
+
+
+_daemon = None
+_daemon_lock = threading.Lock()
+_unavailable_at = None
+
+
+def _get_daemon(jvm_flags):
+    """Daemon do processo, iniciado (ou reiniciado) sob demanda; chamar com _daemon_lock"""
+    global _daemon, _unavailable_at
+
+    if _daemon is not None and _daemon.alive():
+        return _daemon
+    if _daemon is not None:
+        logger.warning("[JAVAC-DAEMON] Daemon died, restarting")
+        _daemon.kill()
+        _daemon = None
+
+    if _unavailable_at and time.monotonic() - _unavailable_at < RESTART_INTERVAL:
+        raise WorkerUnavailable('Daemon do compilador falhou ao iniciar recentemente')
+    config = get_compiler_daemon_settings()
+    try:
+        _daemon = CompilerDaemon(config['java'], config['javac'], config['heap_mb'], jvm_flags)
+    except WorkerUnavailable:
+        _unavailable_at = time.monotonic()
+        raise
+    _unavailable_at = None
+    return _daemon
+
+
+def _discard_daemon():
+    global _daemon
+    if _daemon is not None:
+        _daemon.kill()
+        _daemon = None
+
+
+def compile_in_daemon(source_path, flags, timeout):
+    """
+    Compila o fonte no daemon e grava os .class ao lado dele, como o javac de
+    linha de comando faria. flags são as COMPILE_FLAGS do javac.
+
+    Retorna {'status': 'ok' | 'error' | 'timeout', 'diagnostics', 'files'}
+    ou None se o daemon não puder ser usado (o chamador usa o javac).
+    """
+    work_dir, source_name = os.path.split(source_path)
+    jvm_flags, compiler_flags = split_compile_flags(flags)
+    with open(source_path, 'rb') as source_file:
+        source = source_file.read()
+    # -cp com o diretório da submissão, como `javac -cp .` nele
+    options = ['-cp', work_dir, '-encoding', 'UTF-8', *compiler_flags]
+
+    with _daemon_lock:
+        try:
+            daemon = _get_daemon(jvm_flags)
+        except WorkerUnavailable as e:
+            logger.warning(f"[JAVAC-DAEMON] Unavailable, falling back to javac: {e}")
+            return None
+        try:
+            response = daemon.compile(source_name, source, options, timeout)
+        except CompilerTimeout:
+            _discard_daemon()
+            logger.warning(f"[JAVAC-DAEMON] Compilation of {source_name} timed out, daemon restarted")
+            return {'status': 'timeout', 'diagnostics': '', 'files': []}
+        except WorkerCrashed:
+            _discard_daemon()
+            logger.warning(f"[JAVAC-DAEMON] Daemon crashed compiling {source_name}, falling back to javac")
+            return None
+        if daemon.compiles >= get_compiler_daemon_settings()['max_compiles']:
+            _discard_daemon()  # Recicla: caches do javac só crescem
+
+    if response['status'] == STATUS_INTERNAL_ERROR:
+        logger.warning(f"[JAVAC-DAEMON] Internal compiler error, falling back to javac: "
+                       f"{response['diagnostics'][:300]}")
+        return None
+    if response['status'] == STATUS_COMPILE_ERROR:
+        return {'status': 'error', 'diagnostics': response['diagnostics'], 'files': []}
+
+    # Sem -d o javac grava cada .class ao lado do fonte, qualquer que seja o pacote
+    files = []
+    for name, data in response['classes'].items():
+        file_name = f"{name.rsplit('.', 1)[-1]}.class"
+        with open(os.path.join(work_dir, file_name), 'wb') as class_file:
+            class_file.write(data)
+        files.append(file_name)
+    return {'status': 'ok', 'diagnostics': response['diagnostics'], 'files': files}
+
+
+def start_compiler_daemon(flags=()):
+    """Inicia o daemon antes da primeira compilação (aquecimento do backend)"""
+    with _daemon_lock:
+        try:
+            _get_daemon(split_compile_flags(flags)[0])
+        except WorkerUnavailable as e:
+            logger.warning(f"[JAVAC-DAEMON] Could not start: {e}")
@@ -0,0 +1,144 @@
+# challenges/judge_queue.py
+#
+# Fila de avaliação usando apenas o banco de dados (sem broker externo).
+#
+# A view cria a Submission como 'pending' e retorna; os processos
+# `manage.py judge_worker` pegam submissões pendentes com um UPDATE filtrado
+# por status (só um worker consegue mudar 'pending' -> 'running'), avaliam e
+# gravam o resultado. Submissões presas em 'running' por um worker que morreu
+# voltam para a fila depois de STALE_AFTER segundos.
+#
+# Cada worker grava um sinal de vida (JudgeWorkerHeartbeat) a cada
+# HEARTBEAT_INTERVAL segundos. Sem nenhum worker vivo há HEARTBEAT_TIMEOUT
+# segundos, as views avaliam na própria requisição em vez de deixar a
+# submissão 'pending' para sempre.
+
+import os
+import socket
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import JudgeWorkerHeartbeat, Submission
+from .leaderboards import verdict_changed
+from .standings import refresh_standings
+
+logger = logging.getLogger(__name__)
+
+
+def get_queue_settings():
+    config = settings.CODE_EXECUTION.get('JUDGE_QUEUE', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'poll_interval': config.get('POLL_INTERVAL', 1.0),
+        'stale_after': config.get('STALE_AFTER', 300),
+        'max_attempts': config.get('MAX_ATTEMPTS', 3),
+        'heartbeat_interval': config.get('HEARTBEAT_INTERVAL', 10),
+        'heartbeat_timeout': config.get('HEARTBEAT_TIMEOUT', 60),
+    }
+
+
+def judge_queue_enabled():
+    return get_queue_settings()['enabled']
+
+
+def record_heartbeat(worker_id):
+    JudgeWorkerHeartbeat.objects.update_or_create(worker_id=worker_id, defaults={'last_seen': timezone.now()})
+
+
+def clear_heartbeat(worker_id):
+    JudgeWorkerHeartbeat.objects.filter(worker_id=worker_id).delete()
+
+
+def live_workers():
+    cutoff = timezone.now() - timedelta(seconds=get_queue_settings()['heartbeat_timeout'])
+    return JudgeWorkerHeartbeat.objects.filter(last_seen__gte=cutoff)
+
+
+def judge_queue_available():
+    """Fila habilitada e algum judge_worker vivo para esvaziá-la"""
+    if not judge_queue_enabled():
+        return False
+    if live_workers().exists():
+        return True
+    logger.warning("[QUEUE] No live judge_worker, judging in the request")
+    return False
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_next_submission(worker_id):
+    """
+    Pega a submissão pendente mais antiga. O UPDATE só afeta a linha se ela
+    ainda estiver 'pending', então dois workers nunca pegam a mesma.
+    Retorna a Submission (já como 'running') ou None se a fila está vazia.
+    """
+    while True:
+        candidate_id = (
+            Submission.objects.filter(status='pending')
+            .order_by('submitted_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if candidate_id is None:
+            return None
+
+        claimed = Submission.objects.filter(pk=candidate_id, status='pending').update(
+            status='running',
+            claimed_at=timezone.now(),
+            claimed_by=worker_id,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            # A avaliação usa o índice dos casos de teste, não o JSON do desafio
+            return Submission.objects.select_related('challenge', 'language', 'user').defer(
+                'challenge__test_cases'
+            ).get(pk=candidate_id)
+        # Outro worker pegou primeiro: tenta a próxima
+
+
+def requeue_stale_submissions():
+    """
+    Devolve à fila submissões 'running' abandonadas (worker morto).
+    Depois de MAX_ATTEMPTS tentativas a submissão é encerrada com erro.
+    Retorna (reenfileiradas, desistidas).
+    """
+    config = get_queue_settings()
+    cutoff = timezone.now() - timedelta(seconds=config['stale_after'])
+    stale = Submission.objects.filter(status='running', claimed_at__lt=cutoff)
+
+    abandoned = stale.filter(attempts__gte=config['max_attempts'])
+    abandoned_users = set(abandoned.values_list('user_id', flat=True))
+    given_up = abandoned.update(
+        status='runtime_error',
+        error_message='Falha interna no juiz: avaliação abandonada',
+        judged_at=timezone.now(),
+        result_data={
+            'success': True,
+            'status': 'runtime_error',
+            'message': 'Falha interna no juiz. Tente enviar novamente.',
+        },
+    )
+    requeued = stale.filter(attempts__lt=config['max_attempts']).update(
+        status='pending',
+        claimed_at=None,
+        claimed_by='',
+    )
+
+    if given_up:
+        refresh_standings(abandoned_users)  # update() não dispara o post_save
+        verdict_changed((), accepted=False)
+
+    if requeued or given_up:
+        logger.warning(f"[QUEUE] Stale submissions: {requeued} requeued, {given_up} given up")
+    return requeued, given_up
+
+
+def queue_position(submission):
+    """Quantas submissões pendentes estão à frente desta"""
+    return Submission.objects.filter(status='pending', submitted_at__lt=submission.submitted_at).count()
@@ -0,0 +1,114 @@
+// challenges/jvm/CdsWarmup.java
+//
+// Programa de aquecimento para o arquivo de Class Data Sharing (challenges/jvm_cds.py).
+// Faz o que um programa típico de maratona faz (leitura com Scanner e
+// BufferedReader, String.format, coleções, ordenação, BigInteger, lambdas) para
+// que as classes do JDK carregadas aqui entrem na lista de classes do arquivo.
+// Ele mesmo não entra no arquivo: só classes do JDK são arquivadas.
+//
+// Também é o programa medido por `manage.py build_cds --benchmark`.
+
+import java.io.BufferedReader;
+import java.io.BufferedWriter;
+import java.io.ByteArrayInputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStreamWriter;
+import java.io.PrintWriter;
+import java.math.BigDecimal;
+import java.math.BigInteger;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayDeque;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Collections;
+import java.util.HashMap;
+import java.util.HashSet;
+import java.util.LinkedList;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.PriorityQueue;
+import java.util.Scanner;
+import java.util.StringTokenizer;
+import java.util.TreeMap;
+import java.util.TreeSet;
+import java.util.stream.Collectors;
+import java.util.stream.IntStream;
+
+public class CdsWarmup {
+    public static void main(String[] args) throws IOException {
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        StringBuilder input = new StringBuilder();
+        String line;
+        while ((line = reader.readLine()) != null) {
+            input.append(line).append('\n');
+        }
+
+        // Scanner (com e sem Locale) sobre a mesma entrada
+        Scanner scanner = new Scanner(new ByteArrayInputStream(input.toString().getBytes(StandardCharsets.UTF_8)));
+        scanner.useLocale(Locale.US);
+        List<Integer> numbers = new ArrayList<>();
+        while (scanner.hasNextInt()) {
+            numbers.add(scanner.nextInt());
+        }
+        double real = scanner.hasNextDouble() ? scanner.nextDouble() : 0.5;
+        String word = scanner.hasNext() ? scanner.next() : "maratona";
+        scanner.close();
+
+        StringTokenizer tokenizer = new StringTokenizer(input.toString());
+        long sum = 0;
+        while (tokenizer.hasMoreTokens()) {
+            String token = tokenizer.nextToken();
+            try {
+                sum += Long.parseLong(token);
+            } catch (NumberFormatException e) {
+                sum += token.length();
+            }
+        }
+
+        int[] array = numbers.stream().mapToInt(Integer::intValue).toArray();
+        Arrays.sort(array);
+        Integer[] boxed = numbers.toArray(new Integer[0]);
+        Arrays.sort(boxed, Collections.reverseOrder());
+        Collections.sort(numbers);
+
+        Map<Integer, Integer> counts = new HashMap<>();
+        TreeMap<Integer, Integer> ordered = new TreeMap<>();
+        for (int value : array) {
+            counts.merge(value, 1, Integer::sum);
+            ordered.put(value, ordered.getOrDefault(value, 0) + 1);
+        }
+        TreeSet<String> words = new TreeSet<>(Arrays.asList(word, "a", "b"));
+        HashSet<Long> seen = new HashSet<>();
+        seen.add(sum);
+
+        PriorityQueue<int[]> queue = new PriorityQueue<>((x, y) -> Integer.compare(x[0], y[0]));
+        ArrayDeque<Integer> deque = new ArrayDeque<>();
+        LinkedList<Integer> linked = new LinkedList<>();
+        for (int i = 0; i < array.length; i++) {
+            queue.add(new int[] {array[i], i});
+            deque.addLast(array[i]);
+            linked.addFirst(array[i]);
+        }
+        while (!queue.isEmpty()) {
+            deque.pollFirst();
+            queue.poll();
+        }
+
+        String joined = IntStream.range(0, 5).mapToObj(Integer::toString).collect(Collectors.joining(","));
+        BigInteger factorial = BigInteger.ONE;
+        for (int i = 2; i <= 25; i++) {
+            factorial = factorial.multiply(BigInteger.valueOf(i));
+        }
+        BigDecimal decimal = new BigDecimal(real).setScale(3, java.math.RoundingMode.HALF_UP);
+
+        PrintWriter out = new PrintWriter(new BufferedWriter(new OutputStreamWriter(System.out, StandardCharsets.UTF_8)));
+        out.println(String.format("%d %.2f %s", sum, real, word));
+        out.printf(Locale.US, "%.6f %5d %-3s%n", Math.sqrt(sum), counts.size(), joined);
+        out.println(ordered.firstKey() + " " + words.first() + " " + seen.size() + " " + linked.size());
+        out.println(factorial + " " + decimal.toPlainString() + " " + Math.max(Math.abs(-1L), 0));
+        out.flush();
+        System.out.printf("%s%n", String.join(" ", Collections.nCopies(2, "ok")));
+    }
+}
@@ -0,0 +1,249 @@
+// challenges/jvm/CompilerDaemon.java
+//
+// Compilador Java residente usado pelo juiz (challenges/javac_daemon.py).
+// Compila com a API javax.tools em memória (fonte e .class nunca tocam o
+// disco aqui) e devolve os bytes das classes ou os diagnósticos no formato
+// do javac de linha de comando. A JVM e o javac ficam aquecidos entre as
+// compilações; o lado Python aplica o limite de tempo e reinicia o daemon.
+//
+// Protocolo (stdin/stdout do daemon, big-endian via DataInput/DataOutputStream):
+//   daemon -> python : int READY (ou int UNAVAILABLE, UTF motivo)
+//   python -> daemon : int OP_COMPILE, UTF sourceName, int sourceLength, byte[] source (UTF-8),
+//                      int optionCount, UTF option...
+//   daemon -> python : int status, int classCount, (UTF binaryName, int length, byte[] bytes)...,
+//                      int diagnosticsLength, byte[] diagnostics (UTF-8)
+
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.io.PrintWriter;
+import java.io.StringWriter;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.FileObject;
+import javax.tools.ForwardingJavaFileManager;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.SimpleJavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+public class CompilerDaemon {
+    static final int READY = 0x4A415643;
+    static final int UNAVAILABLE = 0x4E4F4A43;
+    static final int OP_COMPILE = 1;
+
+    static final int STATUS_OK = 0;
+    static final int STATUS_COMPILE_ERROR = 1;
+    static final int STATUS_INTERNAL_ERROR = 2;
+
+    /** Fonte vindo da memória */
+    static class SourceFile extends SimpleJavaFileObject {
+        final String code;
+
+        SourceFile(String name, String code) {
+            super(URI.create("string:///" + name), Kind.SOURCE);
+            this.code = code;
+        }
+
+        @Override
+        public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+            return code;
+        }
+    }
+
+    /** .class gerado em memória */
+    static class ClassFile extends SimpleJavaFileObject {
+        final ByteArrayOutputStream bytes = new ByteArrayOutputStream();
+
+        ClassFile(String binaryName) {
+            super(URI.create("bytes:///" + binaryName.replace('.', '/') + ".class"), Kind.CLASS);
+        }
+
+        @Override
+        public OutputStream openOutputStream() {
+            return bytes;
+        }
+    }
+
+    /** Gerenciador que guarda as classes geradas em vez de gravá-las */
+    static class MemoryFileManager extends ForwardingJavaFileManager<StandardJavaFileManager> {
+        final Map<String, ClassFile> classes = new LinkedHashMap<>();
+
+        MemoryFileManager(StandardJavaFileManager fileManager) {
+            super(fileManager);
+        }
+
+        @Override
+        public JavaFileObject getJavaFileForOutput(Location location, String className,
+                                                   JavaFileObject.Kind kind, FileObject sibling) {
+            ClassFile file = new ClassFile(className);
+            classes.put(className, file);
+            return file;
+        }
+    }
+
+    public static void main(String[] args) throws IOException {
+        // O stdout real é o canal do protocolo; prints do javac vão para o stderr
+        DataOutputStream out = new DataOutputStream(
+            new BufferedOutputStream(new FileOutputStream(FileDescriptor.out), 1 << 16));
+        System.setOut(new PrintStream(new FileOutputStream(FileDescriptor.err), true));
+        DataInputStream in = new DataInputStream(new BufferedInputStream(System.in, 1 << 16));
+
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            out.writeInt(UNAVAILABLE);
+            out.writeUTF("javax.tools.JavaCompiler indisponível (JRE sem compilador)");
+            out.flush();
+            return;
+        }
+        StandardJavaFileManager standardManager = compiler.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8);
+
+        // Uma compilação vazia carrega o javac antes do READY
+        compile(compiler, standardManager, "Warmup.java", "class Warmup {}", Collections.<String>emptyList());
+
+        out.writeInt(READY);
+        out.flush();
+
+        while (true) {
+            int op;
+            try {
+                op = in.readInt();
+            } catch (EOFException e) {
+                return;
+            }
+            if (op != OP_COMPILE) {
+                return;
+            }
+            String sourceName = in.readUTF();
+            byte[] source = new byte[in.readInt()];
+            in.readFully(source);
+            int optionCount = in.readInt();
+            List<String> options = new ArrayList<>();
+            for (int i = 0; i < optionCount; i++) {
+                options.add(in.readUTF());
+            }
+
+            Result result;
+            try {
+                result = compile(compiler, standardManager, sourceName,
+                                 new String(source, StandardCharsets.UTF_8), options);
+            } catch (Throwable t) {
+                StringWriter trace = new StringWriter();
+                t.printStackTrace(new PrintWriter(trace));
+                result = new Result(STATUS_INTERNAL_ERROR, Collections.<String, ClassFile>emptyMap(), trace.toString());
+            }
+
+            out.writeInt(result.status);
+            out.writeInt(result.classes.size());
+            for (Map.Entry<String, ClassFile> entry : result.classes.entrySet()) {
+                byte[] bytes = entry.getValue().bytes.toByteArray();
+                out.writeUTF(entry.getKey());
+                out.writeInt(bytes.length);
+                out.write(bytes);
+            }
+            byte[] diagnostics = result.diagnostics.getBytes(StandardCharsets.UTF_8);
+            out.writeInt(diagnostics.length);
+            out.write(diagnostics);
+            out.flush();
+        }
+    }
+
+    static class Result {
+        final int status;
+        final Map<String, ClassFile> classes;
+        final String diagnostics;
+
+        Result(int status, Map<String, ClassFile> classes, String diagnostics) {
+            this.status = status;
+            this.classes = classes;
+            this.diagnostics = diagnostics;
+        }
+    }
+
+    static Result compile(JavaCompiler compiler, StandardJavaFileManager standardManager,
+                          String sourceName, String source, List<String> options) {
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        MemoryFileManager fileManager = new MemoryFileManager(standardManager);
+        StringWriter otherOutput = new StringWriter();
+
+        boolean success = compiler.getTask(
+            otherOutput, fileManager, diagnostics, options, null,
+            Collections.singletonList(new SourceFile(sourceName, source))
+        ).call();
+
+        String report = formatDiagnostics(diagnostics.getDiagnostics(), sourceName, source) + otherOutput;
+        if (!success) {
+            return new Result(STATUS_COMPILE_ERROR, Collections.<String, ClassFile>emptyMap(), report);
+        }
+        return new Result(STATUS_OK, fileManager.classes, report);
+    }
+
+    /** Mesmo formato do javac de linha de comando: "Main.java:3: error: ..." + linha + circunflexo */
+    static String formatDiagnostics(List<Diagnostic<? extends JavaFileObject>> diagnostics, String sourceName, String source) {
+        String[] lines = source.split("\n", -1);
+        StringBuilder report = new StringBuilder();
+        int errors = 0;
+        int warnings = 0;
+        for (Diagnostic<? extends JavaFileObject> diagnostic : diagnostics) {
+            String kind;
+            switch (diagnostic.getKind()) {
+                case ERROR:
+                    kind = "error";
+                    errors++;
+                    break;
+                case WARNING:
+                case MANDATORY_WARNING:
+                    kind = "warning";
+                    warnings++;
+                    break;
+                default:
+                    kind = "note";
+            }
+            String message = diagnostic.getMessage(Locale.ROOT);
+            long line = diagnostic.getLineNumber();
+            if (diagnostic.getSource() == null || line == Diagnostic.NOPOS) {
+                report.append(kind).append(": ").append(message).append('\n');
+                continue;
+            }
+            report.append(sourceName).append(':').append(line).append(": ").append(kind).append(": ")
+                  .append(message).append('\n');
+            if (line >= 1 && line <= lines.length) {
+                String text = lines[(int) line - 1].replace("\r", "");
+                report.append(text).append('\n');
+                long column = diagnostic.getColumnNumber();
+                if (column != Diagnostic.NOPOS) {
+                    StringBuilder caret = new StringBuilder();
+                    for (int i = 1; i < column && i <= text.length(); i++) {
+                        caret.append(text.charAt(i - 1) == '\t' ? '\t' : ' ');
+                    }
+                    report.append(caret).append("^\n");
+                }
+            }
+        }
+        if (errors > 0) {
+            report.append(errors).append(errors == 1 ? " error\n" : " errors\n");
+        }
+        if (warnings > 0) {
+            report.append(warnings).append(warnings == 1 ? " warning\n" : " warnings\n");
+        }
+        return report.toString();
+    }
+}
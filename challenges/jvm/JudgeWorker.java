@@ -0,0 +1,405 @@
+// challenges/jvm/JudgeWorker.java
+//
+// Worker JVM de longa duração usado pelo pool de execução Java (challenges/jvm_pool.py).
+// Cada execução carrega as classes da submissão em um classloader isolado,
+// redireciona stdin/stdout/stderr e invoca main() com limite de tempo.
+//
+// Protocolo (stdin/stdout do worker, big-endian via DataInput/DataOutputStream):
+//   worker -> python : int READY
+//   python -> worker : int OP_RUN, UTF classpath, UTF className, int timeLimitMs,
+//                      int stdoutLimit, int stderrLimit, int inputLength, byte[] input
+//   worker -> python : int status, int exitCode, long elapsedMicros, long cpuMicros,
+//                      long peakHeapBytes, int stdoutLength, byte[] stdout,
+//                      int stderrLength, byte[] stderr, boolean recycle
+//
+// cpuMicros é o tempo de CPU da thread main da submissão (-1 se a JVM não mede);
+// peakHeapBytes é o pico de uso do heap durante a execução. Ao passar de
+// stdoutLimit/stderrLimit bytes, a escrita da submissão lança OutputLimitExceeded
+// e a execução termina com STATUS_OUTPUT_LIMIT.
+//
+// A JVM é compartilhada pelas submissões de todos os usuários: as threads da
+// submissão não podem trocar o SecurityManager, System.in/out/err, ler ou
+// escrever nos descritores do protocolo, criar ou mexer em threads fora do
+// próprio grupo, gravar arquivos nem executar programas. Locale, TimeZone e
+// propriedades do sistema alterados pela submissão são restaurados ao final.
+
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryPoolMXBean;
+import java.lang.management.MemoryType;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.io.FilePermission;
+import java.security.Permission;
+import java.util.Locale;
+import java.util.Properties;
+import java.util.Set;
+import java.util.TimeZone;
+import java.util.regex.Pattern;
+
+public class JudgeWorker {
+
+    static final int READY = 0x4A554447;
+    static final int OP_RUN = 1;
+
+    static final int STATUS_OK = 0;
+    static final int STATUS_RUNTIME_ERROR = 1;
+    static final int STATUS_TIMEOUT = 2;
+    static final int STATUS_OUT_OF_MEMORY = 3;
+    static final int STATUS_LOAD_ERROR = 4;
+    static final int STATUS_OUTPUT_LIMIT = 5;
+
+    /** Lançada no lugar de System.exit() durante a execução da submissão. */
+    static final class ExitTrapped extends SecurityException {
+        final int status;
+
+        ExitTrapped(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+
+    /** Estado global do JDK que a submissão pode alterar sem permissão especial. */
+    static final class GlobalState {
+        final Locale locale = Locale.getDefault();
+        final Locale formatLocale = Locale.getDefault(Locale.Category.FORMAT);
+        final Locale displayLocale = Locale.getDefault(Locale.Category.DISPLAY);
+        final TimeZone timeZone = TimeZone.getDefault();
+        final Properties properties = new Properties();
+
+        GlobalState() {
+            properties.putAll(System.getProperties());
+        }
+
+        void restore() {
+            Locale.setDefault(locale);
+            Locale.setDefault(Locale.Category.FORMAT, formatLocale);
+            Locale.setDefault(Locale.Category.DISPLAY, displayLocale);
+            TimeZone.setDefault(timeZone);
+            Properties current = System.getProperties();
+            if (!current.equals(properties)) {
+                current.clear();
+                current.putAll(properties);
+            }
+        }
+    }
+
+    /**
+     * Intercepta System.exit() das threads da submissão e nega a elas o que
+     * afetaria o worker ou as próximas execuções; as threads do worker podem tudo.
+     */
+    static final class ExitTrap extends SecurityManager {
+        static final Set<String> DENIED = Set.of(
+                "setSecurityManager", "createSecurityManager", "setIO",
+                "readFileDescriptor", "writeFileDescriptor",
+                "modifyThreadGroup", "stopThread", "setFactory",
+                "setDefaultUncaughtExceptionHandler", "shutdownHooks");
+
+        static final Pattern WRITE_ACTIONS = Pattern.compile("write|delete|execute");
+
+        volatile ThreadGroup judged;
+
+        boolean inSubmission() {
+            ThreadGroup group = judged;
+            return group != null && group.parentOf(Thread.currentThread().getThreadGroup());
+        }
+
+        @Override
+        public void checkExit(int status) {
+            if (inSubmission()) {
+                throw new ExitTrapped(status);
+            }
+        }
+
+        @Override
+        public void checkPermission(Permission perm) {
+            if (!inSubmission()) {
+                return;
+            }
+            if (DENIED.contains(perm.getName())) {
+                throw new SecurityException("Operação não permitida: " + perm);
+            }
+            if (perm instanceof FilePermission && WRITE_ACTIONS.matcher(perm.getActions()).find()) {
+                throw new SecurityException("Operação não permitida: " + perm);  // Ler (ex.: classes) pode
+            }
+        }
+
+        @Override
+        public void checkPermission(Permission perm, Object context) {
+            checkPermission(perm);
+        }
+
+        // O padrão só verifica threads e grupos do grupo raiz: fora do próprio grupo, nada
+        @Override
+        public void checkAccess(Thread thread) {
+            ThreadGroup group = thread.getThreadGroup();
+            if (inSubmission() && (group == null || !judged.parentOf(group))) {
+                throw new SecurityException("Thread fora da submissão: " + thread.getName());
+            }
+        }
+
+        @Override
+        public void checkAccess(ThreadGroup group) {
+            if (inSubmission() && !judged.parentOf(group)) {
+                throw new SecurityException("Grupo de threads fora da submissão: " + group.getName());
+            }
+        }
+    }
+
+    /** Lançada na thread da submissão quando ela escreve além do limite de saída. */
+    static final class OutputLimitExceeded extends Error {
+        OutputLimitExceeded() {
+            super("Output limit exceeded");
+        }
+    }
+
+    /**
+     * Buffer de saída com tamanho máximo. Enquanto armed, escrever além do limite
+     * lança OutputLimitExceeded; depois (mensagens do próprio worker) só trunca.
+     */
+    static final class BoundedOutputStream extends OutputStream {
+        final ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        final int limit;
+        volatile boolean armed = true;
+        volatile boolean exceeded;
+
+        BoundedOutputStream(int limit) {
+            this.limit = limit;
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            write(new byte[]{(byte) b}, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            int room = limit - buffer.size();
+            if (len > room) {
+                buffer.write(b, off, Math.max(room, 0));
+                exceeded = true;
+                if (armed) {
+                    throw new OutputLimitExceeded();
+                }
+                return;
+            }
+            buffer.write(b, off, len);
+        }
+
+        byte[] toByteArray() {
+            return buffer.toByteArray();
+        }
+    }
+
+    static final class Outcome {
+        volatile Throwable failure;
+        volatile Integer exitCode;
+        volatile long cpuNanos = -1;
+    }
+
+    static final ThreadMXBean THREADS = ManagementFactory.getThreadMXBean();
+
+    static long currentThreadCpuNanos() {
+        return THREADS.isCurrentThreadCpuTimeSupported() ? THREADS.getCurrentThreadCpuTime() : -1;
+    }
+
+    static void resetHeapPeaks() {
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == MemoryType.HEAP && pool.isValid()) {
+                pool.resetPeakUsage();
+            }
+        }
+    }
+
+    static long heapPeakBytes() {
+        long peak = 0;
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == MemoryType.HEAP && pool.isValid() && pool.getPeakUsage() != null) {
+                peak += pool.getPeakUsage().getUsed();
+            }
+        }
+        return peak;
+    }
+
+    public static void main(String[] args) throws Exception {
+        DataInputStream in = new DataInputStream(new BufferedInputStream(new FileInputStream(FileDescriptor.in)));
+        DataOutputStream out = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(FileDescriptor.out)));
+
+        ExitTrap trap = null;
+        try {
+            trap = new ExitTrap();
+            System.setSecurityManager(trap);
+        } catch (UnsupportedOperationException | SecurityException e) {
+            // JDK sem SecurityManager: System.exit() encerra o worker e o lado Python
+            // repete o teste no modo processo-por-execução.
+            trap = null;
+        }
+
+        out.writeInt(READY);
+        out.flush();
+
+        while (true) {
+            int op;
+            try {
+                op = in.readInt();
+            } catch (EOFException e) {
+                return;
+            }
+            if (op != OP_RUN) {
+                return;
+            }
+
+            String classpath = in.readUTF();
+            String className = in.readUTF();
+            int timeLimitMs = in.readInt();
+            int stdoutLimit = in.readInt();
+            int stderrLimit = in.readInt();
+            byte[] input = new byte[in.readInt()];
+            in.readFully(input);
+
+            runSubmission(trap, out, classpath, className, timeLimitMs, stdoutLimit, stderrLimit, input);
+        }
+    }
+
+    static void runSubmission(ExitTrap trap, DataOutputStream out, String classpath, String className,
+                              int timeLimitMs, int stdoutLimit, int stderrLimit, byte[] input) throws Exception {
+        InputStream originalIn = System.in;
+        PrintStream originalOut = System.out;
+        PrintStream originalErr = System.err;
+
+        BoundedOutputStream stdout = new BoundedOutputStream(stdoutLimit);
+        BoundedOutputStream stderr = new BoundedOutputStream(stderrLimit);
+        PrintStream userOut = new PrintStream(stdout, false, "UTF-8");
+        PrintStream userErr = new PrintStream(stderr, true, "UTF-8");
+
+        ThreadGroup group = new ThreadGroup("judge-submission");
+        GlobalState global = new GlobalState();
+        int threadsBefore = THREADS.getThreadCount();
+        Outcome outcome = new Outcome();
+        int status = STATUS_OK;
+        boolean recycle = false;
+        long start = System.nanoTime();
+
+        try (URLClassLoader loader = new URLClassLoader(
+                new URL[]{new File(classpath).toURI().toURL()}, ClassLoader.getPlatformClassLoader())) {
+
+            System.setIn(new ByteArrayInputStream(input));
+            System.setOut(userOut);
+            System.setErr(userErr);
+            if (trap != null) {
+                trap.judged = group;
+            }
+
+            Thread runner = new Thread(group, () -> {
+                try {
+                    Class<?> mainClass = Class.forName(className, true, loader);
+                    Method main = mainClass.getMethod("main", String[].class);
+                    main.invoke(null, (Object) new String[0]);
+                } catch (InvocationTargetException e) {
+                    outcome.failure = e.getCause();
+                } catch (ExceptionInInitializerError e) {
+                    outcome.failure = e.getCause() != null ? e.getCause() : e;
+                } catch (Throwable t) {
+                    outcome.failure = t;
+                } finally {
+                    outcome.cpuNanos = currentThreadCpuNanos();
+                }
+            }, "main");
+
+            // Heap limpo antes da execução: o pico medido é o da submissão, não o de testes anteriores
+            System.gc();
+            resetHeapPeaks();
+            start = System.nanoTime();
+            runner.start();
+            runner.join(timeLimitMs);
+            stdout.armed = false;
+            stderr.armed = false;
+            userOut.flush();
+
+            if (runner.isAlive()) {
+                // Não é possível interromper a thread com segurança: o worker deve ser reciclado
+                status = STATUS_TIMEOUT;
+                recycle = true;
+                if (THREADS.isThreadCpuTimeSupported()) {
+                    outcome.cpuNanos = THREADS.getThreadCpuTime(runner.getId());
+                }
+            } else if (outcome.failure instanceof ExitTrapped) {
+                outcome.exitCode = ((ExitTrapped) outcome.failure).status;
+                status = outcome.exitCode == 0 ? STATUS_OK : STATUS_RUNTIME_ERROR;
+            } else if (outcome.failure instanceof OutOfMemoryError) {
+                status = STATUS_OUT_OF_MEMORY;
+                recycle = true;
+                outcome.failure.printStackTrace(userErr);
+            } else if (outcome.failure instanceof ClassNotFoundException
+                    || outcome.failure instanceof NoSuchMethodException) {
+                status = STATUS_LOAD_ERROR;
+                userErr.println("Error: " + outcome.failure);
+            } else if (outcome.failure != null) {
+                status = STATUS_RUNTIME_ERROR;
+                userErr.print("Exception in thread \"main\" ");
+                outcome.failure.printStackTrace(userErr);
+            }
+
+            // Prevalece sobre o erro causado pelo próprio OutputLimitExceeded
+            if (stdout.exceeded || stderr.exceeded) {
+                status = STATUS_OUTPUT_LIMIT;
+            }
+
+            // Threads deixadas pela submissão (no grupo dela ou criadas pelo JDK a pedido dela,
+            // ex.: ForkJoinPool) contaminam o próximo teste
+            if (group.activeCount() > 0 || THREADS.getThreadCount() > threadsBefore) {
+                recycle = true;
+            }
+        } catch (OutOfMemoryError e) {
+            status = STATUS_OUT_OF_MEMORY;
+            recycle = true;
+        } finally {
+            if (trap != null) {
+                trap.judged = null;
+            }
+            System.setIn(originalIn);
+            System.setOut(originalOut);
+            System.setErr(originalErr);
+            global.restore();
+        }
+        if (trap == null) {
+            recycle = true;  // Sem SecurityManager nada impede a submissão de alterar o worker
+        }
+
+        long elapsedMicros = (System.nanoTime() - start) / 1000;
+        long cpuMicros = outcome.cpuNanos >= 0 ? outcome.cpuNanos / 1000 : -1;
+        long peakHeapBytes = heapPeakBytes();
+        int exitCode = outcome.exitCode != null ? outcome.exitCode : (status == STATUS_OK ? 0 : 1);
+
+        byte[] stdoutBytes = stdout.toByteArray();
+        byte[] stderrBytes = stderr.toByteArray();
+
+        out.writeInt(status);
+        out.writeInt(exitCode);
+        out.writeLong(elapsedMicros);
+        out.writeLong(cpuMicros);
+        out.writeLong(peakHeapBytes);
+        out.writeInt(stdoutBytes.length);
+        out.write(stdoutBytes);
+        out.writeInt(stderrBytes.length);
+        out.write(stderrBytes);
+        out.writeBoolean(recycle);
+        out.flush();
+    }
+}
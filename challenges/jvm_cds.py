@@ -0,0 +1,290 @@
+# challenges/jvm_cds.py
+#
+# Arquivo de Class Data Sharing (AppCDS) com as classes do JDK que programas de
+# maratona usam (Scanner, BufferedReader, String.format, coleções, ...).
+#
+# Cada `java` do juiz carrega e verifica centenas de classes do JDK antes de
+# chegar ao main(); com o arquivo elas são mapeadas já processadas. O arquivo
+# é gerado uma vez por JDK:
+#
+#   1. challenges/jvm/CdsWarmup.java roda com -XX:DumpLoadedClassList
+#   2. a lista é filtrada para só classes do JDK (nada da aplicação, então o
+#      arquivo vale para qualquer -cp, ou seja, para qualquer submissão)
+#   3. java -Xshare:dump gera o .jsa, que é conferido com -Xshare:on
+#
+#   <TEMP_DIR>/jvm_cds/<impressão digital>/judge.jsa
+#   <TEMP_DIR>/jvm_cds/<impressão digital>/manifest.json
+#
+# A impressão digital cobre a versão e o caminho real do JDK e o programa de
+# aquecimento: atualizar o JDK gera um novo arquivo. Um .jsa que não casa com
+# a JVM é ignorado por ela (-Xshare:auto), então o pior caso é a inicialização
+# sem CDS de antes.
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+from .artifact_cache import toolchain_version
+from .jvm_pool import java_major_version
+from .process_runner import run_process
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SOURCE = Path(__file__).resolve().parent / 'jvm' / 'CdsWarmup.java'
+WARMUP_CLASS = 'CdsWarmup'
+WARMUP_INPUT = '5 3 8 1 9 2 7\n4 6\n2.5 maratona\n'
+ARCHIVE_FILE = 'judge.jsa'
+CLASS_LIST_FILE = 'classes.lst'
+MANIFEST_FILE = 'manifest.json'
+MIN_JAVA_VERSION = 10  # AppCDS com SharedClassListFile no OpenJDK
+BUILD_TIMEOUT = 120    # segundos por etapa (javac, lista de classes, dump)
+
+# O dump usa o mesmo coletor das execuções: o arquivo é mapeado sem ajustes
+DUMP_FLAGS = ['-XX:+UseSerialGC']
+
+
+def get_cds_settings():
+    config = settings.CODE_EXECUTION.get('JAVA', {}).get('CLASS_DATA_SHARING', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'dir': Path(config.get('DIR') or Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'jvm_cds'),
+    }
+
+
+def archive_flags(archive):
+    """
+    Flags para usar o arquivo. Avisos da JVM (ex.: arquivo rejeitado) iriam
+    para o stdout e seriam comparados como saída do programa: vão para o stderr.
+    """
+    return [
+        '-Xshare:auto',
+        f'-XX:SharedArchiveFile={archive}',
+        '-Xlog:disable',
+        '-Xlog:all=warning:stderr',
+    ]
+
+
+def java_home(java):
+    """Caminho real do executável java (muda quando o JDK é trocado)"""
+    path = shutil.which(java)
+    return os.path.realpath(path) if path else None
+
+
+def cds_fingerprint(java):
+    digest = hashlib.sha256()
+    for part in (toolchain_version(java, '-version'), java_home(java), '\0'.join(DUMP_FLAGS)):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(WARMUP_SOURCE.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _run_step(command, cwd, input_data=''):
+    proc = subprocess.run(
+        command, input=input_data, capture_output=True, text=True, timeout=BUILD_TIMEOUT, cwd=cwd,
+        env={key: value for key, value in os.environ.items() if key != 'CLASSPATH'}
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(command[0])} failed: {(proc.stderr or proc.stdout).strip()[:300]}")
+    return proc
+
+
+def jdk_class_list(raw_list):
+    """Só classes do JDK: o programa de aquecimento e suas lambdas ficam de fora"""
+    return [
+        line for line in raw_list.splitlines()
+        if line.strip() and not line.startswith('#') and WARMUP_CLASS not in line
+    ]
+
+
+def build_archive(java, javac, force=False):
+    """
+    Gera o arquivo CDS para o JDK de java e devolve o caminho do .jsa (ou None
+    se não foi possível). Idempotente: se o manifesto já existe para a mesma
+    impressão digital, nada é regerado.
+    """
+    if not shutil.which(java) or not shutil.which(javac):
+        logger.info("[CDS] Java not found, skipping class data sharing archive")
+        return None
+    major = java_major_version(java)
+    if major < MIN_JAVA_VERSION:
+        logger.info(f"[CDS] Java {major} has no AppCDS class lists, skipping archive")
+        return None
+
+    fingerprint = cds_fingerprint(java)
+    base_dir = get_cds_settings()['dir']
+    archive_dir = base_dir / fingerprint
+
+    if (archive_dir / MANIFEST_FILE).exists() and not force:
+        return str(archive_dir / ARCHIVE_FILE)
+
+    base_dir.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(prefix='build_', dir=base_dir))
+    try:
+        start_time = time.time()
+        shutil.copy(WARMUP_SOURCE, build_dir)
+        _run_step([javac, '-encoding', 'UTF-8', '-nowarn', f'{WARMUP_CLASS}.java'], build_dir)
+
+        # 1. Classes que um programa típico carrega
+        _run_step(
+            [java, '-Xshare:off', *DUMP_FLAGS, f'-XX:DumpLoadedClassList={CLASS_LIST_FILE}.raw',
+             '-cp', '.', WARMUP_CLASS],
+            build_dir, WARMUP_INPUT
+        )
+        classes = jdk_class_list((build_dir / f'{CLASS_LIST_FILE}.raw').read_text(encoding='utf-8'))
+        (build_dir / f'{CLASS_LIST_FILE}.raw').unlink()
+        (build_dir / CLASS_LIST_FILE).write_text('\n'.join(classes) + '\n', encoding='utf-8')
+
+        # 2. Dump sem classpath da aplicação (diretório vazio), só classes do JDK
+        dump_dir = build_dir / 'dump'
+        dump_dir.mkdir()
+        archive = build_dir / ARCHIVE_FILE
+        _run_step(
+            [java, '-Xshare:dump', *DUMP_FLAGS, f'-XX:SharedClassListFile={build_dir / CLASS_LIST_FILE}',
+             f'-XX:SharedArchiveFile={archive}'],
+            dump_dir
+        )
+        dump_dir.rmdir()
+
+        # 3. -Xshare:on falha se a JVM não puder mapear o arquivo com outro -cp
+        _run_step(
+            [java, '-Xshare:on', *DUMP_FLAGS, f'-XX:SharedArchiveFile={archive}', '-cp', '.', WARMUP_CLASS],
+            build_dir, WARMUP_INPUT
+        )
+        build_time = time.time() - start_time
+
+        manifest = {
+            'java': java_home(java),
+            'java_version': toolchain_version(java, '-version'),
+            'java_major': major,
+            'flags': DUMP_FLAGS,
+            'classes': len(classes),
+            'archive_size': archive.stat().st_size,
+            'build_time': build_time,
+        }
+        with open(build_dir / MANIFEST_FILE, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        if force:
+            shutil.rmtree(archive_dir, ignore_errors=True)
+        try:
+            os.rename(build_dir, archive_dir)
+        except OSError:
+            pass  # Outro processo gerou primeiro; o arquivo dele serve
+        logger.info(f"[CDS] Built archive with {len(classes)} JDK classes for Java {major} in {build_time:.1f}s")
+        return str(archive_dir / ARCHIVE_FILE)
+    except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"[CDS] Archive build failed: {e}")
+        return None
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def remove_stale(keep):
+    """Remove arquivos de JDKs antigos (os que não estão em keep)"""
+    base_dir = get_cds_settings()['dir']
+    if not base_dir.exists():
+        return []
+    removed = []
+    for entry in base_dir.iterdir():
+        if entry.is_dir() and str(entry) not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed.append(entry.name)
+    return removed
+
+
+_archives = {}
+_building = set()
+_failed = set()
+_lock = threading.Lock()
+
+
+def ensure_archive(java, javac):
+    """Gera (ou só confere) o arquivo de forma síncrona; usado no aquecimento"""
+    archive = build_archive(java, javac)
+    with _lock:
+        if archive:
+            _archives[java] = archive
+        else:
+            _archives.pop(java, None)
+            _failed.add(java)
+    return archive
+
+
+def cds_flags(java, javac='javac'):
+    """
+    Flags extras para usar o arquivo CDS em um `java` do juiz, ou [] se ele
+    ainda não existe. Nesse caso ele é gerado em segundo plano e a execução
+    segue sem CDS; ele deveria ter sido gerado no deploy (manage.py build_cds).
+    """
+    if not get_cds_settings()['enabled']:
+        return []
+
+    with _lock:
+        archive = _archives.get(java)
+        if archive and os.path.exists(archive):
+            return archive_flags(archive)
+        _archives.pop(java, None)  # Apagado do disco: a JVM não pode recebê-lo
+        if java in _building or java in _failed:
+            return []
+        _building.add(java)
+
+    def build():
+        try:
+            ensure_archive(java, javac)
+        finally:
+            with _lock:
+                _building.discard(java)
+
+    # build_archive é idempotente: com o arquivo gerado no deploy isso só confere o manifesto
+    thread = threading.Thread(target=build, name='cds-build', daemon=True)
+    thread.start()
+    thread.join(timeout=1)
+    with _lock:
+        archive = _archives.get(java)
+    return archive_flags(archive) if archive else []
+
+
+def benchmark(java, archive, runs=10, flags=()):
+    """
+    Mede a inicialização do programa de aquecimento sem CDS, com o arquivo
+    padrão do JDK (o juiz antes deste arquivo) e com o arquivo do juiz.
+    Retorna {'off': {...}, 'default': {...}, 'judge': {...}} com médias e
+    mínimos de tempo de relógio e de CPU (ms).
+    """
+    classes_dir = Path(archive).parent
+    if not (classes_dir / f'{WARMUP_CLASS}.class').exists():
+        raise RuntimeError(f'{WARMUP_CLASS}.class não encontrado em {classes_dir}')
+
+    variants = {
+        'off': [java, '-Xshare:off', *flags],
+        'default': [java, *flags],
+        'judge': [java, *archive_flags(archive), *flags],
+    }
+    samples = {name: [] for name in variants}
+    for _ in range(runs):
+        # Alternadas: variações da máquina afetam todas igualmente
+        for name, command in variants.items():
+            run = run_process([*command, '-cp', '.', WARMUP_CLASS], WARMUP_INPUT, 30000, cwd=str(classes_dir))
+            if run['exit_code'] != 0:
+                raise RuntimeError(f"Execução falhou ({name}): {run['stderr'][:300]}")
+            samples[name].append(run)
+
+    return {
+        name: {
+            'wall_avg': sum(run['wall_time'] for run in entries) / len(entries),
+            'wall_min': min(run['wall_time'] for run in entries),
+            'cpu_avg': sum(run['cpu_time'] for run in entries) / len(entries),
+            'cpu_min': min(run['cpu_time'] for run in entries),
+        }
+        for name, entries in samples.items()
+    }
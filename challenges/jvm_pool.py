@@ -0,0 +1,464 @@
+# challenges/jvm_pool.py
+#
+# Pool de JVMs aquecidas para a execução de submissões Java.
+#
+# Cada worker é um processo `java JudgeWorker` de longa duração (ver
+# challenges/jvm/JudgeWorker.java) que carrega as classes de cada submissão em
+# um classloader isolado e invoca main() com stdin/stdout redirecionados.
+# Assim o custo de inicialização da JVM é pago uma vez por worker, e não uma
+# vez por caso de teste.
+#
+# O protocolo troca a entrada e a saída inteiras em memória (no worker e
+# aqui), então o pool só recebe testes pequenos: entrada acima de
+# WORKER_POOL['MAX_INPUT_SIZE'] vai direto para o modo processo, e uma saída
+# que passa de WORKER_POOL['MAX_OUTPUT_SIZE'] (mas não do MAX_OUTPUT_SIZE
+# geral) é repetida no modo processo, onde o stdin vem do arquivo e a saída
+# passa pelo comparador aos poucos. A saída só vai para o comparador depois
+# de a execução no pool terminar, então repetir não o alimenta duas vezes.
+
+import hashlib
+import os
+import re
+import selectors
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+from .output_capture import get_output_limits
+from .test_data import input_size, read_input
+
+logger = logging.getLogger(__name__)
+
+WORKER_SOURCE = Path(__file__).resolve().parent / 'jvm' / 'JudgeWorker.java'
+WORKER_CLASS = 'JudgeWorker'
+
+READY = 0x4A554447
+OP_RUN = 1
+
+STATUS_OK = 0
+STATUS_RUNTIME_ERROR = 1
+STATUS_TIMEOUT = 2
+STATUS_OUT_OF_MEMORY = 3
+STATUS_LOAD_ERROR = 4
+STATUS_OUTPUT_LIMIT = 5
+
+STARTUP_TIMEOUT = 15  # segundos para o worker ficar pronto
+RESPONSE_GRACE = 2    # folga além do limite de tempo antes de matar o worker
+
+
+class WorkerUnavailable(Exception):
+    """O pool não pode ser usado (java/javac ausentes, worker não inicia)"""
+
+
+class WorkerCrashed(Exception):
+    """O worker morreu durante uma execução (ex.: System.exit sem SecurityManager)"""
+
+
+class PoolOutputExceeded(Exception):
+    """A saída passou do limite do pool, mas não do limite geral: o teste vai para o modo processo"""
+
+
+def get_pool_settings():
+    java_settings = settings.CODE_EXECUTION.get('JAVA', {})
+    pool_settings = java_settings.get('WORKER_POOL', {})
+    return {
+        'mode': java_settings.get('EXECUTION_MODE', 'process'),
+        'size': pool_settings.get('SIZE', 2),
+        'max_runs': pool_settings.get('MAX_RUNS', 50),
+        'java': java_settings.get('RUNTIME_PATH', 'java'),
+        'javac': java_settings.get('COMPILER_PATH', 'javac'),
+        'supported_jdk': tuple(pool_settings.get('SUPPORTED_JDK', (8, 23))),
+        'max_input_size': pool_settings.get('MAX_INPUT_SIZE', 256 * 1024),
+        'max_output_size': pool_settings.get('MAX_OUTPUT_SIZE', 256 * 1024),
+    }
+
+
+def worker_pool_enabled():
+    """True quando a execução Java deve usar o pool em vez de um processo por execução"""
+    config = get_pool_settings()
+    return config['mode'] == 'pool' and jdk_supported(config['java'], config['supported_jdk'])
+
+
+_unsupported_jdks = set()
+
+
+def jdk_supported(java_path, supported):
+    """
+    O JudgeWorker depende do SecurityManager, removido no JDK 24 (JEP 486):
+    fora da faixa suportada o pool fica desligado no processo (modo processo),
+    em vez de tentar iniciar um worker a cada execução.
+    """
+    major = java_major_version(java_path)
+    low, high = supported
+    if low <= major <= high:
+        return True
+    if java_path not in _unsupported_jdks:
+        _unsupported_jdks.add(java_path)
+        logger.warning(
+            f"[JVM-POOL] JDK {major or 'unknown'} outside supported range {low}-{high}, using process mode"
+        )
+    return False
+
+
+_java_version_cache = {}
+
+
+def java_major_version(java_path='java'):
+    """Versão principal do JDK (8, 11, 17, ...); 0 se não for possível detectar"""
+    if java_path not in _java_version_cache:
+        major = 0
+        try:
+            proc = subprocess.run([java_path, '-version'], capture_output=True, text=True, timeout=10)
+            match = re.search(r'version "(\d+)(?:\.(\d+))?', proc.stderr)
+            if match:
+                major = int(match.group(1))
+                if major == 1 and match.group(2):  # formato antigo: 1.8
+                    major = int(match.group(2))
+        except Exception as e:
+            logger.warning(f"[JVM-POOL] Could not detect Java version: {e}")
+        _java_version_cache[java_path] = major
+    return _java_version_cache[java_path]
+
+
+def ensure_worker_classes(javac_path='javac', source_path=WORKER_SOURCE):
+    """
+    Compila um programa auxiliar (por padrão JudgeWorker.java) uma vez e
+    devolve o diretório com o .class. O diretório é indexado pelo hash do
+    fonte, então mudanças no programa geram uma nova compilação automaticamente.
+    """
+    source_path = Path(source_path)
+    class_name = source_path.stem
+    source = source_path.read_bytes()
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    base_dir = Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'jvm_worker'
+    classes_dir = base_dir / digest
+
+    with _worker_classes_lock:
+        if (classes_dir / f'{class_name}.class').exists():
+            return str(classes_dir)
+
+        failed_at = _worker_build_failed_at.get(class_name)
+        if failed_at and time.monotonic() - failed_at < BUILD_RETRY_INTERVAL:
+            raise WorkerUnavailable(f'Compilação de {class_name} falhou recentemente')
+        _worker_build_failed_at[class_name] = time.monotonic()
+
+        base_dir.mkdir(parents=True, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix='build_', dir=base_dir)
+        try:
+            shutil.copy(source_path, build_dir)
+            proc = subprocess.run(
+                [javac_path, '-encoding', 'UTF-8', '-nowarn', source_path.name],
+                capture_output=True, text=True, timeout=60, cwd=build_dir
+            )
+            if proc.returncode != 0:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise WorkerUnavailable(f'Falha ao compilar {class_name}: {proc.stderr.strip()[:300]}')
+            try:
+                os.rename(build_dir, classes_dir)
+            except OSError:
+                # Outro processo compilou primeiro
+                shutil.rmtree(build_dir, ignore_errors=True)
+            _worker_build_failed_at.pop(class_name, None)
+        except FileNotFoundError:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise WorkerUnavailable('Compilador Java não encontrado')
+        except subprocess.TimeoutExpired:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise WorkerUnavailable(f'Tempo limite ao compilar {class_name}')
+
+    return str(classes_dir)
+
+
+class JVMWorker:
+    """Um processo JVM de longa duração que executa submissões sob demanda"""
+
+    def __init__(self, heap_mb, java_path='java', javac_path='javac'):
+        self.heap_mb = heap_mb
+        self.runs = 0
+        self.broken = False
+
+        from .jvm_cds import cds_flags  # jvm_cds importa este módulo
+
+        classes_dir = ensure_worker_classes(javac_path)
+        command = [
+            java_path,
+            f'-Xmx{heap_mb}m',
+            '-XX:+UseSerialGC',
+            '-Dfile.encoding=UTF-8',
+            *cds_flags(java_path, javac_path),
+        ]
+        # JDK 12+ só permite instalar o SecurityManager em runtime com 'allow'
+        if java_major_version(java_path) >= 12:
+            command.append('-Djava.security.manager=allow')
+        command += ['-cp', classes_dir, WORKER_CLASS]
+
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise WorkerUnavailable('Java Runtime não encontrado')
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+        self._buffer = bytearray()
+
+        try:
+            (ready,) = struct.unpack('>i', self._read_exact(4, time.monotonic() + STARTUP_TIMEOUT))
+        except (WorkerCrashed, TimeoutError):
+            self.kill()
+            raise WorkerUnavailable('Worker JVM não iniciou')
+        if ready != READY:
+            self.kill()
+            raise WorkerUnavailable('Handshake inválido do worker JVM')
+        logger.debug(f"[JVM-POOL] Worker {self.process.pid} ready (heap {heap_mb}MB)")
+
+    def _read_exact(self, size, deadline):
+        while len(self._buffer) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError()
+            if not self._selector.select(timeout=remaining):
+                continue
+            chunk = os.read(self.process.stdout.fileno(), 65536)
+            if not chunk:
+                raise WorkerCrashed()
+            self._buffer.extend(chunk)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _read_int(self, deadline):
+        return struct.unpack('>i', self._read_exact(4, deadline))[0]
+
+    def run(self, classpath, class_name, test_input, time_limit, cpu_limit=None):
+        """
+        Executa main() de class_name (carregada de classpath) com o input dado.
+        time_limit é o limite de relógio e cpu_limit o de CPU da thread main,
+        ambos em segundos. Retorna dict no formato de execute_java.
+        """
+        cpu_limit = cpu_limit or time_limit
+        self.runs += 1
+        input_bytes = read_input(test_input)
+        classpath_bytes = classpath.encode('utf-8')
+        class_bytes = class_name.encode('utf-8')
+        output_limit, stderr_limit = get_output_limits()
+        stdout_limit = min(output_limit, get_pool_settings()['max_output_size'])
+        request = b''.join([
+            struct.pack('>i', OP_RUN),
+            struct.pack('>H', len(classpath_bytes)), classpath_bytes,
+            struct.pack('>H', len(class_bytes)), class_bytes,
+            struct.pack('>i', int(time_limit * 1000)),
+            struct.pack('>ii', stdout_limit, stderr_limit),
+            struct.pack('>i', len(input_bytes)), input_bytes,
+        ])
+
+        start_time = time.time()
+        deadline = time.monotonic() + time_limit + RESPONSE_GRACE
+
+        try:
+            self.process.stdin.write(request)
+            self.process.stdin.flush()
+
+            status = self._read_int(deadline)
+            exit_code = self._read_int(deadline)
+            (elapsed_micros, cpu_micros, peak_heap_bytes) = struct.unpack('>qqq', self._read_exact(24, deadline))
+            stdout = self._read_exact(self._read_int(deadline), deadline)
+            stderr = self._read_exact(self._read_int(deadline), deadline)
+            recycle = self._read_exact(1, deadline) != b'\x00'
+        except TimeoutError:
+            self.broken = True
+            self.kill()
+            return {
+                'success': False,
+                'error': 'time_limit_exceeded',
+                'message': f'Tempo limite excedido ({time_limit}s)',
+                'execution_time': (time.time() - start_time) * 1000
+            }
+        except (WorkerCrashed, BrokenPipeError, OSError):
+            self.broken = True
+            self.kill()
+            raise WorkerCrashed()
+
+        if recycle:
+            self.broken = True
+
+        usage = {
+            'execution_time': elapsed_micros / 1000,
+            'cpu_time': cpu_micros / 1000 if cpu_micros >= 0 else None,
+            'peak_memory_kb': peak_heap_bytes // 1024,
+        }
+        stderr_text = stderr.decode('utf-8', errors='ignore').strip()
+
+        if status == STATUS_OUTPUT_LIMIT:
+            if stdout_limit < output_limit and len(stdout) >= stdout_limit:
+                raise PoolOutputExceeded()
+            return {
+                'success': False,
+                'error': 'output_limit_exceeded',
+                'message': 'Limite de saída excedido',
+                **usage
+            }
+        cpu_exceeded = usage['cpu_time'] is not None and usage['cpu_time'] > cpu_limit * 1000
+        if status == STATUS_TIMEOUT or cpu_exceeded:
+            return {
+                'success': False,
+                'error': 'time_limit_exceeded',
+                'message': f'Tempo limite excedido ({cpu_limit}s)',
+                **usage
+            }
+        if status == STATUS_OUT_OF_MEMORY:
+            return {
+                'success': False,
+                'error': 'memory_limit_exceeded',
+                'message': stderr_text or 'java.lang.OutOfMemoryError',
+                **usage
+            }
+        if status != STATUS_OK or exit_code != 0:
+            return {
+                'success': False,
+                'error': 'runtime_error',
+                'message': stderr_text or 'Erro de execução',
+                **usage
+            }
+
+        return {
+            'success': True,
+            'output': stdout.decode('utf-8', errors='ignore'),
+            **usage
+        }
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+        try:
+            self._selector.close()
+        except Exception:
+            pass
+
+
+class JVMWorkerPool:
+    """
+    Pool limitado de JVMWorkers. Workers são reciclados após MAX_RUNS execuções
+    ou após qualquer comportamento anômalo (timeout, OOM, threads órfãs, crash).
+    """
+
+    def __init__(self, heap_mb, size=2, max_runs=50, java_path='java', javac_path='javac'):
+        self.heap_mb = heap_mb
+        self.size = max(1, size)
+        self.max_runs = max_runs
+        self.java_path = java_path
+        self.javac_path = javac_path
+        self._idle = []
+        self._total = 0
+        self._condition = threading.Condition()
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        return worker
+                    self._total -= 1
+                if self._total < self.size:
+                    self._total += 1
+                    break
+                self._condition.wait()
+
+        try:
+            return JVMWorker(self.heap_mb, self.java_path, self.javac_path)
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker):
+        recycle = worker.broken or worker.runs >= self.max_runs or not worker.alive()
+        if recycle:
+            worker.kill()
+            logger.debug(f"[JVM-POOL] Worker recycled after {worker.runs} runs")
+        with self._condition:
+            if recycle:
+                self._total -= 1
+            else:
+                self._idle.append(worker)
+            self._condition.notify()
+
+    def run(self, classpath, class_name, test_input, time_limit, cancel_token=None, cpu_limit=None):
+        worker = self._acquire()
+        if cancel_token is not None:
+            cancel_token.attach(worker)
+        try:
+            return worker.run(classpath, class_name, test_input, time_limit, cpu_limit)
+        finally:
+            if cancel_token is not None:
+                cancel_token.detach(worker)
+            self._release(worker)
+
+    def shutdown(self):
+        with self._condition:
+            for worker in self._idle:
+                worker.kill()
+            self._total -= len(self._idle)
+            self._idle = []
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(heap_mb):
+    """Pool compartilhado do processo para um dado limite de heap"""
+    with _pools_lock:
+        pool = _pools.get(heap_mb)
+        if pool is None:
+            config = get_pool_settings()
+            pool = JVMWorkerPool(
+                heap_mb,
+                size=config['size'],
+                max_runs=config['max_runs'],
+                java_path=config['java'],
+                javac_path=config['javac'],
+            )
+            _pools[heap_mb] = pool
+        return pool
+
+
+def run_in_worker_pool(classpath, class_name, test_input, time_limit, heap_mb, cancel_token=None, cpu_limit=None):
+    """
+    Executa no pool; retorna None se o pool não puder ser usado ou o teste
+    for grande demais para ele, para que o chamador volte ao modo
+    processo-por-execução.
+    """
+    if input_size(test_input) > get_pool_settings()['max_input_size']:
+        logger.debug("[JVM-POOL] Input over the pool limit, using process mode")
+        return None
+    try:
+        return get_worker_pool(heap_mb).run(
+            classpath, class_name, test_input, time_limit, cancel_token, cpu_limit
+        )
+    except WorkerUnavailable as e:
+        logger.warning(f"[JVM-POOL] Pool unavailable, falling back to process mode: {e}")
+    except WorkerCrashed:
+        logger.warning("[JVM-POOL] Worker crashed during run, retrying in process mode")
+    except PoolOutputExceeded:
+        logger.debug("[JVM-POOL] Output over the pool limit, retrying in process mode")
+    return None
@@ -0,0 +1,470 @@
+# challenges/language_backends.py
+#
+# Backends de linguagem do motor de execução (challenges/execution_engine.py).
+#
+# Cada backend declara, a partir de settings.CODE_EXECUTION[<key>], como
+# compilar o fonte (comando, flags, timeout, cache de artefatos) e como
+# executar o programa pronto contra um caso de teste (fork server, pool de
+# JVMs ou um processo por execução). O motor cuida do resto: diretório de
+# trabalho, comparação da saída, paralelismo, tempos e eventos de progresso.
+#
+# Uma linguagem nova é uma subclasse de LanguageBackend registrada com
+# @register_backend.
+
+import copy
+import os
+import re
+import shutil
+import subprocess
+import time
+import logging
+
+from django.conf import settings
+
+from .artifact_cache import cached_compile, toolchain_version
+from .precompiled_header import precompiled_header_flags, pch_rejected
+from .process_runner import run_process, program_result
+from .python_forkserver import fork_server_enabled, run_in_fork_server, get_fork_server, ForkServerUnavailable
+from .jvm_pool import (
+    worker_pool_enabled, run_in_worker_pool, ensure_worker_classes,
+    get_pool_settings, WorkerUnavailable
+)
+from .jvm_cds import cds_flags, ensure_archive, get_cds_settings
+from .javac_daemon import compile_in_daemon, start_compiler_daemon, get_compiler_daemon_settings
+
+logger = logging.getLogger(__name__)
+
+_backends = {}
+
+
+class UnsupportedLanguage(ValueError):
+    """Nenhum backend registrado para a linguagem"""
+
+
+def register_backend(backend_class):
+    """Decorador: registra o backend pela chave de settings e pelos nomes de linguagem"""
+    backend = backend_class()
+    for name in (backend.key, *backend.names):
+        _backends[name.lower()] = backend
+    return backend_class
+
+
+def get_backend(language):
+    """Backend de um ProgrammingLanguage, do nome da linguagem ou da chave em CODE_EXECUTION"""
+    name = getattr(language, 'name', language)
+    backend = _backends.get(str(name).lower())
+    if backend is None:
+        raise UnsupportedLanguage(f"Linguagem não suportada: {name}")
+    return backend
+
+
+def registered_backends():
+    """Backends registrados, sem repetição"""
+    return list({id(backend): backend for backend in _backends.values()}.values())
+
+
+def warm_up_backends():
+    """Executa o aquecimento de cada backend (zygote, PCH, JVM); falhas só são registradas"""
+    for backend in registered_backends():
+        try:
+            backend.warm_up()
+        except Exception as e:
+            logger.warning(f"[ENGINE] Warm-up of {backend.key} failed: {e}")
+
+
+def compile_failure(message, compile_time=0):
+    return {'success': False, 'status': 'compilation_error', 'message': message, 'compile_time': compile_time}
+
+
+class LanguageBackend:
+    """
+    Interface de um backend. compile() recebe o caminho do fonte já gravado e
+    retorna o build ({'success': True, 'compile_time', 'cached', ...}) ou a
+    falha de compilação; run() executa o build contra um caso de teste e
+    retorna o resultado no formato de program_result.
+    """
+
+    key = None        # Seção em settings.CODE_EXECUTION ('PYTHON', 'C', ...)
+    names = ()        # ProgrammingLanguage.name (minúsculas) atendidos
+    extension = ''
+    default_compile_memory_mb = 0  # Reserva no controle de admissão (challenges/admission.py)
+
+    @property
+    def config(self):
+        return settings.CODE_EXECUTION.get(self.key, {})
+
+    def source_name(self, code):
+        return f'solution.{self.extension}'
+
+    def memory_limit(self, memory_limit_mb):
+        """Limite de memória efetivo para o limite do desafio"""
+        return memory_limit_mb
+
+    @property
+    def compile_memory_mb(self):
+        """Memória reservada para uma compilação (COMPILE_MEMORY_MB)"""
+        return self.config.get('COMPILE_MEMORY_MB', self.default_compile_memory_mb)
+
+    def run_memory_mb(self, limits):
+        """Memória reservada para uma execução com estes limites"""
+        return self.memory_limit(limits.memory_limit_mb)
+
+    def compile(self, source_path):
+        raise NotImplementedError
+
+    def run(self, build, test_input, limits, cancel_token=None, comparator=None):
+        raise NotImplementedError
+
+    def warm_up(self):
+        pass
+
+    def toolchain(self):
+        """Versões de compilador/runtime: uma atualização muda o veredito cacheado"""
+        return []
+
+    def run_command(self, command, test_input, limits, cancel_token=None, comparator=None,
+                    cwd=None, env=None, address_space=True, check_rss=True):
+        """Executa um comando com os limites do teste (run_process) e converte em resultado"""
+        memory_limit_mb = self.memory_limit(limits.memory_limit_mb)
+        try:
+            run = run_process(
+                command, test_input, limits.time_limit_ms,
+                memory_limit_mb=memory_limit_mb if address_space else 0,
+                wall_limit_ms=limits.wall_limit_ms,
+                cwd=cwd,
+                env=env,
+                cancel_token=cancel_token,
+                stdout_sink=comparator.feed if comparator else None
+            )
+        except Exception as e:
+            return {'success': False, 'status': 'runtime_error', 'message': str(e), 'execution_time': 0}
+
+        return program_result(run, limits.time_limit_ms, memory_limit_mb, check_rss)
+
+
+@register_backend
+class PythonBackend(LanguageBackend):
+    key = 'PYTHON'
+    names = ('python', 'python3')
+    extension = 'py'
+
+    def compile(self, source_path):
+        # Interpretado: o fonte gravado já é o artefato
+        return {'success': True, 'script': source_path, 'compile_time': 0, 'cached': False}
+
+    def run(self, build, test_input, limits, cancel_token=None, comparator=None):
+        if fork_server_enabled():
+            # Fork do zygote (interpretador já inicializado) em vez de um novo python3
+            run = run_in_fork_server(
+                build['script'], test_input, limits.wall_limit_ms / 1000, cancel_token,
+                cpu_limit=limits.time_limit_ms / 1000, memory_mb=limits.memory_limit_mb,
+                stdout_sink=comparator.feed if comparator else None
+            )
+            if run is not None:
+                # O zygote reporta em segundos
+                run = dict(run, wall_time=run['wall_time'] * 1000, cpu_time=run['cpu_time'] * 1000)
+                return program_result(run, limits.time_limit_ms, limits.memory_limit_mb)
+            if cancel_token and cancel_token.cancelled:
+                return {'success': False, 'status': 'runtime_error', 'message': 'Execução cancelada', 'execution_time': 0}
+
+        command = [self.config.get('INTERPRETER_PATH', 'python3'), build['script']]
+        return self.run_command(command, test_input, limits, cancel_token, comparator)
+
+    def toolchain(self):
+        return [toolchain_version(self.config.get('INTERPRETER_PATH', 'python3'), '--version')]
+
+    def warm_up(self):
+        if fork_server_enabled():
+            try:
+                get_fork_server().ensure_running()
+            except ForkServerUnavailable as e:
+                logger.warning(f"[FORKSERVER] Could not start zygote: {e}")
+
+
+class NativeBackend(LanguageBackend):
+    """C e C++: compilação única por fonte (cache de artefatos), binário executado direto"""
+
+    default_compiler = None
+    default_flags = ()
+    default_compile_memory_mb = 256
+
+    @property
+    def compiler(self):
+        return self.config.get('COMPILER_PATH', self.default_compiler)
+
+    @property
+    def compile_flags(self):
+        return list(self.config.get('COMPILER_FLAGS', self.default_flags))
+
+    @property
+    def link_flags(self):
+        return list(self.config.get('LINK_FLAGS', ['-lm']))
+
+    @property
+    def compile_timeout(self):
+        return self.config.get('COMPILE_TIMEOUT', 15)
+
+    def compile(self, source_path):
+        return self.compile_with_flags(source_path, self.compile_flags)
+
+    def compile_with_flags(self, source_path, flags, environment_error=None):
+        """
+        Compila uma única vez e retorna o caminho do binário.
+        Binários e erros de compilação já vistos vêm do cache de artefatos,
+        menos os que environment_error(mensagem) atribui ao ambiente e não ao código.
+        """
+        work_dir, source_name = os.path.split(source_path)
+        binary_name = f'{source_name}.out'
+        command = [self.compiler, source_name, '-o', binary_name, *flags, *self.link_flags]
+        timeout = self.compile_timeout
+
+        def compile_fn():
+            start_time = time.time()
+            try:
+                # Caminhos relativos: as mensagens de erro não dependem do diretório da submissão
+                compile_proc = subprocess.run(
+                    command,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout,
+                    cwd=work_dir or None
+                )
+            except subprocess.TimeoutExpired:
+                return compile_failure(
+                    f'Tempo limite de compilação excedido ({timeout}s)', (time.time() - start_time) * 1000
+                ), None
+            except Exception as e:
+                return compile_failure(str(e)), None
+
+            compile_time = (time.time() - start_time) * 1000
+
+            if compile_proc.returncode != 0:
+                error_msg = compile_proc.stderr.strip() or "Erro de compilação"
+                files = None if environment_error and environment_error(error_msg) else []
+                return compile_failure(error_msg, compile_time), files
+
+            return {'success': True, 'compile_time': compile_time}, [binary_name]
+
+        build = cached_compile(
+            self.compiler, (self.compiler, '--version'), command[1:], source_path, compile_fn
+        )
+        if build['success']:
+            build['binary'] = os.path.join(work_dir, binary_name)
+        return build
+
+    def run(self, build, test_input, limits, cancel_token=None, comparator=None):
+        return self.run_command([build['binary']], test_input, limits, cancel_token, comparator)
+
+    def toolchain(self):
+        return [toolchain_version(self.compiler, '--version')]
+
+
+@register_backend
+class CBackend(NativeBackend):
+    key = 'C'
+    names = ('c',)
+    extension = 'c'
+    default_compiler = 'gcc'
+    default_flags = ('-std=c11', '-Wall')
+
+
+@register_backend
+class CppBackend(NativeBackend):
+    key = 'CPP'
+    names = ('c++', 'cpp')
+    extension = 'cpp'
+    default_compiler = 'g++'
+    default_flags = ('-std=c++17', '-Wall', '-O2')
+
+    def compile(self, source_path):
+        """Usa o bits/stdc++.h pré-compilado quando disponível"""
+        flags = self.compile_flags
+        pch_flags = precompiled_header_flags(self.compiler, flags)
+        if not pch_flags:
+            return self.compile_with_flags(source_path, flags)
+
+        def rejected(message):
+            return pch_rejected(message, pch_flags[1])
+
+        build = self.compile_with_flags(source_path, flags + pch_flags, environment_error=rejected)
+        if not build['success'] and rejected(build['message']):
+            # O .gch é conferido (e regerado) por precompiled_header_flags, nunca apagado daqui
+            logger.warning("[PCH] Precompiled header rejected, compiling without it")
+            build = self.compile_with_flags(source_path, flags)
+        return build
+
+    def warm_up(self):
+        # Dispara a geração do PCH em segundo plano se o deploy não o gerou
+        precompiled_header_flags(self.compiler, self.compile_flags)
+
+
+@register_backend
+class JavaBackend(LanguageBackend):
+    """
+    javac uma vez por fonte (cache de artefatos); execução no pool de JVMs
+    aquecidas quando habilitado, senão um processo java por execução
+    """
+
+    key = 'JAVA'
+    names = ('java',)
+    extension = 'java'
+    default_compile_memory_mb = 512  # javac é uma JVM
+
+    CLASS_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+    @property
+    def java(self):
+        return self.config.get('RUNTIME_PATH', 'java')
+
+    @property
+    def javac(self):
+        return self.config.get('COMPILER_PATH', 'javac')
+
+    @property
+    def run_flags(self):
+        return list(self.config.get('RUN_FLAGS', ['-Xms16m', '-XX:+UseSerialGC', '-Dfile.encoding=UTF-8']))
+
+    def memory_limit(self, memory_limit_mb):
+        """Heap da JVM (-Xmx), limitado por JAVA['MAX_HEAP_MB']"""
+        return min(memory_limit_mb, self.config.get('MAX_HEAP_MB', 128))
+
+    def run_memory_mb(self, limits):
+        """Heap mais o que a JVM usa fora dele (JVM_OVERHEAD_MB)"""
+        return self.memory_limit(limits.memory_limit_mb) + self.config.get('JVM_OVERHEAD_MB', 64)
+
+    @property
+    def time_multiplier(self):
+        return self.config.get('TIME_MULTIPLIER', 2)
+
+    def time_limits(self, limits):
+        """Limites de CPU e relógio do desafio multiplicados por TIME_MULTIPLIER (a JVM conta a inicialização)"""
+        scaled = copy.copy(limits)
+        scaled.time_limit_ms = round(limits.time_limit_ms * self.time_multiplier)
+        scaled.wall_limit_ms = round(limits.wall_limit_ms * self.time_multiplier)
+        return scaled
+
+    def class_name(self, code):
+        """Classe principal: a pública, senão a primeira declarada, senão Main"""
+        code_without_comments = re.sub(r'//.*?\n|/\*.*?\*/', '', code, flags=re.DOTALL)
+        match = (re.search(r'public\s+class\s+(\w+)', code_without_comments)
+                 or re.search(r'class\s+(\w+)', code_without_comments))
+        if not match:
+            logger.warning("[ENGINE] Java class name not found, using 'Main'")
+            return 'Main'
+        return match.group(1)
+
+    def source_name(self, code):
+        return f'{self.class_name(code)}.java'
+
+    def compile(self, source_path):
+        work_dir, source_name = os.path.split(source_path)
+        class_name = source_name[:-len('.java')]
+        if not self.CLASS_NAME.match(class_name):
+            return compile_failure(f'Nome de classe inválido: {class_name}')
+
+        command = [self.javac, '-cp', '.', '-encoding', 'UTF-8', *self.config.get('COMPILE_FLAGS', []), source_name]
+        timeout = self.config.get('COMPILE_TIMEOUT', 30)
+
+        def compile_fn():
+            start_time = time.time()
+            if get_compiler_daemon_settings()['enabled']:
+                compiled = compile_in_daemon(source_path, self.config.get('COMPILE_FLAGS', []), timeout)
+                if compiled is not None:
+                    return self.daemon_result(compiled, class_name, timeout, (time.time() - start_time) * 1000)
+
+            try:
+                proc = subprocess.run(
+                    command, capture_output=True, text=True, timeout=timeout, cwd=work_dir
+                )
+            except subprocess.TimeoutExpired:
+                return compile_failure(f'Tempo limite de compilação excedido ({timeout}s)'), None
+            except FileNotFoundError:
+                return compile_failure('Compilador Java não encontrado no sistema'), None
+
+            compile_time = (time.time() - start_time) * 1000
+            if proc.returncode != 0:
+                # Erro no próprio código (o javac rodou): cacheável
+                return compile_failure(proc.stderr.strip() or 'Erro de compilação desconhecido', compile_time), []
+            if not os.path.exists(os.path.join(work_dir, f'{class_name}.class')):
+                return compile_failure('Arquivo .class não foi gerado', compile_time), []
+
+            files = [name for name in os.listdir(work_dir) if name.endswith('.class')]
+            return {'success': True, 'compile_time': compile_time}, files
+
+        build = cached_compile('java', (self.javac, '-version'), command[1:-1], source_path, compile_fn)
+        if build['success']:
+            build['classpath'] = work_dir
+            build['class_name'] = class_name
+        return build
+
+    @staticmethod
+    def daemon_result(compiled, class_name, timeout, compile_time):
+        """Resposta do daemon do compilador no formato de compile_fn: (result, files)"""
+        if compiled['status'] == 'timeout':
+            return compile_failure(f'Tempo limite de compilação excedido ({timeout}s)'), None
+        if compiled['status'] == 'error':
+            return compile_failure(compiled['diagnostics'].strip() or 'Erro de compilação desconhecido', compile_time), []
+        if f'{class_name}.class' not in compiled['files']:
+            return compile_failure('Arquivo .class não foi gerado', compile_time), []
+        return {'success': True, 'compile_time': compile_time}, compiled['files']
+
+    def run(self, build, test_input, limits, cancel_token=None, comparator=None):
+        heap_mb = self.memory_limit(limits.memory_limit_mb)
+        limits = self.time_limits(limits)
+
+        if worker_pool_enabled():
+            result = run_in_worker_pool(
+                build['classpath'], build['class_name'], test_input,
+                limits.wall_limit_ms / 1000, heap_mb, cancel_token,
+                cpu_limit=limits.time_limit_ms / 1000
+            )
+            if result is not None:
+                return self.pool_result(result, comparator)
+
+        # Sem RLIMIT_AS nem RSS: a JVM reserva muito espaço virtual; o heap é limitado por -Xmx
+        jvm_flags = [f'-Xmx{heap_mb}m', *self.run_flags, *cds_flags(self.java, self.javac)]
+        return self.run_command(
+            [self.java, '-cp', '.', *jvm_flags, build['class_name']], test_input, limits,
+            cancel_token, comparator,
+            cwd=build['classpath'],
+            env=os.environ.copy(),
+            address_space=False,
+            check_rss=False
+        )
+
+    @staticmethod
+    def pool_result(result, comparator):
+        """Resultado do worker (chave 'error') no vocabulário de Submission"""
+        if result['success']:
+            # O worker devolve a saída inteira (limitada a WORKER_POOL['MAX_OUTPUT_SIZE'], ver jvm_pool)
+            if comparator:
+                comparator.feed(result.pop('output'))
+            return result
+        status = {
+            'time_limit_exceeded': 'time_limit',
+            'memory_limit_exceeded': 'memory_limit',
+            'output_limit_exceeded': 'output_limit',
+        }.get(result['error'], 'runtime_error')
+        return dict(result, status=status)
+
+    def toolchain(self):
+        return [
+            toolchain_version(self.javac, '-version'), toolchain_version(self.java, '-version'),
+            f'time x{self.time_multiplier}',
+        ]
+
+    def warm_up(self):
+        if not shutil.which(self.java):
+            return
+        if get_cds_settings()['enabled']:
+            # Arquivo CDS do JDK pronto antes do primeiro `java` (normalmente já gerado no deploy)
+            ensure_archive(self.java, self.javac)
+        if get_compiler_daemon_settings()['enabled']:
+            # javac residente aquecido antes da primeira submissão
+            start_compiler_daemon(self.config.get('COMPILE_FLAGS', []))
+        if worker_pool_enabled():
+            # Compila o JudgeWorker antes da primeira submissão
+            try:
+                ensure_worker_classes(get_pool_settings()['javac'])
+            except WorkerUnavailable as e:
+                logger.warning(f"[JVM-POOL] Could not build worker: {e}")
@@ -0,0 +1,189 @@
+# challenges/leaderboards.py
+#
+# Rankings por região e por desafio, em cache.
+#
+# - Região (Norte, Nordeste, ...): mesmos critérios do ranking nacional, só
+#   com os desafios dos estados da região. Calculado pelas consultas
+#   agregadas de challenges/standings.py filtradas pelos desafios da região
+#   (índice de Submission.challenge; nada de varrer a tabela por página).
+# - Desafio: mais rápidos entre os aceitos (menor execution_time de cada
+#   usuário; empate pelo primeiro a atingir o aceite).
+#
+# Cada ranking é calculado uma vez e guardado no cache compartilhado
+# (challenges/shared_cache.py; um namespace por região ou desafio, mais
+# 'standings' para os totais do ranking nacional) até um veredito mudar a
+# classificação: os sinais de Submission, a fila e a reavaliação chamam
+# verdict_changed. O CACHE_TIMEOUT limita o quanto tentativas e taxa de
+# sucesso de uma região (que mudam sem aceite) ficam defasadas.
+
+import bisect
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Min
+
+from .models import BrazilState, Challenge, Submission
+from .shared_cache import cached, invalidate
+from .standings import aggregate_standings, completion_percentage, standings_summary, CURSOR_PATTERN
+
+logger = logging.getLogger(__name__)
+
+STANDINGS_NAMESPACE = 'standings'
+REGION_NAMESPACE = 'leaderboard:region:{region}'
+CHALLENGE_NAMESPACE = 'leaderboard:challenge:{challenge_id}'
+REGIONS = dict(BrazilState.REGION_CHOICES)
+
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def get_leaderboard_settings():
+    config = getattr(settings, 'LEADERBOARD_SETTINGS', {})
+    return {
+        'cache_timeout': config.get('CACHE_TIMEOUT', 300),  # segundos
+    }
+
+
+def _users(user_ids):
+    return User.objects.only(*USER_FIELDS).in_bulk(user_ids)
+
+
+def compute_region_standings(region):
+    """
+    Ranking da região: {'entries': [linhas em ordem, com 'position'], 'rank_keys',
+    'positions': {user_id: índice}, 'summary'}. Linhas e totais com os mesmos
+    campos do ranking nacional.
+    """
+    challenge_ids = list(Challenge.objects.filter(state__region=region).values_list('id', flat=True))
+    standings = aggregate_standings(len(challenge_ids), challenge_ids=challenge_ids) if challenge_ids else {}
+    ranked = sorted(
+        ((user_id, fields) for user_id, fields in standings.items() if fields['accepted_count'] > 0),
+        key=lambda item: item[1]['rank_key'],
+    )
+    users = _users([user_id for user_id, _ in ranked])
+
+    entries = []
+    for position, (user_id, fields) in enumerate(ranked, 1):
+        entries.append(dict(
+            fields,
+            user=users[user_id],
+            position=position,
+            completion_percentage=completion_percentage(fields['completed_challenges'], len(challenge_ids)),
+        ))
+    total_submissions = sum(fields['total_attempts'] for fields in standings.values())
+    return {
+        'entries': entries,
+        'rank_keys': [entry['rank_key'] for entry in entries],  # Para achar o cursor por bisseção
+        'positions': {entry['user'].id: index for index, entry in enumerate(entries)},
+        'summary': {
+            'total_challenges': len(challenge_ids),
+            'total_users': len(entries),
+            'completed_users': sum(1 for entry in entries if entry['completed_challenges'] == len(challenge_ids)),
+            'total_points': sum(entry['total_points'] for entry in entries),
+            'avg_completion_rate': completion_percentage(
+                sum(entry['completed_challenges'] for entry in entries) / len(entries) if entries else 0,
+                len(challenge_ids)
+            ),
+            'total_submissions': total_submissions,
+            'avg_attempts_per_user': round(total_submissions / len(entries)) if entries else 0,
+        },
+    }
+
+
+def compute_challenge_standings(challenge_id):
+    """
+    Mais rápidos do desafio: {'entries': [{'user', 'position', 'best_time', 'first_accepted'}],
+    'positions': {user_id: índice}}
+    """
+    rows = list(
+        Submission.objects.filter(challenge_id=challenge_id, status='accepted', execution_time__isnull=False)
+        .order_by()
+        .values('user_id')
+        .annotate(best_time=Min('execution_time'), first_accepted=Min('submitted_at'))
+        .order_by('best_time', 'first_accepted', 'user_id')
+    )
+    users = _users([row['user_id'] for row in rows])
+    entries = [
+        {
+            'user': users[row['user_id']],
+            'position': position,
+            'best_time': row['best_time'],
+            'first_accepted': row['first_accepted'],
+        }
+        for position, row in enumerate(rows, 1)
+    ]
+    return {
+        'entries': entries,
+        'positions': {entry['user'].id: index for index, entry in enumerate(entries)},
+    }
+
+
+def compute_national_summary():
+    """Totais do ranking nacional (a lista em si é paginada direto do índice de UserStanding)"""
+    total_challenges = Challenge.objects.count()
+    summary = standings_summary(total_challenges)
+    total_submissions = Submission.objects.count()
+    return dict(
+        summary,
+        total_challenges=total_challenges,
+        total_submissions=total_submissions,
+        avg_attempts_per_user=round(total_submissions / summary['total_users']) if summary['total_users'] else 0,
+    )
+
+
+def national_summary():
+    return cached(STANDINGS_NAMESPACE, 'summary', compute_national_summary,
+                  get_leaderboard_settings()['cache_timeout'])
+
+
+def region_standings(region):
+    if region not in REGIONS:
+        raise ValueError(f'Região desconhecida: {region}')
+    return cached(REGION_NAMESPACE.format(region=region), 'standings', lambda: compute_region_standings(region),
+                  get_leaderboard_settings()['cache_timeout'])
+
+
+def challenge_standings(challenge_id):
+    return cached(CHALLENGE_NAMESPACE.format(challenge_id=challenge_id), 'fastest',
+                  lambda: compute_challenge_standings(challenge_id), get_leaderboard_settings()['cache_timeout'])
+
+
+def region_page(data, cursor=None, page_size=50):
+    """Página de region_standings() depois do cursor (rank_key), como standings_page"""
+    if cursor and not CURSOR_PATTERN.match(cursor):
+        raise ValueError('Cursor inválido')
+    entries = data['entries']
+    start = bisect.bisect_right(data['rank_keys'], cursor) if cursor else 0
+    rows = entries[start:start + page_size]
+    next_cursor = rows[-1]['rank_key'] if start + page_size < len(entries) else None
+    return rows, next_cursor
+
+
+def entry_of(data, user):
+    """Linha do usuário no ranking em cache, ou None"""
+    if not user.is_authenticated or user.id not in data['positions']:
+        return None
+    return data['entries'][data['positions'][user.id]]
+
+
+def verdict_changed(challenge_ids, accepted=True):
+    """
+    Um veredito (ou reavaliação) mudou a classificação: descarta os totais do
+    ranking nacional e, se houve aceite, os rankings dos desafios e das regiões
+    deles. Chamar depois do commit, para nenhum worker recachear o antigo.
+    """
+    namespaces = [STANDINGS_NAMESPACE]
+    challenge_ids = set(challenge_ids)
+    if accepted and challenge_ids:
+        regions = set(Challenge.objects.filter(id__in=challenge_ids).values_list('state__region', flat=True))
+        namespaces += [CHALLENGE_NAMESPACE.format(challenge_id=challenge_id) for challenge_id in challenge_ids]
+        namespaces += [REGION_NAMESPACE.format(region=region) for region in regions]
+    invalidate(*namespaces)
+
+
+def challenges_changed(challenge_id=None):
+    """Desafio criado, editado ou apagado: pontos, região ou total de desafios de todos os rankings"""
+    namespaces = [STANDINGS_NAMESPACE] + [REGION_NAMESPACE.format(region=region) for region in REGIONS]
+    if challenge_id is not None:
+        namespaces.append(CHALLENGE_NAMESPACE.format(challenge_id=challenge_id))
+    invalidate(*namespaces)
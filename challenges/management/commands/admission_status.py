@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from challenges.admission import get_admission_controller
+
+class Command(BaseCommand):
+    help = 'Mostra ocupação, filas e tempos de espera do controle de admissão'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zera os contadores de espera')
+
+    def handle(self, *args, **options):
+        controller = get_admission_controller()
+        if controller is None:
+            self.stdout.write(self.style.WARNING("Controle de admissão desabilitado (CODE_EXECUTION['ADMISSION'])"))
+            return
+
+        if options['reset']:
+            controller.reset_stats()
+            self.stdout.write(self.style.SUCCESS("✅ Contadores zerados"))
+            return
+
+        status = controller.status()
+        memory = status['memory']
+        self.stdout.write("=== CONTROLE DE ADMISSÃO ===")
+        self.stdout.write(f"Diretório: {controller.root}")
+        self.stdout.write(f"Memória: {memory['in_use_mb']}MB / {memory['capacity_mb']}MB")
+        for kind, label in (('compile', 'Compilações'), ('run', 'Execuções')):
+            entry = status[kind]
+            self.stdout.write(
+                f"{label}: {entry['in_use']}/{entry['slots']} em uso | fila: {entry['queue_depth']} | "
+                f"admitidas: {entry['admitted']} ({entry['queued']} esperaram) | "
+                f"espera média: {entry['avg_wait'] * 1000:.0f}ms | máxima: {entry['max_wait'] * 1000:.0f}ms"
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from challenges.artifact_cache import get_artifact_cache
+
+class Command(BaseCommand):
+    help = 'Mostra estatísticas ou limpa o cache de artefatos de compilação'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Remove todas as entradas e zera os contadores')
+    
+    def handle(self, *args, **options):
+        cache = get_artifact_cache()
+        if cache is None:
+            self.stdout.write(self.style.WARNING("Cache de artefatos desabilitado (CODE_EXECUTION['ARTIFACT_CACHE'])"))
+            return
+        
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS("✅ Cache de artefatos limpo"))
+            return
+        
+        stats = cache.stats()
+        self.stdout.write("=== CACHE DE ARTEFATOS ===")
+        self.stdout.write(f"Diretório: {cache.root}")
+        self.stdout.write(f"Entradas: {stats['entries']}")
+        self.stdout.write(f"Tamanho: {stats['size_bytes'] / (1024 * 1024):.1f}MB / {stats['max_bytes'] / (1024 * 1024):.0f}MB")
+        self.stdout.write(f"Acertos: {stats['hits']} | Falhas: {stats['misses']} | Taxa: {stats['hit_rate']:.1%}")
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from challenges.jvm_cds import build_archive, remove_stale, benchmark
+from challenges.language_backends import get_backend
+
+class Command(BaseCommand):
+    help = 'Gera o arquivo de Class Data Sharing (CDS) com as classes do JDK usadas pelo juiz Java'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regera mesmo se já existir')
+        parser.add_argument('--benchmark', type=int, metavar='N', default=0,
+                            help='Mede a inicialização com e sem o arquivo (N execuções de cada)')
+    
+    def handle(self, *args, **options):
+        backend = get_backend('java')
+        archive = build_archive(backend.java, backend.javac, force=options['force'])
+        if not archive:
+            # Não é fatal: sem o arquivo a JVM só inicia mais devagar
+            self.stdout.write(self.style.WARNING("⚠️ Arquivo CDS não gerado; Java executará sem ele"))
+            return
+        
+        removed = remove_stale(keep={str(Path(archive).parent)})
+        self.stdout.write(self.style.SUCCESS(f"✅ Arquivo CDS pronto em {archive}"))
+        if removed:
+            self.stdout.write(f"Removidos {len(removed)} arquivo(s) de JDKs antigos")
+        
+        if options['benchmark']:
+            self.run_benchmark(backend, archive, options['benchmark'])
+    
+    def run_benchmark(self, backend, archive, runs):
+        heap_mb = backend.memory_limit(backend.config.get('MAX_HEAP_MB', 128))
+        flags = [f'-Xmx{heap_mb}m', *backend.run_flags]
+        self.stdout.write(f"=== BENCHMARK: {runs} execução(ões) de cada, {' '.join(flags)} ===")
+        try:
+            results = benchmark(backend.java, archive, runs, flags)
+        except RuntimeError as e:
+            self.stdout.write(self.style.ERROR(f"❌ {e}"))
+            return
+        
+        labels = {'off': 'Sem CDS', 'default': 'CDS padrão do JDK', 'judge': 'CDS do juiz'}
+        for name, label in labels.items():
+            entry = results[name]
+            self.stdout.write(
+                f"{label:<18} relógio: {entry['wall_avg']:.0f}ms (mín {entry['wall_min']:.0f}ms) | "
+                f"CPU: {entry['cpu_avg']:.0f}ms (mín {entry['cpu_min']:.0f}ms)"
+            )
+        baseline, judge = results['default'], results['judge']
+        saving = baseline['wall_avg'] - judge['wall_avg']
+        self.stdout.write(
+            f"Economia por execução vs. CDS padrão: {saving:.0f}ms de relógio "
+            f"({saving / baseline['wall_avg'] * 100:.0f}%), {baseline['cpu_avg'] - judge['cpu_avg']:.0f}ms de CPU"
+        )
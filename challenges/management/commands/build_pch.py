@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from challenges.precompiled_header import build_pch, remove_stale
+from challenges.language_backends import get_backend
+
+class Command(BaseCommand):
+    help = 'Gera o bits/stdc++.h pré-compilado (.gch) com as flags do juiz C++'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recompila mesmo se já existir')
+        parser.add_argument('--compiler', default=get_backend('cpp').compiler)
+    
+    def handle(self, *args, **options):
+        include_dir = build_pch(options['compiler'], get_backend('cpp').compile_flags, force=options['force'])
+        if not include_dir:
+            # Não é fatal: sem PCH a compilação C++ só fica mais lenta
+            self.stdout.write(self.style.WARNING("⚠️ PCH não gerado; C++ compilará sem cabeçalho pré-compilado"))
+            return
+        
+        removed = remove_stale(keep={include_dir})
+        self.stdout.write(self.style.SUCCESS(f"✅ PCH pronto em {include_dir}"))
+        if removed:
+            self.stdout.write(f"Removidos {len(removed)} PCH(s) antigos")
@@ -0,0 +1,94 @@
+import logging
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from challenges.judge_queue import (
+    claim_next_submission, requeue_stale_submissions, default_worker_id, get_queue_settings,
+    record_heartbeat, clear_heartbeat
+)
+from challenges.grading_events import purge_old_events
+from challenges.language_backends import warm_up_backends
+from challenges.verdict_cache import purge_expired_verdicts
+from challenges.views import judge_submission
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Processa a fila de avaliação de submissões (submissões pending)'
+
+    STALE_CHECK_INTERVAL = 30  # segundos entre verificações de submissões abandonadas
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila e termina')
+        parser.add_argument('--poll-interval', type=float, help='Segundos entre consultas com a fila vazia')
+        parser.add_argument('--worker-id', help='Identificador gravado em claimed_by')
+
+    def handle(self, *args, **options):
+        config = get_queue_settings()
+        poll_interval = options['poll_interval'] or config['poll_interval']
+        worker_id = options['worker_id'] or default_worker_id()
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        self.stdout.write(f"=== JUDGE WORKER {worker_id} ===")
+        # Zygote Python, PCH C++ e JVM prontos antes da primeira submissão
+        warm_up_backends()
+        # Só depois de pronto: até aqui as views ainda avaliam na requisição
+        heartbeat_stop = self.start_heartbeat(worker_id, config['heartbeat_interval'])
+        last_stale_check = 0
+        judged = 0
+
+        while not self.stopping:
+            close_old_connections()
+
+            if time.monotonic() - last_stale_check > self.STALE_CHECK_INTERVAL:
+                requeue_stale_submissions()
+                purge_old_events()
+                purge_expired_verdicts()
+                last_stale_check = time.monotonic()
+
+            submission = claim_next_submission(worker_id)
+            if submission is None:
+                if options['once']:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            start_time = time.time()
+            response = judge_submission(submission)
+            judged += 1
+            self.stdout.write(
+                f"Submissão {submission.id}: {response.get('status', 'erro')} "
+                f"({(time.time() - start_time) * 1000:.0f}ms)"
+            )
+
+        heartbeat_stop.set()
+        clear_heartbeat(worker_id)
+        self.stdout.write(f"Worker encerrado após {judged} avaliação(ões)")
+
+    @staticmethod
+    def start_heartbeat(worker_id, interval):
+        """Sinal de vida em uma thread: avaliações longas não fazem o worker parecer morto"""
+        record_heartbeat(worker_id)
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    record_heartbeat(worker_id)
+                except Exception as e:
+                    logger.warning(f"[QUEUE] Heartbeat failed: {e}")
+            connection.close()
+
+        threading.Thread(target=beat, name='judge-heartbeat', daemon=True).start()
+        return stop
+
+    def request_stop(self, signum, frame):
+        # Termina a avaliação em andamento antes de sair
+        self.stopping = True
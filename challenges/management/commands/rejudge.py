@@ -0,0 +1,126 @@
+import time
+from collections import Counter
+from datetime import datetime, time as day_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from challenges.admission import available_cores
+from challenges.models import Submission
+from challenges.rejudge import Checkpoint, run_rejudge
+
+class Command(BaseCommand):
+    help = 'Reavalia submissões já julgadas (ex.: após corrigir casos de teste com fix_challenge)'
+
+    PROGRESS_INTERVAL = 5  # segundos entre linhas de progresso
+
+    def add_arguments(self, parser):
+        parser.add_argument('--challenge', type=int, action='append', help='ID do desafio (pode repetir)')
+        parser.add_argument('--user', action='append', help='Username (pode repetir)')
+        parser.add_argument('--status', action='append', choices=Submission.FINAL_STATUSES,
+                            help='Status atual das submissões (pode repetir)')
+        parser.add_argument('--since', help='Submetidas a partir de (AAAA-MM-DD ou data/hora ISO)')
+        parser.add_argument('--until', help='Submetidas até (AAAA-MM-DD inclusive, ou data/hora ISO)')
+        parser.add_argument('--workers', type=int, default=max(1, available_cores() // 2),
+                            help='Processos de avaliação (padrão: metade dos núcleos)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Submissões gravadas por transação')
+        parser.add_argument('--dry-run', action='store_true', help='Só mostra os vereditos que mudariam')
+        parser.add_argument('--resume', action='store_true', help='Continua uma reavaliação interrompida')
+
+    def handle(self, *args, **options):
+        filters = {key: options[key] for key in ('challenge', 'user', 'status', 'since', 'until')}
+        queryset = self.build_queryset(filters)
+
+        checkpoint = Checkpoint(filters)
+        if options['resume'] and not options['dry_run']:
+            if checkpoint.load():
+                self.stdout.write(f"Continuando após a submissão {checkpoint.state['last_id']} "
+                                  f"({checkpoint.state['processed']} já reavaliadas)")
+            else:
+                self.stdout.write(self.style.WARNING("Nenhum checkpoint para estes filtros; começando do início"))
+
+        total = queryset.filter(id__gt=checkpoint.state['last_id']).count()
+        mode = 'DRY-RUN' if options['dry_run'] else 'REJUDGE'
+        self.stdout.write(f"=== {mode}: {total} submissão(ões), {options['workers']} processo(s) ===")
+        if not total:
+            checkpoint.clear()
+            return
+
+        self.done = 0
+        self.transitions = Counter()
+        self.started = self.last_report = time.monotonic()
+
+        def on_result(submission, old_status, result):
+            self.done += 1
+            new_status = result['status']
+            if result['judge_error']:
+                self.stdout.write(self.style.ERROR(
+                    f"#{submission.id} {submission.user.username}: erro do juiz, veredito mantido ({result['message']})"
+                ))
+            elif new_status != old_status:
+                self.transitions[(old_status, new_status)] += 1
+                self.stdout.write(f"#{submission.id} {submission.user.username} / desafio {submission.challenge_id}: "
+                                  f"{old_status} → {new_status}")
+            self.report_progress(total)
+
+        try:
+            state = run_rejudge(
+                queryset.select_related('user'),
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                checkpoint=checkpoint,
+                on_result=on_result,
+            )
+        except KeyboardInterrupt:
+            if options['dry_run']:
+                raise CommandError("Interrompido")
+            raise CommandError(f"Interrompido após a submissão {checkpoint.state['last_id']}; "
+                               f"use --resume com os mesmos filtros para continuar")
+
+        self.stdout.write("=== RESUMO ===")
+        for (old_status, new_status), count in self.transitions.most_common():
+            self.stdout.write(f"{old_status} → {new_status}: {count}")
+        self.stdout.write(f"Reavaliadas: {state['processed']} | Mudaram: {state['changed']} | "
+                          f"Erros do juiz: {state['errors']}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry-run: nada foi gravado"))
+        else:
+            checkpoint.clear()
+            self.stdout.write(self.style.SUCCESS("✅ Reavaliação concluída"))
+
+    def build_queryset(self, filters):
+        queryset = Submission.objects.filter(status__in=Submission.FINAL_STATUSES)
+        if filters['challenge']:
+            queryset = queryset.filter(challenge_id__in=filters['challenge'])
+        if filters['user']:
+            queryset = queryset.filter(user__username__in=filters['user'])
+        if filters['status']:
+            queryset = queryset.filter(status__in=filters['status'])
+        if filters['since']:
+            queryset = queryset.filter(submitted_at__gte=self.parse_moment(filters['since'], day_time.min))
+        if filters['until']:
+            queryset = queryset.filter(submitted_at__lte=self.parse_moment(filters['until'], day_time.max))
+        return queryset
+
+    @staticmethod
+    def parse_moment(value, default_time):
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Data inválida: {value}")
+            moment = datetime.combine(day, default_time)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def report_progress(self, total):
+        now = time.monotonic()
+        if now - self.last_report < self.PROGRESS_INTERVAL and self.done != total:
+            return
+        self.last_report = now
+        rate = self.done / max(now - self.started, 1e-6)
+        remaining = (total - self.done) / rate if rate else 0
+        self.stdout.write(f"[{self.done}/{total}] {rate:.1f} submissões/s, ~{remaining:.0f}s restantes")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from challenges.standings import diff_standings, rebuild_standings
+
+class Command(BaseCommand):
+    help = 'Recalcula ou confere a classificação materializada (UserStanding) a partir das submissões'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+        subparsers.add_parser('rebuild', help='Recalcula a tabela inteira (grava só o que mudou)')
+        subparsers.add_parser('verify', help='Lista usuários cuja classificação diverge das submissões')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_rebuild(self, options):
+        created, updated, removed = rebuild_standings()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Classificação recalculada: {created} criada(s), {updated} atualizada(s), {removed} removida(s)"
+        ))
+
+    def handle_verify(self, options):
+        missing, mismatched, extra, _ = diff_standings()
+        for user_id in missing:
+            self.stdout.write(self.style.ERROR(f"❌ Usuário {user_id}: sem linha na classificação"))
+        for standing, differences in mismatched:
+            self.stdout.write(self.style.ERROR(f"❌ Usuário {standing.user_id}: divergente em {', '.join(differences)}"))
+        for standing in extra:
+            self.stdout.write(self.style.ERROR(f"❌ Usuário {standing.user_id}: linha sem submissões"))
+
+        problems = len(missing) + len(mismatched) + len(extra)
+        if problems:
+            raise CommandError(f"{problems} usuário(s) com classificação divergente (corrija com `standings rebuild`)")
+        self.stdout.write(self.style.SUCCESS("✅ Classificação consistente com as submissões"))
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from challenges.models import Challenge, ChallengeTestCase
+from challenges.test_data import (
+    import_test_cases, sync_inline_test_cases, missing_files, collect_garbage, get_test_data_settings
+)
+from challenges.verdict_cache import invalidate_challenge
+
+INPUT_SUFFIXES = ('.in',)
+OUTPUT_SUFFIXES = ('.out', '.ans')
+
+class Command(BaseCommand):
+    help = 'Gerencia o armazenamento de casos de teste em arquivos (importar, sincronizar, verificar, limpar)'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        importer = subparsers.add_parser('import', help='Importa pares N.in/N.out (ou .ans) de um diretório')
+        importer.add_argument('challenge', type=int, help='ID do desafio')
+        importer.add_argument('directory', help='Diretório com os arquivos')
+        importer.add_argument('--replace', action='store_true', help='Substitui os casos importados antes')
+
+        sync = subparsers.add_parser('sync', help='Grava Challenge.test_cases no armazenamento')
+        sync.add_argument('--challenge', type=int, action='append', help='ID do desafio (pode repetir)')
+
+        subparsers.add_parser('verify', help='Lista casos de teste cujos arquivos estão faltando')
+        subparsers.add_parser('gc', help='Remove arquivos que nenhum caso de teste usa')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_import(self, options):
+        try:
+            challenge = Challenge.objects.get(pk=options['challenge'])
+        except Challenge.DoesNotExist:
+            raise CommandError(f"Desafio {options['challenge']} não encontrado")
+
+        pairs = self.find_pairs(Path(options['directory']))
+        if not pairs:
+            raise CommandError(f"Nenhum par entrada/saída em {options['directory']}")
+
+        rows = import_test_cases(challenge, pairs, replace=options['replace'])
+        invalidate_challenge(challenge)
+        total_size = sum(row.input_size + row.output_size for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(rows)} caso(s) importado(s) para '{challenge.title}' ({total_size / 1024 / 1024:.1f}MB)"
+        ))
+
+    @staticmethod
+    def find_pairs(directory):
+        """Pares (entrada, saída) pelo nome base, em ordem natural (2.in antes de 10.in)"""
+        if not directory.is_dir():
+            raise CommandError(f"Diretório não encontrado: {directory}")
+        pairs = []
+        for input_path in directory.iterdir():
+            if input_path.suffix not in INPUT_SUFFIXES:
+                continue
+            output_path = next((input_path.with_suffix(suffix) for suffix in OUTPUT_SUFFIXES
+                                if input_path.with_suffix(suffix).exists()), None)
+            if output_path is None:
+                raise CommandError(f"Saída esperada não encontrada para {input_path.name}")
+            pairs.append((input_path, output_path))
+
+        def natural_key(pair):
+            stem = pair[0].stem
+            return (0, int(stem), '') if stem.isdigit() else (1, 0, stem)
+        return sorted(pairs, key=natural_key)
+
+    def handle_sync(self, options):
+        challenges = Challenge.objects.all()
+        if options['challenge']:
+            challenges = challenges.filter(pk__in=options['challenge'])
+        changed = 0
+        for challenge in challenges:
+            if sync_inline_test_cases(challenge):
+                invalidate_challenge(challenge)
+                changed += 1
+                self.stdout.write(f"{challenge.title}: {len(challenge.test_cases or [])} caso(s) sincronizado(s)")
+        self.stdout.write(self.style.SUCCESS(f"✅ {changed} desafio(s) atualizado(s)"))
+
+    def handle_verify(self, options):
+        self.stdout.write(f"Armazenamento: {get_test_data_settings()['dir']}")
+        missing = missing_files(ChallengeTestCase.objects.select_related('challenge'))
+        for row in missing:
+            origin = 'importado' if row.imported else 'Challenge.test_cases'
+            self.stdout.write(self.style.ERROR(f"❌ {row.challenge.title} #{row.position} ({origin}): arquivo faltando"))
+        if missing:
+            # Os de Challenge.test_cases são regravados por `sync`; os importados, só importando de novo
+            raise CommandError(f"{len(missing)} caso(s) de teste sem arquivo")
+        self.stdout.write(self.style.SUCCESS("✅ Todos os arquivos presentes"))
+
+    def handle_gc(self, options):
+        removed = collect_garbage()
+        self.stdout.write(self.style.SUCCESS(f"✅ {removed} arquivo(s) removido(s)"))
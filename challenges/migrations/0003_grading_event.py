@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0002_submission_judge_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('kind', models.CharField(choices=[('judging_started', 'Avaliação iniciada'), ('compile_started', 'Compilação iniciada'), ('compile_finished', 'Compilação concluída'), ('test_finished', 'Caso de teste concluído'), ('verdict', 'Veredito')], max_length=20)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grading_events', to='challenges.submission')),
+            ],
+            options={
+                'ordering': ['submission', 'seq'],
+                'constraints': [models.UniqueConstraint(fields=('submission', 'seq'), name='unique_grading_event_seq')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0003_grading_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionTestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('test_index', models.PositiveSmallIntegerField()),
+                ('verdict', models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em Execução'), ('accepted', 'Aceito'), ('wrong_answer', 'Resposta Incorreta'), ('time_limit', 'Tempo Limite Excedido'), ('compilation_error', 'Erro de Compilação'), ('runtime_error', 'Erro de Execução')], max_length=20)),
+                ('cpu_time', models.FloatField(blank=True, null=True)),
+                ('wall_time', models.FloatField(default=0)),
+                ('peak_memory_kb', models.PositiveIntegerField(blank=True, null=True)),
+                ('output_hash', models.CharField(blank=True, default='', max_length=16)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_results', to='challenges.submission')),
+            ],
+            options={
+                'ordering': ['submission', 'test_index'],
+                'constraints': [models.UniqueConstraint(fields=('submission', 'test_index'), name='unique_submission_test_result')],
+            },
+        ),
+    ]
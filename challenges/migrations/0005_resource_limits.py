@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0004_submission_test_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='memory_limit',
+            field=models.PositiveIntegerField(default=256),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em Execução'), ('accepted', 'Aceito'), ('wrong_answer', 'Resposta Incorreta'), ('time_limit', 'Tempo Limite Excedido'), ('memory_limit', 'Limite de Memória Excedido'), ('compilation_error', 'Erro de Compilação'), ('runtime_error', 'Erro de Execução')], default='pending', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='submissiontestresult',
+            name='verdict',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em Execução'), ('accepted', 'Aceito'), ('wrong_answer', 'Resposta Incorreta'), ('time_limit', 'Tempo Limite Excedido'), ('memory_limit', 'Limite de Memória Excedido'), ('compilation_error', 'Erro de Compilação'), ('runtime_error', 'Erro de Execução')], max_length=20),
+        ),
+    ]
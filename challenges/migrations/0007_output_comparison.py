@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0006_output_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='comparison_mode',
+            field=models.CharField(choices=[('exact', 'Exata (ignora espaços no início e no fim)'), ('tokens', 'Ignorar diferenças de espaçamento'), ('float', 'Números com tolerância')], default='exact', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='float_tolerance',
+            field=models.FloatField(default=1e-06),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0007_output_comparison'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('test_set_version', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em Execução'), ('accepted', 'Aceito'), ('wrong_answer', 'Resposta Incorreta'), ('time_limit', 'Tempo Limite Excedido'), ('memory_limit', 'Limite de Memória Excedido'), ('output_limit', 'Limite de Saída Excedido'), ('compilation_error', 'Erro de Compilação'), ('runtime_error', 'Erro de Execução')], max_length=20)),
+                ('result', models.JSONField(default=dict)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cached_verdicts', to='challenges.challenge')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('challenge', 'source_hash', 'test_set_version'), name='unique_cached_verdict')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0008_verdict_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeTestCase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('imported', models.BooleanField(default=False)),
+                ('input_hash', models.CharField(max_length=64)),
+                ('output_hash', models.CharField(max_length=64)),
+                ('input_size', models.PositiveBigIntegerField(default=0)),
+                ('output_size', models.PositiveBigIntegerField(default=0)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stored_test_cases', to='challenges.challenge')),
+            ],
+            options={
+                'ordering': ['imported', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('challenge', 'imported', 'position'), name='unique_challenge_test_case')],
+            },
+        ),
+    ]
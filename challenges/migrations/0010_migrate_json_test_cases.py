@@ -0,0 +1,66 @@
+# Casos de teste de Challenge.test_cases (JSON) para o armazenamento em arquivos
+#
+# A gravação endereçada por conteúdo fica aqui (e não em challenges/test_data.py)
+# para que esta migração não mude junto com o código atual.
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations
+
+
+def put(root, data):
+    """Grava data em <root>/<ab>/<sha256> se ainda não existir; retorna (sha256, tamanho)"""
+    data = data.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    path = root / digest[:2] / digest
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=root)
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    return digest, len(data)
+
+
+def move_test_cases_to_store(apps, schema_editor):
+    Challenge = apps.get_model('challenges', 'Challenge')
+    ChallengeTestCase = apps.get_model('challenges', 'ChallengeTestCase')
+
+    challenges = Challenge.objects.exclude(test_cases=[])
+    if not challenges.exists():
+        return
+    directory = settings.CODE_EXECUTION.get('TEST_DATA', {}).get('DIR')
+    if not directory:
+        raise RuntimeError("CODE_EXECUTION['TEST_DATA']['DIR'] não configurado: defina TEST_DATA_DIR antes de migrar")
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+
+    for challenge in challenges.iterator():
+        rows = []
+        for position, test_case in enumerate(challenge.test_cases or [], 1):
+            if not isinstance(test_case, dict):
+                test_case = {}
+            input_hash, input_size = put(root, str(test_case.get('input', '')))
+            output_hash, output_size = put(root, str(test_case.get('output', '')))
+            rows.append(ChallengeTestCase(
+                challenge=challenge, position=position, imported=False,
+                input_hash=input_hash, output_hash=output_hash, input_size=input_size, output_size=output_size,
+            ))
+        ChallengeTestCase.objects.filter(challenge=challenge, imported=False).delete()
+        ChallengeTestCase.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0009_test_data_store'),
+    ]
+
+    operations = [
+        # O JSON continua no desafio: voltar a migração só descarta o índice (0009)
+        migrations.RunPython(move_test_cases_to_store, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('challenges', '0010_migrate_json_test_cases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStanding',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='standing', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_points', models.IntegerField(default=0)),
+                ('completed_challenges', models.PositiveIntegerField(default=0)),
+                ('total_attempts', models.PositiveIntegerField(default=0)),
+                ('accepted_count', models.PositiveIntegerField(default=0)),
+                ('success_rate', models.PositiveSmallIntegerField(default=0)),
+                ('first_attempt_date', models.DateTimeField(blank=True, null=True)),
+                ('completion_date', models.DateTimeField(blank=True, null=True)),
+                ('completion_time_days', models.IntegerField(default=999999)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-total_points', '-completed_challenges', 'completion_time_days', 'total_attempts', '-success_rate', 'first_attempt_date'], name='user_standing_ranking_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+def fill_rank_keys(apps, schema_editor):
+    from challenges.standings import STANDING_FIELDS, rank_key
+
+    UserStanding = apps.get_model('challenges', 'UserStanding')
+    standings = list(UserStanding.objects.select_related('user'))
+    for standing in standings:
+        fields = {name: getattr(standing, name) for name in STANDING_FIELDS if name != 'rank_key'}
+        standing.rank_key = rank_key(fields, standing.user.username, standing.user_id)
+    UserStanding.objects.bulk_update(standings, ['rank_key'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0011_user_standing'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userstanding',
+            name='user_standing_ranking_idx',
+        ),
+        migrations.AddField(
+            model_name='userstanding',
+            name='rank_key',
+            field=models.CharField(db_index=True, default='', max_length=1280),
+        ),
+        migrations.RunPython(fill_rank_keys, migrations.RunPython.noop),
+    ]
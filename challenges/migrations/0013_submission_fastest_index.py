@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0012_user_standing_rank_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['challenge', 'status', 'execution_time'], name='submission_fastest_idx'),
+        ),
+    ]
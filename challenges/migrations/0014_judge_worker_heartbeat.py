@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0013_submission_fastest_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JudgeWorkerHeartbeat',
+            fields=[
+                ('worker_id', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Versão dos casos de teste gravada no desafio (a avaliação não recalcula)
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def fill_test_set_versions(apps, schema_editor):
+    # Mesmo cálculo de verdict_cache.compute_test_set_version nesta versão do esquema
+    Challenge = apps.get_model('challenges', 'Challenge')
+    ChallengeTestCase = apps.get_model('challenges', 'ChallengeTestCase')
+
+    for challenge in Challenge.objects.defer('test_cases').iterator():
+        cases = ChallengeTestCase.objects.filter(challenge=challenge).order_by('imported', 'position').values_list(
+            'imported', 'position', 'input_hash', 'output_hash'
+        )
+        data = [
+            'v3', [list(case) for case in cases], challenge.time_limit, challenge.memory_limit,
+            challenge.comparison_mode, challenge.float_tolerance,
+        ]
+        version = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        Challenge.objects.filter(pk=challenge.pk).update(test_set_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0014_judge_worker_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='test_set_version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_test_set_versions, migrations.RunPython.noop),
+    ]
@@ -48,6 +48,13 @@ class Challenge(models.Model):
         ('final', 'Desafio Final'),
     ]
     
+    # Como a saída do programa é comparada com a esperada (challenges/output_compare.py)
+    COMPARISON_CHOICES = [
+        ('exact', 'Exata (ignora espaços no início e no fim)'),
+        ('tokens', 'Ignorar diferenças de espaçamento'),
+        ('float', 'Números com tolerância'),
+    ]
+    
     title = models.CharField(max_length=100)
     description = models.TextField()
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES)
@@ -59,7 +66,12 @@ class Challenge(models.Model):
     example_input = models.TextField()
     example_output = models.TextField()
     test_cases = models.JSONField(default=list)  # Lista de dicionários com pares input/output
-    time_limit = models.IntegerField(default=1000)  # Em milissegundos
+    time_limit = models.IntegerField(default=1000)  # Em milissegundos (tempo de CPU)
+    memory_limit = models.PositiveIntegerField(default=256)  # Em MB (pico de memória)
+    comparison_mode = models.CharField(max_length=10, choices=COMPARISON_CHOICES, default='exact')
+    float_tolerance = models.FloatField(default=1e-6)  # Erro absoluto ou relativo aceito no modo 'float'
+    # sha256 do índice dos casos de teste, limites e modo de comparação (challenges/verdict_cache.py)
+    test_set_version = models.CharField(max_length=64, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -68,6 +80,30 @@ class Challenge(models.Model):
     def get_absolute_url(self):
         return reverse('challenge-detail', kwargs={'pk': self.pk})
 
+class ChallengeTestCase(models.Model):
+    """
+    Índice de um caso de teste do armazenamento em arquivos (challenges/test_data.py).
+    Entrada e saída ficam em disco, endereçadas pelo sha256 do conteúdo.
+    """
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='stored_test_cases')
+    position = models.PositiveIntegerField()
+    # False: sincronizado de Challenge.test_cases; True: importado de arquivos (manage.py test_data import)
+    imported = models.BooleanField(default=False)
+    input_hash = models.CharField(max_length=64)
+    output_hash = models.CharField(max_length=64)
+    input_size = models.PositiveBigIntegerField(default=0)  # bytes
+    output_size = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.challenge_id} #{self.position}{' (importado)' if self.imported else ''}"
+    
+    class Meta:
+        # Casos de Challenge.test_cases primeiro, depois os importados
+        ordering = ['imported', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['challenge', 'imported', 'position'], name='unique_challenge_test_case'),
+        ]
+
 class Submission(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pendente'),
@@ -75,6 +111,8 @@ class Submission(models.Model):
         ('accepted', 'Aceito'),
         ('wrong_answer', 'Resposta Incorreta'),
         ('time_limit', 'Tempo Limite Excedido'),
+        ('memory_limit', 'Limite de Memória Excedido'),
+        ('output_limit', 'Limite de Saída Excedido'),
         ('compilation_error', 'Erro de Compilação'),
         ('runtime_error', 'Erro de Execução'),
     ]
@@ -84,12 +122,153 @@ class Submission(models.Model):
     code = models.TextField()
     language = models.ForeignKey(ProgrammingLanguage, on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    execution_time = models.FloatField(null=True, blank=True)  # Em milissegundos
+    execution_time = models.FloatField(null=True, blank=True)  # Em milissegundos (soma do tempo de CPU dos testes)
     error_message = models.TextField(blank=True, null=True)
     submitted_at = models.DateTimeField(default=timezone.now)
     
+    # Fila de avaliação (challenges/judge_queue.py, manage.py judge_worker)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=100, blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    judged_at = models.DateTimeField(null=True, blank=True)
+    result_data = models.JSONField(default=dict, blank=True)  # Resposta enviada ao cliente
+    
+    FINAL_STATUSES = ('accepted', 'wrong_answer', 'time_limit', 'memory_limit', 'output_limit',
+                      'compilation_error', 'runtime_error')
+    
+    # Status como está no banco (lido ou gravado por esta instância); None se desconhecido
+    _saved_status = None
+    
     def __str__(self):
         return f"{self.user.username} - {self.challenge.title} - {self.status}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._saved_status = instance.status
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Os sinais post_save ainda veem o status anterior em _saved_status
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'status' in update_fields:
+            self._saved_status = self.status
+    
+    @property
+    def is_final(self):
+        return self.status in self.FINAL_STATUSES
+    
+    @property
+    def verdict_changed(self):
+        """O status mudou desde a última leitura/gravação e o antigo ou o novo é um veredito final"""
+        if self.status == self._saved_status:
+            return False
+        return self.is_final or self._saved_status in self.FINAL_STATUSES
+    
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['status', 'submitted_at'], name='submission_queue_idx'),
+            # Mais rápidos por desafio (challenges/leaderboards.py)
+            models.Index(fields=['challenge', 'status', 'execution_time'], name='submission_fastest_idx'),
+        ]
+
+class JudgeWorkerHeartbeat(models.Model):
+    """Sinal de vida de um `manage.py judge_worker` (challenges/judge_queue.py)"""
+    worker_id = models.CharField(max_length=100, primary_key=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.worker_id} ({self.last_seen:%H:%M:%S})"
+
+class GradingEvent(models.Model):
+    """Evento de progresso da avaliação, transmitido ao navegador via SSE"""
+    KIND_CHOICES = [
+        ('judging_started', 'Avaliação iniciada'),
+        ('compile_started', 'Compilação iniciada'),
+        ('compile_finished', 'Compilação concluída'),
+        ('test_finished', 'Caso de teste concluído'),
+        ('verdict', 'Veredito'),
+    ]
+    
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='grading_events')
+    seq = models.PositiveIntegerField()  # Usado como id do evento (Last-Event-ID)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.submission_id} #{self.seq} {self.kind}"
+    
+    class Meta:
+        ordering = ['submission', 'seq']
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'seq'], name='unique_grading_event_seq'),
+        ]
+
+class SubmissionTestResult(models.Model):
+    """Resultado de um caso de teste (gravado em lote ao final da avaliação)"""
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='test_results')
+    test_index = models.PositiveSmallIntegerField()  # Começa em 1, como nas mensagens
+    verdict = models.CharField(max_length=20, choices=Submission.STATUS_CHOICES)
+    cpu_time = models.FloatField(null=True, blank=True)  # Em milissegundos (user + sys), quando medido
+    wall_time = models.FloatField(default=0)  # Em milissegundos
+    peak_memory_kb = models.PositiveIntegerField(null=True, blank=True)
+    output_hash = models.CharField(max_length=16, blank=True, default='')  # sha256 truncado da saída
+    
+    def __str__(self):
+        return f"{self.submission_id} teste {self.test_index}: {self.verdict}"
+    
+    @property
+    def measured_time(self):
+        """Tempo comparado ao limite: CPU quando medido, senão o tempo de relógio"""
+        return self.cpu_time if self.cpu_time is not None else self.wall_time
+    
+    class Meta:
+        ordering = ['submission', 'test_index']
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'test_index'], name='unique_submission_test_result'),
+        ]
+
+class CachedVerdict(models.Model):
+    """Veredito de um código já avaliado contra uma versão dos casos de teste (challenges/verdict_cache.py)"""
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='cached_verdicts')
+    source_hash = models.CharField(max_length=64)       # sha256 de linguagem, configuração do backend e código
+    test_set_version = models.CharField(max_length=64)  # sha256 dos casos de teste, limites e modo de comparação
+    status = models.CharField(max_length=20, choices=Submission.STATUS_CHOICES)
+    result = models.JSONField(default=dict)  # Resultado da avaliação, com test_results
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.challenge_id} {self.source_hash[:12]}: {self.status}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['challenge', 'source_hash', 'test_set_version'], name='unique_cached_verdict'),
+        ]
+
+class UserStanding(models.Model):
+    """
+    Classificação materializada de um usuário (challenges/standings.py): agregados
+    das submissões dele, atualizados a cada veredito. manage.py standings rebuild
+    recalcula a tabela inteira a partir de Submission.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='standing')
+    total_points = models.IntegerField(default=0)  # Cada desafio aceito conta uma vez
+    completed_challenges = models.PositiveIntegerField(default=0)
+    total_attempts = models.PositiveIntegerField(default=0)  # Todas as submissões
+    accepted_count = models.PositiveIntegerField(default=0)  # Submissões aceitas (com repetições)
+    success_rate = models.PositiveSmallIntegerField(default=0)  # Percentual arredondado
+    first_attempt_date = models.DateTimeField(null=True, blank=True)
+    completion_date = models.DateTimeField(null=True, blank=True)  # Última submissão aceita
+    completion_time_days = models.IntegerField(default=999999)  # 999999 enquanto não resolveu todos os desafios
+    # Todos os critérios de desempate em uma string ordenável (standings.rank_key)
+    rank_key = models.CharField(max_length=1280, default='', db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.total_points}pts, {self.completed_challenges} desafios"
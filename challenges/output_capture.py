@@ -0,0 +1,115 @@
+# challenges/output_capture.py
+#
+# Captura limitada da saída dos programas das submissões.
+#
+# stdout e stderr do filho são pipes lidos aos poucos (selectors) para buffers
+# com tamanho máximo. Assim que um deles passa do limite
+# (CODE_EXECUTION['MAX_OUTPUT_SIZE'] para stdout), o filho é morto e o
+# resto é descartado: um `while (1) printf(...)` nunca chega a ocupar mais que
+# o limite na memória do processo Django.
+#
+# Com um sink (ex.: OutputComparator.feed, challenges/output_compare.py), o
+# stdout não é guardado: cada bloco vai direto para o sink, e se ele retornar
+# False (saída já errada) o filho também é morto.
+
+import os
+import selectors
+import time
+
+from django.conf import settings
+
+DEFAULT_MAX_OUTPUT_SIZE = 1024 * 1024
+DEFAULT_MAX_ERROR_OUTPUT_SIZE = 64 * 1024
+READ_SIZE = 65536
+
+
+def get_output_limits():
+    """(limite de stdout, limite de stderr) em bytes"""
+    return (
+        settings.CODE_EXECUTION.get('MAX_OUTPUT_SIZE', DEFAULT_MAX_OUTPUT_SIZE),
+        settings.CODE_EXECUTION.get('MAX_ERROR_OUTPUT_SIZE', DEFAULT_MAX_ERROR_OUTPUT_SIZE),
+    )
+
+
+class BoundedBuffer:
+    """
+    Acumula bytes até `limit`; o que passar disso é descartado e marcado em
+    exceeded. Com sink, os bytes são repassados em vez de acumulados, e
+    rejected indica que o sink recusou a saída.
+    """
+
+    def __init__(self, limit, sink=None):
+        self.limit = limit
+        self.sink = sink
+        self.size = 0
+        self.exceeded = False
+        self.rejected = False
+        self._chunks = []
+
+    def feed(self, data):
+        """Retorna False se o limite foi ultrapassado ou o sink recusou a saída"""
+        room = self.limit - self.size
+        if len(data) > room:
+            self.exceeded = True
+            data = data[:max(room, 0)]
+        self.size += len(data)
+        if self.sink is None:
+            self._chunks.append(data)
+        elif data and not self.sink(data):
+            self.rejected = True
+        return not (self.exceeded or self.rejected)
+
+    def getvalue(self):
+        return b''.join(self._chunks)
+
+    def text(self):
+        return self.getvalue().decode('utf-8', errors='replace')
+
+
+def capture_output(stdout_fd, stderr_fd, kill, deadline=None, stdout_limit=None, stderr_limit=None,
+                   stdout_sink=None):
+    """
+    Lê os dois descritores até EOF. Ao ultrapassar um limite (ou se
+    stdout_sink recusar a saída) chama kill() uma vez e continua apenas
+    drenando até o EOF. Se deadline (monotonic) passar antes do EOF — ex.: um
+    processo fora do grupo segurou o pipe — chama kill() e desiste.
+
+    Retorna (stdout, stderr, exceeded) com stdout/stderr como BoundedBuffer.
+    """
+    default_stdout, default_stderr = get_output_limits()
+    buffers = {
+        stdout_fd: BoundedBuffer(stdout_limit or default_stdout, stdout_sink),
+        stderr_fd: BoundedBuffer(stderr_limit or default_stderr),
+    }
+    stopped = False
+
+    selector = selectors.DefaultSelector()
+    try:
+        for fd in buffers:
+            selector.register(fd, selectors.EVENT_READ)
+
+        open_fds = len(buffers)
+        while open_fds:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    kill()
+                    break
+
+            for key, _ in selector.select(timeout):
+                chunk = os.read(key.fd, READ_SIZE)
+                if not chunk:
+                    selector.unregister(key.fd)
+                    open_fds -= 1
+                    continue
+                if stopped:
+                    continue  # Já morto: só drena
+                if not buffers[key.fd].feed(chunk):
+                    stopped = True
+                    kill()
+    finally:
+        selector.close()
+
+    exceeded = buffers[stdout_fd].exceeded or buffers[stderr_fd].exceeded
+    return buffers[stdout_fd], buffers[stderr_fd], exceeded
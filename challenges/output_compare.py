@@ -0,0 +1,262 @@
+# challenges/output_compare.py
+#
+# Comparação da saída de um programa com a saída esperada de um caso de teste.
+#
+# O OutputComparator recebe a saída aos poucos (feed, chamado pela captura em
+# challenges/output_capture.py à medida que o programa escreve) e para na
+# primeira diferença, registrando linha e coluna. A saída do programa nunca é
+# acumulada. A esperada é lida como bytes: um texto (codificado em UTF-8) ou
+# um mmap do arquivo do caso de teste (challenges/test_data.py), que não é
+# carregado em memória.
+#
+# Modos (Challenge.comparison_mode):
+#   exact  - texto idêntico, ignorando espaços no início e no fim da saída
+#            (o mesmo que o antigo `actual.strip() == expected.strip()`);
+#   tokens - mesma sequência de palavras, qualquer espaçamento entre elas;
+#   float  - como tokens, mas números são iguais se a diferença absoluta ou
+#            relativa for no máximo Challenge.float_tolerance.
+
+import codecs
+import hashlib
+import math
+import mmap
+import re
+
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+SNIPPET_SIZE = 40
+FLOAT_TOKEN_SLACK = 64  # casas a mais aceitas em um número no modo float
+
+TOKEN = re.compile(r'\S+')
+EXPECTED_TOKEN = re.compile(rb'\S+')
+EXPECTED_CONTENT = re.compile(rb'\S')
+NUMBER = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+
+class Mismatch:
+    """Primeira diferença: posição (1-based) na saída do programa e trechos de cada lado"""
+
+    def __init__(self, line, column, expected, actual):
+        self.line = line
+        self.column = column
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        expected = repr(self.expected) if self.expected else 'fim da saída'
+        actual = repr(self.actual) if self.actual else 'fim da saída'
+        return f"linha {self.line}, coluna {self.column}: esperado {expected}, obtido {actual}"
+
+
+class _StrippedDigest:
+    """sha256 da saída sem espaços no início e no fim, calculado em fluxo (igual a output_hash)"""
+
+    def __init__(self):
+        self._sha = hashlib.sha256()
+        self._started = False
+        self._pending = ''
+
+    def update(self, text):
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+        stripped = text.rstrip()
+        if stripped:
+            self._sha.update(self._pending.encode('utf-8'))
+            self._sha.update(stripped.encode('utf-8'))
+            self._pending = text[len(stripped):]
+        else:
+            self._pending += text
+
+    def hexdigest(self):
+        return self._sha.hexdigest()[:16]
+
+
+def numbers_match(expected, actual, tolerance):
+    """Tokens iguais, ou ambos números finitos a no máximo tolerance (absoluta ou relativa)"""
+    if expected == actual:
+        return True
+    if not (NUMBER.fullmatch(expected) and NUMBER.fullmatch(actual)):
+        return False
+    e, a = float(expected), float(actual)
+    if not (math.isfinite(e) and math.isfinite(a)):
+        return False
+    return abs(a - e) <= tolerance * max(1.0, abs(e))
+
+
+class OutputComparator:
+    """
+    comparator.feed(bytes) a cada bloco de saída; retorna False na primeira
+    diferença (o resto da saída pode ser descartado). finish() ao fim da
+    execução retorna o Mismatch ou None se a saída confere.
+
+    expected é texto ou um buffer de bytes (ex.: mmap), que deve continuar
+    aberto até finish().
+    """
+
+    def __init__(self, expected, mode='exact', tolerance=None):
+        if mode not in ('exact', 'tokens', 'float'):
+            raise ValueError(f"Modo de comparação desconhecido: {mode}")
+        self.mode = mode
+        self.tolerance = DEFAULT_FLOAT_TOLERANCE if tolerance is None else tolerance
+        self.mismatch = None
+        self.finished = False
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._digest = _StrippedDigest()
+        # Posição (linha, coluna) do próximo caractere ainda não consumido
+        self._line = 1
+        self._column = 1
+
+        if not isinstance(expected, (bytes, bytearray, mmap.mmap)):
+            expected = str(expected).encode('utf-8')
+        self._expected = expected
+
+        if mode == 'exact':
+            # Limites da esperada sem espaços no início e no fim, sem copiá-la
+            first = EXPECTED_CONTENT.search(expected)
+            self._pos = first.start() if first else 0
+            self._end = len(expected)
+            while self._end > self._pos and expected[self._end - 1:self._end].isspace():
+                self._end -= 1
+            self._started = False
+        else:
+            self._expected_tokens = (
+                m.group().decode('utf-8', errors='replace') for m in EXPECTED_TOKEN.finditer(expected)
+            )
+            self._next_token = next(self._expected_tokens, None)
+            self._partial = ''
+
+    @property
+    def output_hash(self):
+        """Hash da saída lida até aqui (toda a saída, se não houve diferença)"""
+        return self._digest.hexdigest()
+
+    def feed(self, data):
+        if self.mismatch is not None:
+            return False
+        text = data if isinstance(data, str) else self._decoder.decode(data)
+        if text:
+            self._digest.update(text)
+            if self.mode == 'exact':
+                self._feed_exact(text)
+            else:
+                self._feed_tokens(text)
+        return self.mismatch is None
+
+    def finish(self):
+        if self.finished:
+            return self.mismatch
+        self.finished = True
+        if self.mismatch is None:
+            self.feed(self._decoder.decode(b'', final=True))
+        if self.mismatch is not None:
+            return self.mismatch
+
+        if self.mode == 'exact':
+            if self._pos < self._end:
+                self._fail(self._expected_text(self._pos), '')
+        else:
+            if self._partial:
+                token, self._partial = self._partial, ''
+                if self._check_token(token):
+                    self._advance(token)
+            if self.mismatch is None and self._next_token is not None:
+                self._fail(self._next_token, '')
+        return self.mismatch
+
+    def _advance(self, text):
+        newlines = text.count('\n')
+        if newlines:
+            self._line += newlines
+            self._column = len(text) - text.rfind('\n')
+        else:
+            self._column += len(text)
+
+    def _fail(self, expected, actual):
+        self.mismatch = Mismatch(self._line, self._column, expected[:SNIPPET_SIZE], actual[:SNIPPET_SIZE])
+
+    def _expected_text(self, pos):
+        """Trecho da esperada a partir de pos (bytes, em início de caractere)"""
+        end = min(self._end, pos + SNIPPET_SIZE * 4)
+        return bytes(self._expected[pos:end]).decode('utf-8', errors='ignore')
+
+    def _feed_exact(self, text):
+        if not self._started:
+            content = text.lstrip()
+            self._advance(text[:len(text) - len(content)])
+            if not content:
+                return
+            self._started = True
+            text = content
+
+        if self._pos < self._end:
+            # Comparação em bytes com a esperada; posições de volta em caracteres
+            data = text.encode('utf-8')
+            size = min(len(data), self._end - self._pos)
+            expected = self._expected[self._pos:self._pos + size]
+            if data[:size] != expected:
+                same = 0
+                while data[same] == expected[same]:
+                    same += 1
+                matched = data[:same].decode('utf-8', errors='ignore')
+                self._advance(matched)
+                self._fail(self._expected_text(self._pos + len(matched.encode('utf-8'))), text[len(matched):])
+                return
+            self._pos += size
+            # A esperada termina em fim de caractere, então data[:size] também
+            matched = data[:size].decode('utf-8')
+            self._advance(matched)
+            text = text[len(matched):]
+
+        # Esperada já toda conferida: só pode sobrar espaço
+        extra = text.lstrip()
+        if extra:
+            self._advance(text[:len(text) - len(extra)])
+            self._fail('', extra)
+        else:
+            self._advance(text)
+
+    def _feed_tokens(self, text):
+        buffer = self._partial + text
+        self._partial = ''
+        consumed = 0
+        for match in TOKEN.finditer(buffer):
+            self._advance(buffer[consumed:match.start()])
+            consumed = match.start()
+            if match.end() == len(buffer):
+                # O token pode continuar no próximo bloco
+                self._partial = match.group()
+                limit = len(self._next_token or '') + (FLOAT_TOKEN_SLACK if self.mode == 'float' else 0)
+                if len(self._partial) > limit:
+                    self._fail(self._next_token or '', self._partial)
+                return
+            if not self._check_token(match.group()):
+                return
+            self._advance(match.group())
+            consumed = match.end()
+        self._advance(buffer[consumed:])
+
+    def _check_token(self, token):
+        expected = self._next_token
+        if expected is None:
+            self._fail('', token)
+            return False
+        if token != expected and not (self.mode == 'float' and numbers_match(expected, token, self.tolerance)):
+            self._fail(expected, token)
+            return False
+        self._next_token = next(self._expected_tokens, None)
+        return True
+
+
+def challenge_comparator(challenge, expected):
+    """Comparador configurado pelo desafio para a saída esperada de um teste"""
+    return OutputComparator(expected, challenge.comparison_mode, challenge.float_tolerance)
+
+
+def compare_output(expected, actual, mode='exact', tolerance=None):
+    """Compara duas saídas completas; retorna o Mismatch ou None"""
+    comparator = OutputComparator(expected, mode, tolerance)
+    comparator.feed(actual)
+    return comparator.finish()
@@ -0,0 +1,152 @@
+# challenges/parallel_grading.py
+#
+# Execução paralela dos casos de teste de uma submissão.
+#
+# Os testes rodam em um pool limitado de threads (cada execução é um processo
+# filho, então threads bastam). Assim que o teste com falha de menor índice é
+# conhecido, os testes de índice maior são cancelados e seus processos mortos.
+# O veredito e o caso de teste reportados são os mesmos do modo sequencial.
+
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+
+from .admission import available_cores
+
+logger = logging.getLogger(__name__)
+
+
+class CancellationToken:
+    """
+    Sinal de cancelamento de uma execução. Processos (ou workers) registrados
+    com attach() são mortos quando cancel() é chamado.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def attach(self, process):
+        """Registra um objeto com kill(); se já cancelado, mata imediatamente"""
+        with self._lock:
+            if not self._cancelled:
+                self._processes.add(process)
+                return
+        self._kill(process)
+
+    def detach(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            processes = list(self._processes)
+            self._processes.clear()
+        for process in processes:
+            self._kill(process)
+
+    @staticmethod
+    def _kill(process):
+        try:
+            process.kill()
+        except Exception:
+            pass
+
+
+def get_parallel_settings():
+    config = settings.CODE_EXECUTION.get('PARALLEL_GRADING', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'max_workers': config.get('MAX_WORKERS') or 0,
+    }
+
+
+def grading_parallelism():
+    """
+    Número de testes de uma submissão executados simultaneamente, limitado
+    pelos núcleos disponíveis. Retorna 1 (sequencial) se desabilitado. A
+    memória (e o total de execuções da máquina) é limitada pelo controle de
+    admissão (challenges/admission.py), não aqui.
+    """
+    config = get_parallel_settings()
+    if not config['enabled']:
+        return 1
+
+    workers = available_cores()
+    if config['max_workers']:
+        workers = min(workers, config['max_workers'])
+    return max(1, workers)
+
+
+def run_test_cases(test_cases, run_one, max_workers=1, on_result=None):
+    """
+    Executa run_one(index, test_case, cancel_token) para cada caso de teste
+    (index começa em 1). run_one deve retornar um dict com 'success'.
+    on_result(index, result), se informado, é chamado na thread de quem chamou
+    à medida que cada teste termina (testes cancelados não são reportados).
+
+    Retorna (results, failed_test_case): results contém os resultados em ordem
+    até o primeiro teste com falha (inclusive); failed_test_case é o índice
+    desse teste ou None se todos passaram.
+    """
+    total = len(test_cases)
+    max_workers = max(1, min(max_workers, total))
+
+    if max_workers == 1:
+        results = []
+        for index, test_case in enumerate(test_cases, 1):
+            result = run_one(index, test_case, CancellationToken())
+            results.append(result)
+            if on_result:
+                on_result(index, result)
+            if not result['success']:
+                return results, index
+        return results, None
+
+    logger.debug(f"[PARALLEL] Running {total} test cases on {max_workers} workers")
+
+    results = {}
+    tokens = {index: CancellationToken() for index in range(1, total + 1)}
+    failed_test_case = None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='grading') as executor:
+        futures = {
+            executor.submit(run_one, index, test_case, tokens[index]): index
+            for index, test_case in enumerate(test_cases, 1)
+        }
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures[future]
+                if future.cancelled() or tokens[index].cancelled:
+                    continue
+                result = future.result()
+                results[index] = result
+                if on_result and (failed_test_case is None or index < failed_test_case):
+                    on_result(index, result)
+
+                if not result['success'] and (failed_test_case is None or index < failed_test_case):
+                    failed_test_case = index
+                    # Fail-fast: cancela e mata tudo que vem depois da falha
+                    for other_future, other_index in futures.items():
+                        if other_index > index:
+                            other_future.cancel()
+                            tokens[other_index].cancel()
+
+            if failed_test_case is not None:
+                # Só é preciso esperar os testes anteriores à falha
+                pending = {future for future in pending if futures[future] < failed_test_case}
+
+    last = failed_test_case or total
+    return [results[index] for index in range(1, last + 1)], failed_test_case
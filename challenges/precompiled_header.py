@@ -0,0 +1,239 @@
+# challenges/precompiled_header.py
+#
+# Cabeçalho pré-compilado (.gch) de bits/stdc++.h para o juiz C++.
+#
+# Quase toda submissão C++ começa com `#include <bits/stdc++.h>`, e analisar
+# esse cabeçalho é a maior parte do tempo de compilação. O .gch é gerado com
+# exatamente as flags do juiz em um diretório de include gerenciado:
+#
+#   <TEMP_DIR>/pch/<impressão digital>/bits/stdc++.h
+#   <TEMP_DIR>/pch/<impressão digital>/bits/stdc++.h.gch
+#   <TEMP_DIR>/pch/<impressão digital>/manifest.json
+#
+# A impressão digital cobre versão do compilador, flags e conteúdo do
+# cabeçalho, então qualquer mudança gera um novo diretório. A compilação usa
+# `-I <diretório>`: o GCC usa o .gch se ele for válido para as flags atuais e,
+# se não for, cai sozinho no stdc++.h textual ao lado dele.
+#
+# O manifesto guarda tamanho e mtime do .gch gerado; um .gch diferente disso
+# (truncado, sobrescrito) é regerado. A saída do compilador nunca apaga o PCH:
+# ela repete o código do aluno, que pode conter qualquer texto.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+from .artifact_cache import toolchain_version
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_HEADER = Path(settings.BASE_DIR) / 'bits' / 'stdc++.h'
+HEADER_NAME = 'bits/stdc++.h'
+MANIFEST_FILE = 'manifest.json'
+BUILD_TIMEOUT = 120  # segundos; o .gch de stdc++.h leva alguns segundos para gerar
+
+# "<arquivo>:<linha>:<coluna>: [fatal ]error|warning: <mensagem>" (ou "cc1plus: ..."); os
+# trechos do fonte que o GCC cita começam com espaço e nunca casam
+DIAGNOSTIC = re.compile(r'^[^\s:][^:]*:(?:\d+:)*\s*(?:fatal )?(?:error|warning): (.*)$')
+PCH_ERRORS = ('one or more PCH files were found', "can't read PCH file")
+
+
+def get_pch_settings():
+    config = settings.CODE_EXECUTION.get('CPP', {}).get('PRECOMPILED_HEADER', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'dir': Path(config.get('DIR') or Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'pch'),
+    }
+
+
+def resolve_header(compiler):
+    """
+    Cabeçalho que `#include <bits/stdc++.h>` resolve hoje no compilador.
+    O stdc++.h da libstdc++ é preferido para não mudar o significado das
+    submissões; o do repositório só é usado quando o compilador não tem um.
+    """
+    try:
+        proc = subprocess.run(
+            [compiler, '-x', 'c++', '-M', '-'],
+            input=f'#include <{HEADER_NAME}>\n',
+            capture_output=True, text=True, timeout=30
+        )
+        if proc.returncode == 0:
+            for dependency in proc.stdout.replace('\\\n', ' ').split()[1:]:
+                if dependency.endswith(HEADER_NAME):
+                    return Path(dependency)
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return BUNDLED_HEADER
+
+
+def is_gcc(compiler):
+    """O .gch é específico do GCC (no macOS g++ costuma ser o clang)"""
+    version = toolchain_version(compiler, '--version') or ''
+    return 'clang' not in version.lower() and version != ''
+
+
+def pch_fingerprint(compiler, flags, header):
+    digest = hashlib.sha256()
+    for part in (toolchain_version(compiler, '--version'), '\0'.join(flags), str(header)):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(header.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def pch_intact(include_dir):
+    """O .gch ainda é o que build_pch gerou (tamanho e mtime do manifesto)"""
+    include_dir = Path(include_dir)
+    try:
+        with open(include_dir / MANIFEST_FILE, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        stat = (include_dir / f'{HEADER_NAME}.gch').stat()
+    except (OSError, ValueError):
+        return False
+    return (manifest.get('gch_size'), manifest.get('gch_mtime_ns')) == (stat.st_size, stat.st_mtime_ns)
+
+
+def pch_rejected(compiler_output, include_dir):
+    """
+    O GCC recusou o .gch (diagnóstico sobre o próprio .gch ou do cc1plus), e
+    não o código. Só para repetir a compilação sem PCH: nada é apagado.
+    """
+    gch_path = os.path.join(include_dir, f'{HEADER_NAME}.gch')
+    for line in compiler_output.splitlines():
+        match = DIAGNOSTIC.match(line)
+        if match and match.group(1).startswith((gch_path, *PCH_ERRORS)):
+            return True
+    return False
+
+
+def build_pch(compiler, flags, force=False):
+    """
+    Gera o .gch para o compilador e flags dados e devolve o diretório de
+    include (ou None se não foi possível). Idempotente: se o manifesto já
+    existe para a mesma impressão digital e o .gch confere com ele, nada é
+    recompilado.
+    """
+    if not is_gcc(compiler):
+        logger.info(f"[PCH] {compiler} is not GCC, skipping precompiled header")
+        return None
+
+    header = resolve_header(compiler)
+    fingerprint = pch_fingerprint(compiler, flags, header)
+    base_dir = get_pch_settings()['dir']
+    include_dir = base_dir / fingerprint
+
+    if pch_intact(include_dir) and not force:
+        return str(include_dir)
+
+    base_dir.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(prefix='build_', dir=base_dir))
+    try:
+        (build_dir / 'bits').mkdir()
+        shutil.copy(header, build_dir / HEADER_NAME)
+
+        start_time = time.time()
+        proc = subprocess.run(
+            [compiler, *flags, '-x', 'c++-header', HEADER_NAME, '-o', f'{HEADER_NAME}.gch'],
+            capture_output=True, text=True, timeout=BUILD_TIMEOUT, cwd=build_dir
+        )
+        if proc.returncode != 0:
+            logger.warning(f"[PCH] Build failed: {proc.stderr.strip()[:300]}")
+            return None
+        build_time = time.time() - start_time
+        gch_stat = (build_dir / f'{HEADER_NAME}.gch').stat()  # Preservado pelo rename
+
+        manifest = {
+            'compiler': compiler,
+            'compiler_version': toolchain_version(compiler, '--version'),
+            'flags': list(flags),
+            'header': str(header),
+            'header_sha256': hashlib.sha256(header.read_bytes()).hexdigest(),
+            'build_time': build_time,
+            'gch_size': gch_stat.st_size,
+            'gch_mtime_ns': gch_stat.st_mtime_ns,
+        }
+        with open(build_dir / MANIFEST_FILE, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        # Substitui o anterior (forçado, corrompido ou de manifesto antigo)
+        shutil.rmtree(include_dir, ignore_errors=True)
+        try:
+            os.rename(build_dir, include_dir)
+        except OSError:
+            pass  # Outro processo gerou primeiro; o diretório dele serve
+        logger.info(f"[PCH] Built {HEADER_NAME}.gch for {compiler} {' '.join(flags)} in {build_time:.1f}s")
+        return str(include_dir)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"[PCH] Build failed: {e}")
+        return None
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def remove_stale(keep):
+    """Remove diretórios de PCH que não estão em keep (flags/compilador antigos)"""
+    base_dir = get_pch_settings()['dir']
+    if not base_dir.exists():
+        return []
+    removed = []
+    for entry in base_dir.iterdir():
+        if entry.is_dir() and str(entry) not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed.append(entry.name)
+    return removed
+
+
+_include_dirs = {}
+_building = set()
+_lock = threading.Lock()
+
+
+def precompiled_header_flags(compiler, flags):
+    """
+    Flags extras para usar o PCH na compilação (`-I <diretório>`), ou [] se
+    ele ainda não existe ou não confere com o manifesto. Nesse caso o .gch
+    é gerado em segundo plano e a compilação segue normal; ele deveria ter
+    sido gerado no deploy (manage.py build_pch).
+    """
+    if not get_pch_settings()['enabled']:
+        return []
+
+    key = (compiler, tuple(flags))
+    with _lock:
+        include_dir = _include_dirs.get(key)
+        if include_dir and pch_intact(include_dir):
+            return ['-I', include_dir]
+        _include_dirs.pop(key, None)
+        if key in _building:
+            return []
+        _building.add(key)
+
+    def build():
+        try:
+            include_dir = build_pch(compiler, flags)
+            if include_dir:
+                with _lock:
+                    _include_dirs[key] = include_dir
+        finally:
+            with _lock:
+                _building.discard(key)
+
+    # build_pch é idempotente: com o PCH gerado no deploy isso só confere o manifesto
+    thread = threading.Thread(target=build, name='pch-build', daemon=True)
+    thread.start()
+    thread.join(timeout=1)
+    with _lock:
+        include_dir = _include_dirs.get(key)
+    return ['-I', include_dir] if include_dir else []
+
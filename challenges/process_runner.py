@@ -0,0 +1,218 @@
+# challenges/process_runner.py
+#
+# Execução de um programa de submissão com medição de recursos via wait4.
+#
+# O processo roda em um grupo próprio, com stdin em arquivo temporário,
+# stdout/stderr lidos com limite de tamanho (challenges/output_capture.py) e
+# limites de recurso (RLIMIT_CPU, RLIMIT_AS). Ao terminar, wait4 devolve o tempo de CPU (user + sys) e o pico
+# de memória (ru_maxrss) do próprio filho; o tempo de relógio é reportado à
+# parte. O veredito de tempo e memória é calculado a partir desses números
+# (resource_verdict), e não do tempo de relógio, que inclui a sobrecarga do
+# juiz (criar processo, carregar o interpretador, máquina carregada).
+#
+# O ru_maxrss de um filho nunca é menor que o RSS de quem o lançou (o exec
+# herda o valor). Por isso, com o fork server habilitado, o programa é
+# lançado pelo zygote, um processo pequeno; lançado daqui, um pico abaixo do
+# RSS do processo Django não é mensurável e é reportado como None.
+
+import math
+import os
+import resource
+import signal
+import subprocess
+import threading
+import time
+import logging
+
+from django.conf import settings
+
+from .python_forkserver import fork_server_enabled, run_command_in_fork_server
+from .output_capture import capture_output
+from .test_data import open_stdin
+
+logger = logging.getLogger(__name__)
+
+# Saídas de erro que indicam falta de memória (limite de RLIMIT_AS ou -Xmx)
+OUT_OF_MEMORY_MARKERS = ('MemoryError', 'std::bad_alloc', 'OutOfMemoryError', 'Cannot allocate memory')
+
+CAPTURE_GRACE = 2  # segundos além do limite de relógio até desistir do EOF dos pipes
+
+
+def get_resource_settings():
+    config = settings.CODE_EXECUTION.get('RESOURCE_LIMITS', {})
+    return {
+        'memory_mb': config.get('MEMORY_LIMIT_MB', settings.CODE_EXECUTION.get('MAX_MEMORY_USAGE', 256)),
+        'wall_time_factor': config.get('WALL_TIME_FACTOR', 2.0),
+        'min_wall_time_ms': config.get('MIN_WALL_TIME_MS', 1000),
+    }
+
+
+def wall_time_limit(time_limit_ms):
+    """Limite de relógio (programas bloqueados/dormindo não consomem CPU)"""
+    config = get_resource_settings()
+    return max(time_limit_ms * config['wall_time_factor'], time_limit_ms + config['min_wall_time_ms'])
+
+
+class _ProcessGroup:
+    """Handle do processo para o CancellationToken: mata o grupo inteiro"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def kill(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _limits(time_limit_ms, memory_limit_mb):
+    """preexec_fn: só chamadas de sistema (seguro após fork em processo com threads)"""
+    cpu_seconds = max(1, math.ceil(time_limit_ms / 1000))
+    address_space = memory_limit_mb * 1024 * 1024 if memory_limit_mb else 0
+
+    def apply():
+        # Encerra o programa logo após o limite; o veredito vem do rusage, não do SIGXCPU
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if address_space:
+            resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+    return apply
+
+
+def run_process(command, test_input, time_limit_ms, memory_limit_mb=0, wall_limit_ms=None,
+                cwd=None, env=None, cancel_token=None, stdout_sink=None):
+    """
+    Executa command com o input dado. time_limit_ms é o limite de CPU;
+    wall_limit_ms (padrão: wall_time_limit) o de relógio. memory_limit_mb
+    vira RLIMIT_AS (0 = sem limite, ex.: JVM, que reserva muito espaço virtual).
+    Com stdout_sink (ver capture_output) o stdout não é guardado.
+
+    Retorna um dict com 'exit_code', 'signal', 'timed_out',
+    'output_limit_exceeded', 'output_rejected' (o sink recusou a saída e o
+    programa foi morto), 'cpu_time' (ms), 'wall_time' (ms), 'max_rss_kb'
+    (None se não mensurável), 'stdout' e 'stderr'.
+    """
+    wall_limit_ms = wall_limit_ms or wall_time_limit(time_limit_ms)
+
+    if fork_server_enabled():
+        run = run_command_in_fork_server(
+            command, test_input, wall_limit_ms / 1000, cancel_token,
+            cpu_limit=time_limit_ms / 1000, memory_mb=memory_limit_mb, cwd=cwd, env=env,
+            stdout_sink=stdout_sink
+        )
+        if run is not None:
+            # O zygote reporta em segundos
+            return dict(run, wall_time=run['wall_time'] * 1000, cpu_time=run['cpu_time'] * 1000)
+        if cancel_token is not None and cancel_token.cancelled:
+            raise RuntimeError('Execução cancelada')
+
+    # Entrada em arquivo (InputFile) vai direto como stdin; texto passa por um temporário
+    with open_stdin(test_input) as stdin_file:
+        spawner_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.monotonic()
+        proc = subprocess.Popen(
+            command,
+            stdin=stdin_file,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            start_new_session=True,  # grupo próprio: o timeout mata a árvore inteira
+            preexec_fn=_limits(time_limit_ms, memory_limit_mb),
+        )
+        group = _ProcessGroup(proc.pid)
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            group.kill()
+
+        timer = threading.Timer(wall_limit_ms / 1000, on_timeout)
+        timer.daemon = True
+        timer.start()
+        if cancel_token is not None:
+            cancel_token.attach(group)
+        try:
+            # Saída lida aos poucos, com limite; o filho morre se passar dele
+            stdout, stderr, output_exceeded = capture_output(
+                proc.stdout.fileno(), proc.stderr.fileno(), group.kill,
+                deadline=time.monotonic() + wall_limit_ms / 1000 + CAPTURE_GRACE,
+                stdout_sink=stdout_sink
+            )
+            _, status, rusage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+            if cancel_token is not None:
+                cancel_token.detach(group)
+            proc.stdout.close()
+            proc.stderr.close()
+        wall_time = (time.monotonic() - start) * 1000
+
+        # Processos que o programa deixou para trás
+        group.kill()
+        # Já recolhido por wait4: o Popen não deve esperar de novo
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+        return {
+            'exit_code': os.WEXITSTATUS(status) if os.WIFEXITED(status) else None,
+            'signal': os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+            'timed_out': timed_out.is_set(),
+            'output_limit_exceeded': output_exceeded,
+            'output_rejected': stdout.rejected,
+            'cpu_time': (rusage.ru_utime + rusage.ru_stime) * 1000,
+            'wall_time': wall_time,
+            'max_rss_kb': rusage.ru_maxrss if rusage.ru_maxrss > spawner_rss_kb else None,
+            'stdout': stdout.text(),
+            'stderr': stderr.text(),
+        }
+
+
+def resource_verdict(run, time_limit_ms, memory_limit_mb=0, check_rss=True):
+    """
+    'output_limit', 'time_limit', 'memory_limit' ou None a partir das medições
+    de uma execução (run no formato de run_process; o fork server usa o mesmo).
+    check_rss=False para a JVM, cujo RSS inclui a própria máquina virtual.
+    """
+    if run.get('output_limit_exceeded'):
+        return 'output_limit'
+    if run['timed_out'] or run['cpu_time'] > time_limit_ms or run['signal'] == signal.SIGXCPU:
+        return 'time_limit'
+    if memory_limit_mb:
+        if check_rss and (run['max_rss_kb'] or 0) > memory_limit_mb * 1024:
+            return 'memory_limit'
+        if run['exit_code'] != 0 and any(marker in run['stderr'] for marker in OUT_OF_MEMORY_MARKERS):
+            return 'memory_limit'
+    return None
+
+
+def measured_time(result):
+    """Tempo de um teste para somas e comparações: CPU quando medido, senão relógio"""
+    cpu_time = result.get('cpu_time')
+    return cpu_time if cpu_time is not None else result.get('execution_time', 0)
+
+
+def program_result(run, time_limit_ms, memory_limit_mb=0, check_rss=True):
+    """
+    Converte as medições de uma execução (run_process/fork server) no
+    resultado de um caso de teste, com status no vocabulário de Submission
+    """
+    usage = {'execution_time': run['wall_time'], 'cpu_time': run['cpu_time'], 'peak_memory_kb': run['max_rss_kb']}
+    
+    verdict = resource_verdict(run, time_limit_ms, memory_limit_mb, check_rss)
+    if verdict == 'output_limit':
+        return {'success': False, 'status': 'output_limit', 'message': 'Limite de saída excedido', **usage}
+    if verdict == 'time_limit':
+        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido', **usage}
+    if verdict == 'memory_limit':
+        return {'success': False, 'status': 'memory_limit', 'message': 'Limite de memória excedido', **usage}
+    
+    if run.get('output_rejected'):
+        # Morto por nós na primeira diferença: o comparador tem o veredito
+        return {'success': True, 'output': run['stdout'], 'output_rejected': True, **usage}
+    
+    if run['exit_code'] != 0:
+        error_msg = run['stderr'].strip() or "Erro de execução"
+        return {'success': False, 'status': 'runtime_error', 'message': error_msg, **usage}
+    
+    return {'success': True, 'output': run['stdout'], **usage}
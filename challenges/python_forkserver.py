@@ -0,0 +1,281 @@
+# challenges/python_forkserver.py
+#
+# Fork server para a execução de submissões Python.
+#
+# Em vez de iniciar um `python3` novo por caso de teste, cada processo Django
+# mantém um zygote (challenges/forkserver/zygote.py) com o interpretador já
+# inicializado. Cada execução é um fork dele, com limites de recurso, stdin
+# ligado ao arquivo de entrada do teste (ou a um temporário com o texto) e
+# stdout/stderr a pipes lidos com limite. Se o zygote
+# não puder ser usado, quem chama volta ao subprocess normal — a não ser que
+# a saída já tenha sido entregue ao comparador, quando a execução vira erro
+# do juiz.
+#
+# Programas nativos e a JVM também são lançados pelo zygote (run_command):
+# como ele é um processo pequeno, o pico de memória medido pelo wait4 é o do
+# programa, e não herda o tamanho do processo Django que o lançaria.
+
+import atexit
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import threading
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+
+from .output_capture import capture_output
+from .test_data import open_stdin
+
+logger = logging.getLogger(__name__)
+
+ZYGOTE_SCRIPT = Path(__file__).resolve().parent / 'forkserver' / 'zygote.py'
+READY = b'READY\n'
+STARTUP_TIMEOUT = 10  # segundos para o zygote ficar pronto
+RESPONSE_GRACE = 5    # folga além do timeout antes de desistir do monitor
+
+
+class ForkServerUnavailable(Exception):
+    """O zygote não inicia ou morreu durante a execução"""
+
+
+class ForkServerFailed(Exception):
+    """
+    O zygote falhou depois de a saída já ter sido entregue ao stdout_sink:
+    repetir no subprocess alimentaria o comparador duas vezes
+    """
+
+
+def get_fork_server_settings():
+    python_settings = settings.CODE_EXECUTION.get('PYTHON', {})
+    config = python_settings.get('FORK_SERVER', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'memory_mb': config.get('MEMORY_LIMIT_MB', 0),
+        'python': python_settings.get('INTERPRETER_PATH', 'python3'),
+    }
+
+
+def fork_server_enabled():
+    return get_fork_server_settings()['enabled']
+
+
+class _ForkedChild:
+    """Handle do processo da submissão para o CancellationToken (kill())"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def kill(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # Ainda não chamou setsid()
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+class PythonForkServer:
+    """Um zygote por processo Django, iniciado sob demanda"""
+
+    def __init__(self, python_path='python3', memory_mb=0):
+        self.python_path = python_path
+        self.memory_mb = memory_mb
+        self.process = None
+        self.socket_path = None
+        self.owner_pid = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        socket_dir = Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'forkserver'
+        socket_dir.mkdir(parents=True, exist_ok=True)
+        self.socket_path = str(socket_dir / f'zygote_{os.getpid()}.sock')
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            self.process = subprocess.Popen(
+                [self.python_path, str(ZYGOTE_SCRIPT), self.socket_path],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=socket_dir,
+            )
+        except OSError as e:
+            raise ForkServerUnavailable(f'Não foi possível iniciar o zygote: {e}')
+        self.owner_pid = os.getpid()
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.process.stdout, selectors.EVENT_READ)
+        ready = selector.select(STARTUP_TIMEOUT)
+        selector.close()
+        if not ready or self.process.stdout.readline() != READY:
+            self.stop()
+            raise ForkServerUnavailable('Zygote não ficou pronto')
+        logger.info(f"[FORKSERVER] Zygote started (pid {self.process.pid})")
+
+    def ensure_running(self):
+        with self._lock:
+            # Após um fork (ex.: gunicorn) o zygote pertence ao processo pai
+            if self.process is None or self.owner_pid != os.getpid() or self.process.poll() is not None:
+                self._start()
+            return self.socket_path
+
+    def stop(self):
+        if self.process is not None and self.owner_pid == os.getpid():
+            try:
+                self.process.stdin.close()  # zygote encerra ao ver EOF
+                self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+        self.process = None
+
+    def run(self, script_path, test_input, timeout, cancel_token=None, cpu_limit=None, memory_mb=None,
+            stdout_sink=None):
+        """
+        Executa o script em um fork do zygote. timeout é o limite de relógio e
+        cpu_limit o de CPU (segundos); memory_mb sobrepõe o limite padrão.
+        Com stdout_sink o stdout vai para ele em vez de ser guardado.
+        Retorna um dict com
+        'exit_code', 'signal', 'timed_out', 'wall_time', 'cpu_time',
+        'max_rss_kb', 'output_limit_exceeded', 'output_rejected', 'stdout' e 'stderr'.
+        """
+        request = {
+            'script': os.path.abspath(script_path),
+            'timeout': timeout,
+            'cpu_limit': cpu_limit or timeout,
+            'memory_mb': self.memory_mb if memory_mb is None else memory_mb,
+        }
+        return self._execute(request, test_input, timeout, cancel_token, stdout_sink)
+
+    def run_command(self, argv, test_input, timeout, cancel_token=None, cpu_limit=None, memory_mb=0,
+                    cwd=None, env=None, stdout_sink=None):
+        """Como run(), mas faz exec de um programa (binário nativo, java) no fork"""
+        request = {
+            'argv': list(argv),
+            'cwd': os.path.abspath(cwd or os.getcwd()),
+            'env': dict(env) if env is not None else None,
+            'timeout': timeout,
+            'cpu_limit': cpu_limit or timeout,
+            'memory_mb': memory_mb or 0,
+        }
+        return self._execute(request, test_input, timeout, cancel_token, stdout_sink)
+
+    def _execute(self, request, test_input, timeout, cancel_token, stdout_sink=None):
+        socket_path = self.ensure_running()
+
+        fed = False
+        if stdout_sink is not None:
+            sink = stdout_sink
+
+            def stdout_sink(chunk):
+                nonlocal fed
+                fed = True
+                return sink(chunk)
+
+        with open_stdin(test_input) as stdin_file:
+            # stdout/stderr são pipes lidos aqui com limite (output_capture)
+            stdout_read, stdout_write = os.pipe()
+            stderr_read, stderr_write = os.pipe()
+            child = None
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                    conn.settimeout(STARTUP_TIMEOUT)
+                    conn.connect(socket_path)
+                    try:
+                        socket.send_fds(
+                            conn, [json.dumps(request).encode('utf-8')],
+                            [stdin_file.fileno(), stdout_write, stderr_write]
+                        )
+                    finally:
+                        # Só o filho deve segurar as pontas de escrita (EOF quando ele termina)
+                        os.close(stdout_write)
+                        os.close(stderr_write)
+                    reader = conn.makefile('rb')
+
+                    started = json.loads(reader.readline() or b'null')
+                    if not started:
+                        raise ForkServerUnavailable('Zygote não iniciou o processo')
+                    child = _ForkedChild(started['pid'])
+                    if cancel_token is not None:
+                        cancel_token.attach(child)
+
+                    stdout, stderr, output_exceeded = capture_output(
+                        stdout_read, stderr_read, child.kill,
+                        deadline=time.monotonic() + timeout + RESPONSE_GRACE,
+                        stdout_sink=stdout_sink
+                    )
+
+                    conn.settimeout(timeout + RESPONSE_GRACE)
+                    result = json.loads(reader.readline() or b'null')
+                    if not result:
+                        raise ForkServerUnavailable('Monitor terminou sem resultado')
+            except (OSError, ValueError, ForkServerUnavailable) as e:
+                if child is not None:
+                    child.kill()
+                if fed:
+                    raise ForkServerFailed(f'Zygote falhou depois de entregar a saída: {e}') from e
+                if isinstance(e, ForkServerUnavailable):
+                    raise
+                raise ForkServerUnavailable(f'Falha na comunicação com o zygote: {e}')
+            finally:
+                if child is not None and cancel_token is not None:
+                    cancel_token.detach(child)
+                os.close(stdout_read)
+                os.close(stderr_read)
+
+            result['output_limit_exceeded'] = output_exceeded
+            result['output_rejected'] = stdout.rejected
+            result['stdout'] = stdout.text()
+            result['stderr'] = stderr.text()
+            return result
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_fork_server():
+    global _server
+    with _server_lock:
+        if _server is None:
+            config = get_fork_server_settings()
+            _server = PythonForkServer(config['python'], config['memory_mb'])
+            atexit.register(_server.stop)
+        return _server
+
+
+def run_in_fork_server(script_path, test_input, timeout, cancel_token=None, cpu_limit=None, memory_mb=None,
+                       stdout_sink=None):
+    """
+    Executa no fork server; retorna None se ele não puder ser usado, para que
+    o chamador volte ao subprocess normal. Se a saída já tiver ido para
+    stdout_sink, a falha sobe como ForkServerFailed (erro do juiz).
+    """
+    try:
+        return get_fork_server().run(
+            script_path, test_input, timeout, cancel_token, cpu_limit, memory_mb, stdout_sink
+        )
+    except ForkServerUnavailable as e:
+        logger.warning(f"[FORKSERVER] Unavailable, falling back to subprocess: {e}")
+        return None
+
+
+def run_command_in_fork_server(argv, test_input, timeout, cancel_token=None, cpu_limit=None, memory_mb=0,
+                               cwd=None, env=None, stdout_sink=None):
+    """Executa um programa a partir do zygote; None se ele não puder ser usado (ver run_in_fork_server)"""
+    try:
+        return get_fork_server().run_command(
+            argv, test_input, timeout, cancel_token, cpu_limit, memory_mb, cwd, env, stdout_sink
+        )
+    except ForkServerUnavailable as e:
+        logger.warning(f"[FORKSERVER] Unavailable, falling back to subprocess: {e}")
+        return None
@@ -0,0 +1,270 @@
+# challenges/rejudge.py
+#
+# Reavaliação em massa de submissões já julgadas (manage.py rejudge).
+#
+# As submissões são lidas em fluxo (iterator, em ordem de id) e avaliadas em
+# um pool de processos com prioridade baixa (nice); cada compilação/execução
+# ainda passa pelo controle de admissão (challenges/admission.py), então a
+# reavaliação disputa a máquina em ordem de chegada com as submissões ao vivo
+# em vez de tomá-la. Os processos do pool não acessam o banco: recebem o
+# código e o desafio e devolvem o resultado compacto.
+#
+# Os vereditos são gravados em lotes: uma transação por lote atualiza as
+# submissões, substitui os resultados por teste e reconcilia
+# UserProfile.completed_challenges/total_points dos usuários afetados. Depois
+# de cada lote o progresso vai para um checkpoint, e --resume continua de lá.
+
+import hashlib
+import json
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .execution_engine import ExecutionLimits, evaluate_code
+from .models import Challenge, Submission, SubmissionTestResult
+from .leaderboards import verdict_changed
+from .standings import refresh_standings
+from .test_data import load_test_cases, TestDataMissing
+from .test_results import build_test_result
+
+logger = logging.getLogger(__name__)
+
+REJUDGE_NICE = 10  # prioridade dos processos de reavaliação (o servidor web fica com a CPU)
+
+
+def get_rejudge_dir():
+    return Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'rejudge'
+
+
+def challenge_payload(challenge):
+    """O que um processo do pool precisa saber do desafio (os casos vão como caminhos no armazenamento)"""
+    try:
+        test_cases, error = load_test_cases(challenge), None
+    except TestDataMissing as e:
+        test_cases, error = [], str(e)
+    return {
+        'test_cases': test_cases,
+        'error': error,
+        'time_limit': challenge.time_limit,
+        'memory_limit': challenge.memory_limit,
+        'comparison_mode': challenge.comparison_mode,
+        'float_tolerance': challenge.float_tolerance,
+    }
+
+
+def _init_worker():
+    try:
+        os.nice(REJUDGE_NICE)
+    except OSError:
+        pass
+
+
+def grade(submission_id, language, code, challenge):
+    """Avalia uma submissão (em um processo do pool); retorna (id, resultado compacto)"""
+    if not code.strip():
+        return submission_id, {'status': 'compilation_error', 'message': 'Código vazio', 'test_results': []}
+    if not challenge['test_cases']:
+        return submission_id, {'status': 'runtime_error', 'message': challenge['error'] or 'Nenhum caso de teste encontrado',
+                               'test_results': [], 'judge_error': True}
+
+    result = evaluate_code(
+        language, code, challenge['test_cases'],
+        ExecutionLimits(challenge['time_limit'], challenge['memory_limit']),
+        comparison_mode=challenge['comparison_mode'],
+        float_tolerance=challenge['float_tolerance'],
+        work_prefix=f'rejudge_{submission_id}_',
+    )
+    # Sem a saída dos programas: o veredito, os tempos e os hashes bastam
+    test_results = [
+        {'test_case': entry['test_case'], 'result': {k: v for k, v in entry['result'].items() if k != 'output'}}
+        for entry in result.get('test_results') or []
+    ]
+    judge_error = bool(result.get('judge_error')) or any(entry['result'].get('judge_error') for entry in test_results)
+    return submission_id, {
+        'status': result['status'],
+        'message': result.get('message', ''),
+        'execution_time': result.get('execution_time'),
+        'test_results': test_results,
+        'judge_error': judge_error,
+    }
+
+
+class Checkpoint:
+    """Progresso de uma reavaliação (último id gravado), por conjunto de filtros"""
+
+    def __init__(self, filters):
+        key = hashlib.sha256(json.dumps(filters, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+        self.path = get_rejudge_dir() / f'{key}.json'
+        self.state = {'last_id': 0, 'processed': 0, 'changed': 0, 'errors': 0}
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as checkpoint_file:
+                self.state.update(json.load(checkpoint_file))
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(self.state, checkpoint_file)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def apply_batch(batch):
+    """
+    Grava um lote [(submission, resultado)] em uma transação: veredito das
+    submissões, resultados por teste, perfis e classificação dos usuários afetados.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        for submission, result in batch:
+            submission.status = result['status']
+            submission.execution_time = result.get('execution_time')
+            submission.error_message = (
+                None if result['status'] in ('accepted', 'wrong_answer') else result.get('message')
+            )
+            submission.judged_at = now
+        Submission.objects.bulk_update(
+            [submission for submission, _ in batch], ['status', 'execution_time', 'error_message', 'judged_at']
+        )
+
+        SubmissionTestResult.objects.filter(submission__in=[submission for submission, _ in batch]).delete()
+        SubmissionTestResult.objects.bulk_create([
+            build_test_result(submission, entry['test_case'], entry['result'])
+            for submission, result in batch
+            for entry in result.get('test_results') or []
+        ])
+
+        user_ids = {submission.user_id for submission, _ in batch}
+        reconcile_profiles(user_ids)
+        refresh_standings(user_ids)  # bulk_update não dispara o post_save
+        challenge_ids = {submission.challenge_id for submission, _ in batch}
+        transaction.on_commit(lambda: verdict_changed(challenge_ids))
+
+
+def reconcile_profiles(user_ids):
+    """
+    completed_challenges = desafios com alguma submissão aceita; total_points
+    = soma dos pontos desses desafios. Desafios ganhos na reavaliação
+    desbloqueiam o próximo estado, como um aceite ao vivo; perdidos não
+    bloqueiam de volta.
+    """
+    from accounts.models import UserProfile
+
+    accepted = {}
+    for user_id, challenge_id in (
+        Submission.objects.filter(user_id__in=user_ids, status='accepted')
+        .values_list('user_id', 'challenge_id').distinct()
+    ):
+        accepted.setdefault(user_id, set()).add(challenge_id)
+
+    for profile in UserProfile.objects.select_for_update().filter(user_id__in=user_ids):
+        completed = set(profile.completed_challenges.values_list('id', flat=True))
+        should_complete = accepted.get(profile.user_id, set())
+        gained, lost = should_complete - completed, completed - should_complete
+        if not gained and not lost:
+            continue
+
+        if lost:
+            profile.completed_challenges.remove(*lost)
+        if gained:
+            profile.completed_challenges.add(*gained)
+        profile.total_points = Challenge.objects.filter(id__in=should_complete).aggregate(
+            total=Sum('points')
+        )['total'] or 0
+        profile.save()
+        for _ in gained:
+            profile.unlock_next_state()
+        logger.info(f"[REJUDGE] Profile of user {profile.user_id}: +{len(gained)} -{len(lost)} challenges")
+
+
+def run_rejudge(queryset, workers=1, batch_size=50, dry_run=False, checkpoint=None, on_result=None):
+    """
+    Reavalia as submissões de queryset (id > checkpoint['last_id']).
+    on_result(submission, old_status, result) é chamado a cada submissão
+    avaliada. Retorna o estado final do checkpoint.
+    """
+    checkpoint = checkpoint or Checkpoint({})
+    state = checkpoint.state
+    queryset = queryset.filter(id__gt=state['last_id']).select_related('language').order_by('id')
+    challenges = {}
+    batch = []
+
+    def flush():
+        # Um lote só é gravado em ordem de id: o checkpoint nunca pula submissões
+        if not dry_run:
+            apply_batch([(submission, result) for submission, result in batch if not result['judge_error']])
+        state['last_id'] = batch[-1][0].id
+        if not dry_run:
+            checkpoint.save()
+        batch.clear()
+
+    # Conexões não podem atravessar o fork: os processos do pool (criados
+    # todos na primeira tarefa) nascem sem nenhuma aberta
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pool.submit(os.getpid).result()
+        pending = {}
+        done_results = {}
+        order = []
+        submissions = queryset.iterator(chunk_size=batch_size)
+
+        def submit_next():
+            submission = next(submissions, None)
+            if submission is None:
+                return False
+            if submission.challenge_id not in challenges:
+                challenges[submission.challenge_id] = challenge_payload(submission.challenge)
+            future = pool.submit(
+                grade, submission.id, submission.language.name, submission.code, challenges[submission.challenge_id]
+            )
+            pending[future] = submission
+            order.append(submission.id)
+            return True
+
+        # Janela limitada: as submissões são lidas conforme o pool avança
+        while len(pending) < workers * 2 and submit_next():
+            pass
+
+        by_id = {}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                submission = pending.pop(future)
+                submission_id, result = future.result()
+                by_id[submission_id] = submission
+                done_results[submission_id] = result
+                submit_next()
+
+            # Resultados entram no lote na ordem de id
+            while order and order[0] in done_results:
+                submission_id = order.pop(0)
+                submission, result = by_id.pop(submission_id), done_results.pop(submission_id)
+                old_status = submission.status
+                state['processed'] += 1
+                if result['judge_error']:
+                    state['errors'] += 1
+                elif result['status'] != old_status:
+                    state['changed'] += 1
+                if on_result:
+                    on_result(submission, old_status, result)
+                batch.append((submission, result))
+                if len(batch) >= batch_size:
+                    flush()
+
+        if batch:
+            flush()
+
+    return state
@@ -0,0 +1,66 @@
+# challenges/shared_cache.py
+#
+# Cache compartilhado entre os workers com chaves versionadas.
+#
+# O cache padrão do Django (settings.CACHES, escolhido por CACHE_BACKEND) é o
+# mesmo para todos os processos da máquina: arquivos (padrão), tabela no banco
+# (SQLite por padrão) ou um servidor compatível com Redis. Um LocMemCache seria
+# privado de cada worker do gunicorn e cada um veria um ranking diferente.
+#
+# Cada item pertence a um namespace ('standings', 'map', 'leaderboard:region:sul',
+# ...). A chave real inclui a versão atual do namespace:
+#
+#   <namespace>:<versão>:<chave>
+#
+# e invalidate(namespace) só grava uma versão nova; os itens da versão antiga
+# deixam de ser lidos por todos os workers de uma vez e expiram sozinhos. Não
+# é preciso saber quais chaves existem (ex.: cada página do ranking).
+
+import time
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'namespace-version:{namespace}'
+
+# Estados e desafios do mapa da página inicial (core.views.home)
+MAP_NAMESPACE = 'map'
+
+
+def _new_version():
+    # Relógio em ns: dois workers que invalidam juntos nunca voltam a uma versão já usada
+    return time.time_ns()
+
+
+def namespace_version(namespace):
+    version_key = VERSION_KEY.format(namespace=namespace)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_version(), None)  # Outro worker pode ter criado antes: vale o dele
+        version = cache.get(version_key)
+    return version
+
+
+def versioned_key(namespace, key=''):
+    return f'{namespace}:{namespace_version(namespace)}:{key}'
+
+
+def cached(namespace, key, compute, timeout):
+    """Valor de compute() guardado em (namespace, chave) até expirar ou o namespace ser invalidado"""
+    full_key = versioned_key(namespace, key)
+    value = cache.get(full_key)
+    if value is None:
+        value = compute()
+        cache.set(full_key, value, timeout)
+    return value
+
+
+def invalidate(*namespaces):
+    """Descarta tudo o que foi guardado nos namespaces (para todos os workers)"""
+    if not namespaces:
+        return
+    version = _new_version()
+    cache.set_many({VERSION_KEY.format(namespace=namespace): version for namespace in namespaces}, None)
+    logger.debug(f"[SHARED-CACHE] Invalidated {', '.join(namespaces)}")
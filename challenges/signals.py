@@ -0,0 +1,91 @@
+# challenges/signals.py
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .leaderboards import challenges_changed, verdict_changed
+from .models import BrazilState, Challenge, Submission
+from .shared_cache import invalidate, MAP_NAMESPACE
+from .standings import refresh_completion_times, refresh_standings, refresh_user_standing, update_rank_key
+from .test_data import sync_inline_test_cases
+from .verdict_cache import invalidate_challenge
+
+@receiver(post_save, sender=Challenge)
+def sync_test_data(sender, instance, **kwargs):
+    """Casos de Challenge.test_cases gravados no armazenamento em arquivos (antes da invalidação abaixo)"""
+    sync_inline_test_cases(instance)
+
+@receiver(post_save, sender=Challenge)
+def invalidate_cached_verdicts(sender, instance, created, **kwargs):
+    """
+    Grava a versão dos casos de teste sincronizados acima; editados (ou
+    limites e modo de comparação), os vereditos cacheados da versão anterior
+    não valem mais
+    """
+    invalidate_challenge(instance)
+
+@receiver(post_save, sender=Challenge)
+def update_standings_for_challenge(sender, instance, created, **kwargs):
+    """
+    Desafio novo muda quem completou todos (completion_time_days de quem
+    tinha completado); editado pode ter mudado os pontos de quem o resolveu
+    """
+    if created:
+        refresh_completion_times()
+    else:
+        refresh_standings(
+            Submission.objects.filter(challenge=instance, status='accepted').values_list('user_id', flat=True)
+        )
+
+@receiver(post_delete, sender=Challenge)
+def update_standings_after_challenge_delete(sender, instance, **kwargs):
+    # As submissões apagadas em cascata já recalcularam quem o resolveu
+    refresh_completion_times()
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def invalidate_challenge_leaderboards(sender, instance, **kwargs):
+    """Pontos, região ou total de desafios podem ter mudado: rankings em cache e o mapa"""
+    transaction.on_commit(partial(challenges_changed, instance.id))
+    transaction.on_commit(partial(invalidate, MAP_NAMESPACE))
+
+@receiver(post_save, sender=BrazilState)
+@receiver(post_delete, sender=BrazilState)
+def invalidate_map(sender, instance, **kwargs):
+    transaction.on_commit(partial(challenges_changed))  # A região do estado pode ter mudado
+    transaction.on_commit(partial(invalidate, MAP_NAMESPACE))
+
+@receiver(post_save, sender=Submission)
+def update_user_standing(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Submissão nova (uma tentativa a mais) ou veredito final alterado: recalcula
+    a classificação do usuário. Gravar result_data, judged_at etc. depois do
+    veredito não recalcula de novo.
+    """
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    if created or instance.verdict_changed:
+        refresh_user_standing(instance.user_id)
+
+@receiver(post_delete, sender=Submission)
+def update_user_standing_after_delete(sender, instance, **kwargs):
+    refresh_user_standing(instance.user_id)
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+def invalidate_cached_standings(sender, instance, **kwargs):
+    """
+    Veredito final (ou submissão apagada) muda os rankings em cache de todos os
+    workers; depois do commit, para nenhum recachear o antigo
+    """
+    if instance.is_final:
+        transaction.on_commit(partial(verdict_changed, [instance.challenge_id], instance.status == 'accepted'))
+
+@receiver(post_save, sender=User)
+def update_rank_key_on_rename(sender, instance, created, update_fields=None, **kwargs):
+    """O nome de usuário é o último critério de desempate (saves de last_login não o mudam)"""
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    update_rank_key(instance)
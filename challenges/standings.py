@@ -0,0 +1,338 @@
+# challenges/standings.py
+#
+# Classificação dos usuários (ranking).
+#
+# A classificação fica materializada em UserStanding, uma linha por usuário
+# com submissões. A linha é recalculada (refresh_user_standing) sempre que uma
+# submissão do usuário é criada, recebe veredito final ou é apagada, na mesma
+# transação da submissão; o ranking e o perfil só leem a tabela, então o custo
+# das páginas não cresce com o histórico de submissões.
+#
+# Os valores saem de consultas agregadas (aggregate_standings), as mesmas
+# para um usuário ou para todos:
+#
+#   1. uma consulta sobre Submission (GROUP BY usuário) com tentativas,
+#      aceitas, desafios distintos resolvidos, primeira submissão e última aceita
+#   2. uma consulta com os pares distintos (usuário, desafio aceito, pontos),
+#      somados aqui: cada desafio conta uma vez, mesmo com vários aceitos
+#
+# manage.py standings rebuild|verify recalcula ou confere a tabela inteira.
+#
+# Critérios de desempate (ranking_key), nesta ordem:
+#   mais pontos, mais desafios, completou mais rápido, menos tentativas,
+#   maior taxa de sucesso, começou primeiro, nome de usuário.
+#
+# A ordem inteira fica em UserStanding.rank_key, uma string indexada que
+# ordena como a tupla acima (rank_key()). Com ela a posição de um usuário é
+# uma contagem no índice (rank_position) e as páginas do ranking são
+# consultas por intervalo a partir de um cursor (standings_page), sem carregar
+# os demais usuários.
+
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+
+from .models import Challenge, Submission, UserStanding
+
+logger = logging.getLogger(__name__)
+
+NOT_COMPLETED_DAYS = 999999  # completion_time_days de quem não resolveu todos os desafios
+
+ACCEPTED = Q(status='accepted')
+
+STANDING_FIELDS = (
+    'total_points', 'completed_challenges', 'total_attempts', 'accepted_count', 'success_rate',
+    'first_attempt_date', 'completion_date', 'completion_time_days', 'rank_key',
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Bytes do nome de usuário viram pares de letras b..q; 'a' encerra o nome, então
+# um nome que é prefixo de outro vem antes dele, como na comparação de strings
+USERNAME_DIGITS = 'bcdefghijklmnopq'
+USERNAME_END = 'a'
+CURSOR_PATTERN = re.compile(r'^[0-9a-q]+$')
+
+
+def success_rate(accepted_count, total_attempts):
+    return round((accepted_count / total_attempts) * 100) if total_attempts > 0 else 0
+
+
+def completion_percentage(completed_challenges, total_challenges):
+    return round((completed_challenges / total_challenges) * 100) if total_challenges > 0 else 0
+
+
+def completion_time_days(first_attempt_date, completion_date, completed_challenges, total_challenges):
+    """Dias entre a primeira submissão e a última aceita, só para quem resolveu tudo"""
+    if completion_date and completed_challenges == total_challenges:
+        return (completion_date - first_attempt_date).days
+    return NOT_COMPLETED_DAYS
+
+
+def ranking_key(entry):
+    """Critérios de desempate como tupla, para linhas em memória"""
+    return (
+        -entry['total_points'],             # 1º: Mais pontos (decrescente)
+        -entry['completed_challenges'],     # 2º: Mais desafios completados (decrescente)
+        entry['completion_time_days'],      # 3º: Completou mais rápido (crescente)
+        entry['total_attempts'],            # 4º: Menos tentativas totais (crescente)
+        -entry['success_rate'],             # 5º: Maior taxa de sucesso (decrescente)
+        entry['first_attempt_date'],        # 6º: Começou primeiro (crescente)
+        entry['user'].username.lower(),     # 7º: Ordem alfabética (crescente)
+    )
+
+
+def _ascending(value, width):
+    return f'{min(max(value, 0), 10 ** width - 1):0{width}d}'
+
+
+def _descending(value, width):
+    return _ascending(10 ** width - 1 - min(max(value, 0), 10 ** width - 1), width)
+
+
+def rank_key(fields, username, user_id):
+    """
+    String que ordena (comparação de strings) como ranking_key: números com
+    largura fixa, invertidos nos critérios decrescentes, depois o nome de
+    usuário e o id (desempate final, a chave é única). Só dígitos e letras
+    minúsculas: a ordem é a mesma em qualquer collation.
+    """
+    first_attempt = fields['first_attempt_date'] or EPOCH
+    if first_attempt.tzinfo is None:
+        first_attempt = first_attempt.replace(tzinfo=dt_timezone.utc)
+    return ''.join([
+        _descending(fields['total_points'], 10),
+        _descending(fields['completed_challenges'], 6),
+        _ascending(fields['completion_time_days'], 6),
+        _ascending(fields['total_attempts'], 10),
+        _descending(fields['success_rate'], 3),
+        _ascending((first_attempt - EPOCH) // timedelta(microseconds=1), 17),
+        ''.join(USERNAME_DIGITS[byte >> 4] + USERNAME_DIGITS[byte & 15] for byte in username.lower().encode('utf-8')),
+        USERNAME_END,
+        _ascending(user_id, 12),
+    ])
+
+
+def _submissions(user_ids=None, challenge_ids=None):
+    submissions = Submission.objects.order_by()  # sem a ordenação padrão, que entraria no GROUP BY/DISTINCT
+    if user_ids is not None:
+        submissions = submissions.filter(user_id__in=user_ids)
+    if challenge_ids is not None:
+        submissions = submissions.filter(challenge_id__in=challenge_ids)
+    return submissions
+
+
+def points_by_user(user_ids=None, challenge_ids=None):
+    """{user_id: pontos} somando cada desafio aceito uma única vez"""
+    points = defaultdict(int)
+    accepted_challenges = (
+        _submissions(user_ids, challenge_ids).filter(status='accepted')
+        .values_list('user_id', 'challenge_id', 'challenge__points')
+        .distinct()
+    )
+    for user_id, _challenge_id, challenge_points in accepted_challenges:
+        points[user_id] += challenge_points or 0
+    return points
+
+
+def aggregate_standings(total_challenges, user_ids=None, challenge_ids=None):
+    """
+    {user_id: {campo: valor}} calculado de Submission para os usuários com
+    alguma submissão (todos, ou só os de user_ids), contando só os desafios de
+    challenge_ids se dado (ranking de uma região). Duas consultas, qualquer
+    que seja o número de usuários.
+    """
+    rows = (
+        _submissions(user_ids, challenge_ids)
+        .values('user_id', 'user__username')
+        .annotate(
+            total_attempts=Count('id'),
+            accepted_count=Count('id', filter=ACCEPTED),
+            completed_challenges=Count('challenge_id', filter=ACCEPTED, distinct=True),
+            first_attempt_date=Min('submitted_at'),
+            completion_date=Max('submitted_at', filter=ACCEPTED),
+        )
+    )
+    points = points_by_user(user_ids, challenge_ids)
+
+    standings = {}
+    for row in rows:
+        fields = standings[row['user_id']] = {
+            'total_points': points[row['user_id']],
+            'completed_challenges': row['completed_challenges'],
+            'total_attempts': row['total_attempts'],
+            'accepted_count': row['accepted_count'],
+            'success_rate': success_rate(row['accepted_count'], row['total_attempts']),
+            'first_attempt_date': row['first_attempt_date'],
+            'completion_date': row['completion_date'],
+            'completion_time_days': completion_time_days(
+                row['first_attempt_date'], row['completion_date'], row['completed_challenges'], total_challenges
+            ),
+        }
+        fields['rank_key'] = rank_key(fields, row['user__username'], row['user_id'])
+    return standings
+
+
+def refresh_user_standing(user_id):
+    """
+    Recalcula a linha do usuário. A linha é travada antes de agregar: uma
+    transação concorrente do mesmo usuário espera a trava e agrega já vendo
+    as submissões desta.
+    """
+    with transaction.atomic():
+        standing, _ = UserStanding.objects.select_for_update().get_or_create(user_id=user_id)
+        fields = aggregate_standings(Challenge.objects.count(), [user_id]).get(user_id)
+        if fields is None:
+            standing.delete()  # Nenhuma submissão (apagadas, ou o usuário está sendo apagado)
+            return None
+        for name, value in fields.items():
+            setattr(standing, name, value)
+        standing.save()
+        return standing
+
+
+def update_rank_key(user):
+    """rank_key termina no nome de usuário: renomear muda a chave, não os agregados"""
+    standing = UserStanding.objects.filter(user_id=user.id).first()
+    if standing is None:
+        return
+    fields = {name: getattr(standing, name) for name in STANDING_FIELDS if name != 'rank_key'}
+    key = rank_key(fields, user.username, user.id)
+    if key != standing.rank_key:
+        UserStanding.objects.filter(user_id=user.id).update(rank_key=key)
+
+
+def refresh_standings(user_ids):
+    for user_id in sorted(set(user_ids)):  # Ordem fixa: transações concorrentes travam na mesma ordem
+        refresh_user_standing(user_id)
+
+
+def refresh_completion_times():
+    """
+    Desafio criado ou apagado: o total só entra em completion_time_days, então
+    só muda para quem tinha completado tudo ou completa tudo com o novo total
+    """
+    total_challenges = Challenge.objects.count()
+    refresh_standings(
+        UserStanding.objects.filter(
+            Q(completed_challenges__gte=total_challenges) | ~Q(completion_time_days=NOT_COMPLETED_DAYS)
+        ).values_list('user_id', flat=True)
+    )
+
+
+def _differences(standing, fields):
+    return [name for name in STANDING_FIELDS if getattr(standing, name) != fields[name]]
+
+
+def diff_standings():
+    """
+    Compara a tabela com o recalculado de Submission.
+    Retorna (faltando, divergentes, sobrando, recalculado): {user_id: campos},
+    [(linha, nomes dos campos divergentes)], [linha], {user_id: campos}.
+    """
+    expected = aggregate_standings(Challenge.objects.count())
+    stored = UserStanding.objects.in_bulk()
+    missing = {user_id: fields for user_id, fields in expected.items() if user_id not in stored}
+    mismatched = [
+        (standing, differences)
+        for user_id, standing in stored.items()
+        if user_id in expected and (differences := _differences(standing, expected[user_id]))
+    ]
+    extra = [standing for user_id, standing in stored.items() if user_id not in expected]
+    return missing, mismatched, extra, expected
+
+
+def rebuild_standings():
+    """
+    Recalcula a tabela inteira a partir de Submission, gravando só o que
+    mudou. Retorna (criadas, atualizadas, removidas).
+    """
+    with transaction.atomic():
+        missing, mismatched, extra, expected = diff_standings()
+        UserStanding.objects.bulk_create([
+            UserStanding(user_id=user_id, **fields) for user_id, fields in missing.items()
+        ], batch_size=1000)
+        for standing, _ in mismatched:
+            for name, value in expected[standing.user_id].items():
+                setattr(standing, name, value)
+        UserStanding.objects.bulk_update([standing for standing, _ in mismatched], STANDING_FIELDS, batch_size=1000)
+        UserStanding.objects.filter(user_id__in=[standing.user_id for standing in extra]).delete()
+
+    if missing or mismatched or extra:
+        logger.info(f"[STANDINGS] Rebuilt: {len(missing)} created, {len(mismatched)} updated, {len(extra)} removed")
+    return len(missing), len(mismatched), len(extra)
+
+
+def standing_entry(standing, total_challenges, position=None):
+    """Linha do ranking para o template e a API (mesmos campos de antes da tabela)"""
+    entry = {name: getattr(standing, name) for name in STANDING_FIELDS}
+    entry['user'] = standing.user
+    entry['completion_percentage'] = completion_percentage(standing.completed_challenges, total_challenges)
+    entry['position'] = position
+    return entry
+
+
+def ranked_standings():
+    """Usuários com ao menos um aceite, na ordem do ranking"""
+    return UserStanding.objects.filter(accepted_count__gt=0).select_related('user').order_by('rank_key')
+
+
+def rank_position(standing):
+    """
+    Posição no ranking (1 = primeiro), ou None fora dele: quantos vêm antes
+    pelo índice de rank_key, sem carregar ninguém. Quem tem aceite resolveu
+    algum desafio, então vem antes de todos sem aceite na ordem de rank_key.
+    """
+    if standing is None or standing.accepted_count == 0:
+        return None
+    return UserStanding.objects.filter(rank_key__lt=standing.rank_key).count() + 1
+
+
+def parse_page_size(value):
+    try:
+        return min(max(int(value), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def standings_page(cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Uma página do ranking depois do cursor (o rank_key da última linha da
+    página anterior; None para a primeira). Retorna (linhas, posição da
+    primeira linha, cursor da próxima página ou None).
+    """
+    if cursor and not CURSOR_PATTERN.match(cursor):
+        raise ValueError('Cursor inválido')
+    queryset = ranked_standings()
+    if cursor:
+        queryset = queryset.filter(rank_key__gt=cursor)
+    rows = list(queryset[:page_size + 1])
+    next_cursor = rows[page_size - 1].rank_key if len(rows) > page_size else None
+    rows = rows[:page_size]
+
+    start = 1
+    if cursor and rows:
+        start = UserStanding.objects.filter(rank_key__lt=rows[0].rank_key).count() + 1
+    return rows, start, next_cursor
+
+
+def standings_summary(total_challenges):
+    """Totais do ranking em uma consulta agregada"""
+    summary = UserStanding.objects.filter(accepted_count__gt=0).aggregate(
+        total_users=Count('pk'),
+        completed_users=Count('pk', filter=Q(completed_challenges__gte=total_challenges)),
+        total_points=Sum('total_points'),
+        avg_completed=Avg('completed_challenges'),
+    )
+    return {
+        'total_users': summary['total_users'],
+        'completed_users': summary['completed_users'] if total_challenges else 0,
+        'total_points': summary['total_points'] or 0,
+        'avg_completion_rate': completion_percentage(summary['avg_completed'] or 0, total_challenges),
+    }
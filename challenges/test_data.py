@@ -0,0 +1,289 @@
+# challenges/test_data.py
+#
+# Armazenamento dos casos de teste em arquivos.
+#
+# Entradas e saídas esperadas ficam em disco, endereçadas pelo sha256 do
+# conteúdo (arquivos imutáveis, deduplicados entre desafios):
+#
+#   <TEST_DATA DIR>/<2 primeiros hex>/<sha256>
+#
+# e o desafio indexa os seus em ChallengeTestCase (ordem, hashes, tamanhos).
+# Os casos de Challenge.test_cases (JSON, editados no admin) são sincronizados
+# para o armazenamento a cada save (ou por manage.py test_data sync); casos
+# grandes são importados direto de arquivos (manage.py test_data import) e
+# nunca passam pelo JSON. O diretório precisa ser persistente (TEST_DATA_DIR):
+# os importados não têm outra cópia.
+#
+# A avaliação só lê: usa o índice, sem olhar o JSON nem gravar no
+# armazenamento. Nada é carregado em memória: o stdin do programa é o próprio
+# arquivo de entrada (InputFile, aberto e passado como descritor) e a saída
+# esperada é lida por mmap pelo comparador (challenges/output_compare.py).
+
+import contextlib
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .models import ChallengeTestCase
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20
+STALE_TMP_AGE = 3600  # segundos; temporários mais velhos são de gravações interrompidas
+
+
+class TestDataMissing(Exception):
+    """Um arquivo indexado pelo desafio não está no armazenamento"""
+
+
+def get_test_data_settings():
+    config = settings.CODE_EXECUTION.get('TEST_DATA', {})
+    if not config.get('DIR'):
+        # Sem padrão: um diretório efêmero perderia os casos importados no próximo deploy
+        raise ImproperlyConfigured(
+            "CODE_EXECUTION['TEST_DATA']['DIR'] não configurado: defina TEST_DATA_DIR com um diretório persistente"
+        )
+    return {
+        'dir': Path(config['DIR']),
+    }
+
+
+class TestDataStore:
+    """Arquivos endereçados pelo sha256 do conteúdo; gravação atômica e idempotente"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, digest):
+        return self.root / digest[:2] / digest
+
+    def exists(self, digest):
+        return self.path(digest).exists()
+
+    def _commit(self, tmp_path, digest):
+        target = self.path(digest)
+        if target.exists():
+            os.unlink(tmp_path)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, target)
+        return digest
+
+    def put(self, data):
+        """Grava bytes (ou texto, em UTF-8); retorna (sha256, tamanho)"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.exists(digest):
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=self.root)
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            self._commit(tmp_path, digest)
+        return digest, len(data)
+
+    def put_file(self, source_path):
+        """Copia um arquivo (em blocos, sem carregá-lo inteiro); retorna (sha256, tamanho)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=self.root)
+        try:
+            with open(source_path, 'rb') as source, os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    size += len(chunk)
+                    tmp_file.write(chunk)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self._commit(tmp_path, sha.hexdigest()), size
+
+    def digests(self):
+        for entry in self.root.glob('??/*'):
+            if entry.is_file():
+                yield entry.name
+
+
+def get_test_data_store():
+    return TestDataStore(get_test_data_settings()['dir'])
+
+
+class InputFile:
+    """Entrada de um teste em arquivo: vira o stdin do programa pelo próprio descritor"""
+
+    __slots__ = ('path',)
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def __repr__(self):
+        return f'InputFile({self.path!r})'
+
+
+@contextlib.contextmanager
+def open_stdin(test_input):
+    """Arquivo aberto para ser o stdin do programa: o próprio InputFile ou um temporário com o texto"""
+    if isinstance(test_input, InputFile):
+        with open(test_input.path, 'rb') as stdin_file:
+            yield stdin_file
+        return
+    with tempfile.TemporaryFile() as stdin_file:
+        stdin_file.write(str(test_input).encode('utf-8'))
+        stdin_file.seek(0)
+        yield stdin_file
+
+
+def input_size(test_input):
+    """Tamanho da entrada em bytes, sem lê-la"""
+    if isinstance(test_input, InputFile):
+        return os.path.getsize(test_input.path)
+    return len(str(test_input).encode('utf-8'))
+
+
+def read_input(test_input):
+    """Bytes da entrada (para quem não recebe um descritor, como o pool de JVMs)"""
+    if isinstance(test_input, InputFile):
+        with open(test_input.path, 'rb') as input_file:
+            return input_file.read()
+    return str(test_input).encode('utf-8')
+
+
+class StoredTestCase:
+    """Caso de teste resolvido para a avaliação: caminhos no armazenamento (serializável)"""
+
+    __slots__ = ('input_path', 'output_path', 'input_size', 'output_size')
+
+    def __init__(self, input_path, output_path, input_size=0, output_size=0):
+        self.input_path = str(input_path)
+        self.output_path = str(output_path)
+        self.input_size = input_size
+        self.output_size = output_size
+
+
+def case_input(test_case):
+    """Entrada para backend.run: InputFile para casos armazenados, texto para dicts {input, output}"""
+    if isinstance(test_case, StoredTestCase):
+        return InputFile(test_case.input_path)
+    return str(test_case.get('input', ''))
+
+
+@contextlib.contextmanager
+def expected_output(test_case):
+    """Saída esperada para o comparador: mmap do arquivo armazenado, ou o texto do dict"""
+    if not isinstance(test_case, StoredTestCase):
+        yield test_case.get('output', '')
+        return
+    with open(test_case.output_path, 'rb') as output_file:
+        if os.fstat(output_file.fileno()).st_size == 0:
+            yield b''  # mmap não mapeia arquivos vazios
+            return
+        with mmap.mmap(output_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def load_test_cases(challenge):
+    """
+    Casos de teste do desafio, na ordem de avaliação, lidos só do índice.
+    Levanta TestDataMissing se algum arquivo indexado não estiver no
+    armazenamento (manage.py test_data verify/sync).
+    """
+    store = get_test_data_store()
+    test_cases = []
+    for row in challenge.stored_test_cases.all():
+        input_path, output_path = store.path(row.input_hash), store.path(row.output_hash)
+        if not input_path.exists() or not output_path.exists():
+            raise TestDataMissing(f'Arquivos do caso de teste {row.position} do desafio {challenge.id} não encontrados')
+        test_cases.append(StoredTestCase(input_path, output_path, row.input_size, row.output_size))
+    return test_cases
+
+
+def count_test_cases(challenge):
+    """Quantidade de casos de teste indexados"""
+    return challenge.stored_test_cases.count()
+
+
+def _case_text(test_case, key):
+    return str(test_case.get(key, '')) if isinstance(test_case, dict) else ''
+
+
+def sync_inline_test_cases(challenge):
+    """
+    Grava os casos de Challenge.test_cases no armazenamento e refaz o índice
+    deles (os importados não mudam). Retorna True se o índice mudou.
+    """
+    store = get_test_data_store() if challenge.test_cases else None
+    entries = []
+    for position, test_case in enumerate(challenge.test_cases or [], 1):
+        input_hash, input_size = store.put(_case_text(test_case, 'input'))
+        output_hash, output_size = store.put(_case_text(test_case, 'output'))
+        entries.append(ChallengeTestCase(
+            challenge=challenge, position=position, imported=False,
+            input_hash=input_hash, output_hash=output_hash, input_size=input_size, output_size=output_size,
+        ))
+
+    current = list(challenge.stored_test_cases.filter(imported=False).values_list('input_hash', 'output_hash'))
+    if current == [(entry.input_hash, entry.output_hash) for entry in entries]:
+        return False
+    with transaction.atomic():
+        challenge.stored_test_cases.filter(imported=False).delete()
+        ChallengeTestCase.objects.bulk_create(entries)
+    logger.info(f"[TEST-DATA] Synced {len(entries)} inline test cases of challenge {challenge.id}")
+    return True
+
+
+def import_test_cases(challenge, pairs, replace=False):
+    """
+    Importa casos de arquivos [(entrada, saída esperada)] para o desafio, depois
+    dos já importados (ou no lugar deles, com replace). Retorna as linhas criadas.
+    """
+    store = get_test_data_store()
+    stored = [(store.put_file(input_path), store.put_file(output_path)) for input_path, output_path in pairs]
+
+    with transaction.atomic():
+        existing = challenge.stored_test_cases.filter(imported=True)
+        if replace:
+            existing.delete()
+            start = 0
+        else:
+            start = max(existing.values_list('position', flat=True), default=0)
+        rows = ChallengeTestCase.objects.bulk_create([
+            ChallengeTestCase(
+                challenge=challenge, position=start + offset, imported=True,
+                input_hash=input_hash, output_hash=output_hash, input_size=input_size, output_size=output_size,
+            )
+            for offset, ((input_hash, input_size), (output_hash, output_size)) in enumerate(stored, 1)
+        ])
+    logger.info(f"[TEST-DATA] Imported {len(rows)} test cases into challenge {challenge.id}")
+    return rows
+
+
+def missing_files(rows):
+    """Linhas do índice cujos arquivos não estão no armazenamento"""
+    store = get_test_data_store()
+    return [row for row in rows if not store.exists(row.input_hash) or not store.exists(row.output_hash)]
+
+
+def collect_garbage():
+    """Remove arquivos que nenhum caso de teste indexa; retorna quantos"""
+    store = get_test_data_store()
+    referenced = set(ChallengeTestCase.objects.values_list('input_hash', flat=True))
+    referenced.update(ChallengeTestCase.objects.values_list('output_hash', flat=True))
+    removed = 0
+    for digest in list(store.digests()):
+        if digest not in referenced:
+            store.path(digest).unlink(missing_ok=True)
+            removed += 1
+    for tmp_path in store.root.glob('.tmp_*'):
+        if time.time() - tmp_path.stat().st_mtime > STALE_TMP_AGE:
+            tmp_path.unlink(missing_ok=True)
+    return removed
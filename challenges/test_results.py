@@ -0,0 +1,89 @@
+# challenges/test_results.py
+#
+# Persistência do resultado de cada caso de teste (SubmissionTestResult).
+#
+# Os avaliadores devolvem 'test_results' no formato
+# [{'test_case': i, 'result': {...}}, ...] (só os testes executados, até a
+# primeira falha). Aqui cada resultado vira uma linha compacta — veredito,
+# tempos, memória e hash da saída — gravada com um único bulk_create.
+
+import hashlib
+import logging
+
+from django.db import transaction
+
+from .models import SubmissionTestResult
+
+logger = logging.getLogger(__name__)
+
+# Status dos executores que não são status de Submission
+VERDICT_ALIASES = {
+    'passed': 'accepted',
+    'time_limit_exceeded': 'time_limit',
+    'memory_limit_exceeded': 'memory_limit',
+    'output_limit_exceeded': 'output_limit',
+    'compilation_timeout': 'compilation_error',
+    'execution_error': 'runtime_error',
+    'evaluation_error': 'runtime_error',
+    'test_error': 'runtime_error',
+}
+
+VALID_VERDICTS = {choice for choice, _ in SubmissionTestResult._meta.get_field('verdict').choices}
+
+
+def test_verdict(result):
+    """Veredito de um caso de teste no vocabulário de Submission.status"""
+    if result.get('success'):
+        return 'accepted'
+    verdict = result.get('status') or result.get('error') or 'runtime_error'
+    verdict = VERDICT_ALIASES.get(verdict, verdict)
+    return verdict if verdict in VALID_VERDICTS else 'runtime_error'
+
+
+def output_hash(output):
+    """sha256 truncado da saída normalizada (strip), para comparar execuções sem guardar a saída"""
+    if output is None:
+        return ''
+    return hashlib.sha256(output.strip().encode('utf-8', errors='replace')).hexdigest()[:16]
+
+
+def build_test_result(submission, test_index, result):
+    # Com comparação em fluxo a saída não é guardada; o comparador já calculou o hash
+    digest = result.get('output_hash')
+    if digest is None:
+        output = result.get('output')
+        if output is None:
+            output = result.get('actual_output', result.get('actual'))
+        digest = output_hash(output)
+
+    cpu_time = result.get('cpu_time')
+    peak_memory_kb = result.get('peak_memory_kb')
+    return SubmissionTestResult(
+        submission=submission,
+        test_index=test_index,
+        verdict=test_verdict(result),
+        cpu_time=round(cpu_time, 3) if cpu_time is not None else None,
+        wall_time=round(result.get('execution_time') or 0, 3),
+        peak_memory_kb=int(peak_memory_kb) if peak_memory_kb is not None else None,
+        output_hash=digest,
+    )
+
+
+def record_test_results(submission, test_results):
+    """
+    Substitui os resultados por teste da submissão (uma reavaliação não deixa
+    linhas antigas) com um DELETE e um único INSERT em lote.
+    Falhas aqui nunca alteram o veredito já calculado.
+    """
+    rows = [
+        build_test_result(submission, entry['test_case'], entry['result'])
+        for entry in (test_results or [])
+    ]
+    try:
+        with transaction.atomic():
+            SubmissionTestResult.objects.filter(submission=submission).delete()
+            SubmissionTestResult.objects.bulk_create(rows)
+    except Exception as e:
+        logger.warning(f"[EVAL] Could not record test results for submission {submission.id}: {e}")
+        return []
+    return rows
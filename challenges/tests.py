@@ -1,3 +1,1422 @@
-from django.test import TestCase
+import mmap
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import admission, artifact_cache, jvm_cds, jvm_pool, precompiled_header, python_forkserver
+from .admission import AdmissionCancelled, AdmissionController
+from .artifact_cache import ArtifactCache
+from .checks import check_test_data_dir
+from .execution_engine import ExecutionLimits, evaluate_code
+from .grading_events import GradingProgress, test_result_reporter
+from .java_executor import evaluate_java_submission
+from .language_backends import get_backend
+from .jvm_pool import WorkerCrashed, WorkerUnavailable, worker_pool_enabled
+from .judge_queue import (
+    claim_next_submission, clear_heartbeat, judge_queue_available, queue_position, record_heartbeat,
+    requeue_stale_submissions,
+)
+from .leaderboards import challenge_standings, national_summary, region_standings
+from .python_forkserver import PythonForkServer
+from .rejudge import Checkpoint, apply_batch, run_rejudge
+from .process_runner import program_result, resource_verdict, run_process
+from .shared_cache import cached, invalidate, versioned_key
+from .output_compare import OutputComparator, compare_output
+from .parallel_grading import CancellationToken, run_test_cases
+from .models import (
+    BrazilState, CachedVerdict, Challenge, GradingEvent, JudgeWorkerHeartbeat, ProgrammingLanguage, Submission,
+    SubmissionTestResult, UserStanding,
+)
+from .standings import (
+    diff_standings, rank_position, ranked_standings, ranking_key, rebuild_standings, refresh_user_standing, standing_entry,
+    standings_page,
+)
+from .test_results import record_test_results
+from .test_data import TestDataMissing, get_test_data_store, import_test_cases, load_test_cases
+from .verdict_cache import (
+    cached_evaluation, compute_test_set_version, invalidate_challenge, source_hash, test_set_version,
+)
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def isolate_code_execution(test, **config):
+    """Aponta TEMP_DIR e o armazém de testes para um diretório temporário e zera os singletons derivados deles
+
+    O cache padrão é um FileBasedCache sob o TEMP_DIR real, então o teste usa o LocMemCache.
+    """
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    settings_override = override_settings(CACHES=LOCMEM_CACHE, CODE_EXECUTION={
+        **settings.CODE_EXECUTION, 'TEMP_DIR': Path(directory.name), 'TEST_DATA': {'DIR': Path(directory.name) / 'store'},
+        **config,
+    })
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+    patches = [
+        mock.patch.object(admission, '_controller', None),
+        mock.patch.object(artifact_cache, '_cache', None),
+        mock.patch.object(python_forkserver, '_server', None),
+        mock.patch.dict(jvm_pool._pools, clear=True),
+        mock.patch.dict(jvm_cds._archives, clear=True),
+        mock.patch.dict(precompiled_header._include_dirs, clear=True),
+    ]
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
+
+    def stop_started_server():  # Roda antes de restaurar _server: para o zygote criado pelo teste
+        if python_forkserver._server is not None:
+            python_forkserver._server.stop()
+    test.addCleanup(stop_started_server)
+    return Path(directory.name)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = ProgrammingLanguage.objects.create(name='Python', extension='py')
+        cls.challenges = [
+            Challenge.objects.create(
+                title=f'Desafio {order}', description='', difficulty='easy', points=points,
+                state=BrazilState.objects.create(
+                    name=f'Estado {order}', abbreviation=f'E{order}', map_x_position=0, map_y_position=0, order=order,
+                    region=region,
+                ),
+                language=cls.language, input_description='', output_description='',
+                example_input='', example_output='',
+            )
+            for order, (points, region) in enumerate([(10, 'norte'), (10, 'norte'), (20, 'sul')], 1)
+        ]
+        cls.start = timezone.now() - timedelta(days=30)
+
+    def setUp(self):
+        cache.clear()
+
+    def submit(self, user, challenge, status, days, execution_time=None):
+        return Submission.objects.create(
+            user=user, challenge=challenge, language=self.language, code='', status=status,
+            submitted_at=self.start + timedelta(days=days), execution_time=execution_time,
+        )
+
+    def create_users(self, count, prefix='aluno'):
+        first, second, third = self.challenges
+        for index in range(count):
+            user = User.objects.create_user(f'{prefix}{index:03d}')
+            self.submit(user, first, 'wrong_answer', index % 3)
+            self.submit(user, first, 'accepted', 3)
+            if index % 2:
+                self.submit(user, second, 'accepted', 4 + index % 5)
+                self.submit(user, second, 'accepted', 9)  # Aceito repetido não soma pontos de novo
+            if index % 4 == 3:
+                self.submit(user, third, 'accepted', 10 + index % 7)
+
+    def reference_standings(self, challenges=None):
+        """Cálculo por usuário (o da view antes das consultas agregadas), opcionalmente só com alguns desafios"""
+        challenges = challenges or Challenge.objects.all()
+        total_challenges = len(challenges)
+        rows = []
+        for user in User.objects.filter(submissions__status='accepted', submissions__challenge__in=challenges).distinct():
+            submissions = Submission.objects.filter(user=user, challenge__in=challenges)
+            accepted = submissions.filter(status='accepted')
+            unique_challenges = {s.challenge_id: s.challenge.points or 0 for s in accepted}
+            last_accepted = accepted.order_by('-submitted_at').first()
+            first_submission = submissions.order_by('submitted_at').first()
+            completed = len(unique_challenges)
+            rows.append({
+                'user': user,
+                'total_points': sum(unique_challenges.values()),
+                'completed_challenges': completed,
+                'completion_time_days': (last_accepted.submitted_at - first_submission.submitted_at).days
+                if completed == total_challenges else 999999,
+                'total_attempts': submissions.count(),
+                'success_rate': round(accepted.count() / submissions.count() * 100),
+                'first_attempt_date': first_submission.submitted_at,
+            })
+        rows.sort(key=ranking_key)
+        return rows
+
+    def test_standings_match_per_user_computation(self):
+        self.create_users(24)
+        expected = self.reference_standings()
+        total_challenges = Challenge.objects.count()
+        standings = [standing_entry(standing, total_challenges) for standing in ranked_standings()]
+
+        self.assertEqual([row['user'].username for row in standings], [row['user'].username for row in expected])
+        for row, reference in zip(standings, expected):
+            for field in reference:
+                self.assertEqual(row[field], reference[field], f"{reference['user'].username}: {field}")
+
+    def test_standings_follow_verdicts_and_rebuild(self):
+        self.create_users(6)
+        user = User.objects.get(username='aluno000')
+        pending = self.submit(user, self.challenges[2], 'pending', 20)
+        self.assertEqual(UserStanding.objects.get(user=user).total_attempts, 3)
+
+        pending.status = 'accepted'
+        pending.save()
+        standing = UserStanding.objects.get(user=user)
+        self.assertEqual((standing.total_points, standing.completed_challenges, standing.accepted_count), (30, 2, 2))
+
+        pending.delete()
+        self.assertEqual(UserStanding.objects.get(user=user).total_points, 10)
+        self.assertEqual(diff_standings()[:3], ({}, [], []))
+
+        # Alterações fora dos sinais (update) são encontradas e corrigidas pelo rebuild
+        Submission.objects.filter(user=user, status='wrong_answer').update(status='accepted')
+        UserStanding.objects.filter(user__username='aluno001').delete()
+        missing, mismatched, extra, _ = diff_standings()
+        self.assertEqual(list(missing), [User.objects.get(username='aluno001').id])
+        self.assertEqual([standing.user_id for standing, _ in mismatched], [user.id])
+        self.assertEqual(rebuild_standings(), (1, 1, 0))
+        self.assertEqual(diff_standings()[:3], ({}, [], []))
+
+    def test_standing_refreshed_once_per_verdict(self):
+        user = User.objects.create_user('juiz')
+        with mock.patch('challenges.signals.refresh_user_standing', wraps=refresh_user_standing) as refresh:
+            submission = self.submit(user, self.challenges[0], 'pending', 0)  # Uma tentativa a mais
+            submission.status = 'running'
+            submission.save()
+            submission.status = 'wrong_answer'
+            submission.save()
+            submission.result_data, submission.judged_at = {'success': False}, timezone.now()
+            submission.save()  # Como o fim da avaliação em views: o veredito já foi contado
+            self.assertEqual(refresh.call_count, 2)
+
+            loaded = Submission.objects.get(pk=submission.pk)
+            loaded.save()
+            loaded.status = 'accepted'
+            loaded.save(update_fields=['result_data'])  # Status não gravado
+            self.assertEqual(refresh.call_count, 2)
+            loaded.save(update_fields=['status'])
+            self.assertEqual(refresh.call_count, 3)
+        self.assertEqual(UserStanding.objects.get(user=user).total_points, 10)
+
+    def test_challenge_create_and_delete_refresh_only_completion_times(self):
+        self.create_users(12)  # aluno003, aluno007 e aluno011 resolveram os três
+        completers = set(UserStanding.objects.exclude(completion_time_days=999999).values_list('user_id', flat=True))
+        self.assertEqual(len(completers), 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            extra = Challenge.objects.create(
+                title='Desafio 4', description='', difficulty='easy', points=5,
+                state=BrazilState.objects.create(
+                    name='Estado 4', abbreviation='E4', map_x_position=0, map_y_position=0, order=4, region='sul',
+                ),
+                language=self.language, input_description='', output_description='',
+                example_input='', example_output='',
+            )
+        self.assertEqual(diff_standings()[:3], ({}, [], []))
+        self.assertFalse(UserStanding.objects.exclude(completion_time_days=999999).exists())
+        # Só as linhas de quem tinha completado tudo são regravadas (não um rebuild das 12)
+        updated = [query for query in queries if query['sql'].startswith('UPDATE "challenges_userstanding"')]
+        self.assertEqual(len(updated), len(completers))
+
+        self.challenges[2].delete()
+        self.assertEqual(diff_standings()[:3], ({}, [], []))
+        extra.delete()
+        self.assertEqual(diff_standings()[:3], ({}, [], []))
+        self.assertEqual(
+            UserStanding.objects.exclude(completion_time_days=999999).count(),
+            UserStanding.objects.filter(completed_challenges=2).count(),
+        )
+
+    def test_rank_key_orders_like_tie_breakers(self):
+        self.create_users(3)
+        # Mesmos números: decide o nome, sem diferenciar maiúsculas; prefixo vem antes
+        for username in ('Bia', 'bi', 'bianca', 'bia_2', 'Bía'):
+            user = User.objects.create_user(username)
+            self.submit(user, self.challenges[0], 'accepted', 5)
+        standings = list(ranked_standings())
+        entries = [standing_entry(standing, 3) for standing in standings]
+        self.assertEqual(entries, sorted(entries, key=ranking_key))
+        self.assertEqual(
+            [standing.user.username for standing in standings if standing.user.username.lower().startswith('b')],
+            ['bi', 'Bia', 'bia_2', 'bianca', 'Bía'],
+        )
+
+    def test_pages_and_positions_match_full_ranking(self):
+        self.create_users(23)
+        expected = [standing.user.username for standing in ranked_standings()]
+
+        seen, cursor = [], None
+        while True:
+            rows, start, cursor = standings_page(cursor, page_size=5)
+            self.assertEqual(start, len(seen) + 1)
+            seen.extend(standing.user.username for standing in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+        for position, standing in enumerate(ranked_standings(), 1):
+            self.assertEqual(rank_position(standing), position)
+        self.assertIsNone(rank_position(None))
+        with self.assertRaises(ValueError):
+            standings_page("x' OR 1=1")
+
+    def test_leaderboard_api(self):
+        self.create_users(8)
+        viewer = User.objects.get(username='aluno004')
+        self.client.force_login(viewer)
+
+        first = self.client.get(reverse('leaderboard-api'), {'page_size': 3}).json()
+        second = self.client.get(reverse('leaderboard-api'), {'page_size': 3, 'cursor': first['next_cursor']}).json()
+        ranking = [standing.user.username for standing in ranked_standings()]
+
+        self.assertEqual([row['username'] for row in first['results'] + second['results']], ranking[:6])
+        self.assertEqual([row['position'] for row in second['results']], [4, 5, 6])
+        self.assertEqual(first['total_users'], 8)
+        self.assertEqual(first['me']['position'], ranking.index('aluno004') + 1)
+        self.assertEqual(self.client.get(reverse('leaderboard-api'), {'cursor': '!'}).status_code, 400)
+
+    def test_region_standings_use_only_region_challenges(self):
+        self.create_users(12)
+        north = [challenge for challenge in self.challenges if challenge.state.region == 'norte']
+        expected = self.reference_standings(north)
+        entries = region_standings('norte')['entries']
+
+        self.assertEqual([entry['user'].username for entry in entries], [row['user'].username for row in expected])
+        for entry, reference in zip(entries, expected):
+            for field in reference:
+                self.assertEqual(entry[field], reference[field], f"{reference['user'].username}: {field}")
+        self.assertEqual(region_standings('sul')['summary']['total_users'], 3)
+        self.assertEqual(region_standings('nordeste')['entries'], [])
+
+    def test_region_and_challenge_caches_invalidated_on_accept(self):
+        self.create_users(2)
+        first = self.challenges[0]
+        user = User.objects.get(username='aluno000')
+        self.assertEqual(challenge_standings(first.id)['entries'], [])  # Aceites sem tempo medido
+        north_users = region_standings('norte')['summary']['total_users']
+
+        with CaptureQueriesContext(connection) as cached:
+            region_standings('norte')
+            challenge_standings(first.id)
+        self.assertEqual(len(cached), 0)
+
+        newcomer = User.objects.create_user('novato')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(newcomer, first, 'accepted', 1, execution_time=12.5)
+            self.submit(user, first, 'accepted', 2, execution_time=30.0)
+        self.assertEqual(region_standings('norte')['summary']['total_users'], north_users + 1)
+        self.assertEqual(
+            [(entry['user'].username, entry['best_time']) for entry in challenge_standings(first.id)['entries']],
+            [('novato', 12.5), ('aluno000', 30.0)],
+        )
+
+        response = self.client.get(reverse('region-leaderboard', args=['norte']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('region-leaderboard', args=['atlantida'])).status_code, 404)
+        response = self.client.get(reverse('challenge-leaderboard', args=[first.id]))
+        self.assertContains(response, 'novato')
+
+    def test_leaderboard_query_count_does_not_grow_with_users(self):
+        self.create_users(5)
+        viewer = User.objects.get(username='aluno003')
+        self.client.force_login(viewer)
+
+        with CaptureQueriesContext(connection) as few_users:
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user_stats']['position'], 1)
+
+        self.create_users(40, prefix='outro')
+        cache.clear()  # Mesmas consultas de totais, sem vir do cache
+        with CaptureQueriesContext(connection) as many_users:
+            response = self.client.get(reverse('leaderboard'))
+        self.assertEqual(len(response.context['users']), 45)
+
+        # Consultas fixas (sessão, usuário, contagens e a classificação), nenhuma por usuário
+        self.assertLessEqual(len(few_users), 12)
+        self.assertEqual(len(many_users), len(few_users))
+
+    def test_national_summary_cached_until_verdict(self):
+        self.create_users(3)
+        total_users = national_summary()['total_users']
+        with CaptureQueriesContext(connection) as cached_summary:
+            national_summary()
+        self.assertEqual(len(cached_summary), 0)
+
+        pending = self.submit(User.objects.create_user('novato'), self.challenges[0], 'pending', 1)
+        self.assertEqual(national_summary()['total_users'], total_users)
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.status = 'accepted'
+            pending.save()
+        self.assertEqual(national_summary()['total_users'], total_users + 1)
+
+
+class SharedCacheTests(TestCase):
+    """Dois workers = duas instâncias do backend sobre o mesmo diretório"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.other_worker = FileBasedCache(directory.name, {})
+
+    def test_invalidation_seen_by_other_worker(self):
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return {'total': len(computed)}
+
+        self.assertEqual(cached('standings', 'summary', compute, 60), {'total': 1})
+        self.assertEqual(self.other_worker.get(versioned_key('standings', 'summary')), {'total': 1})
+
+        # Invalidado pelo outro worker: a versão nova vale para este também
+        self.other_worker.set('namespace-version:standings', 1, None)
+        self.assertEqual(cached('standings', 'summary', compute, 60), {'total': 2})
+
+        invalidate('standings')
+        version_key = versioned_key('standings', 'summary')
+        self.assertIsNone(self.other_worker.get(version_key))
+        self.assertEqual(cached('standings', 'summary', compute, 60), {'total': 3})
+        self.assertEqual(self.other_worker.get(version_key), {'total': 3})
+        self.assertEqual(cached('map', 'states', compute, 60), {'total': 4})  # Namespaces independentes
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CODE_EXECUTION={
+    **settings.CODE_EXECUTION, 'JUDGE_QUEUE': {'ENABLED': True, 'HEARTBEAT_TIMEOUT': 60, 'STALE_AFTER': 300, 'MAX_ATTEMPTS': 3},
+})
+class JudgeQueueTests(TestCase):
+    def setUp(self):
+        isolate_code_execution(self)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.language = ProgrammingLanguage.objects.create(name='Python', extension='py')
+        cls.challenge = Challenge.objects.create(
+            title='Fila', description='', difficulty='easy', points=10,
+            state=BrazilState.objects.create(name='Estado', abbreviation='ES', map_x_position=0, map_y_position=0, order=1),
+            language=cls.language, input_description='', output_description='', example_input='', example_output='',
+        )
+        cls.user = User.objects.create_user('aluno')
+        cls.start = timezone.now() - timedelta(hours=1)
+
+    def submit(self, minutes, status='pending', **fields):
+        return Submission.objects.create(
+            user=self.user, challenge=self.challenge, language=self.language, code='', status=status,
+            submitted_at=self.start + timedelta(minutes=minutes), **fields,
+        )
+
+    def test_claims_oldest_pending_submission_once(self):
+        newest, oldest, middle = self.submit(3), self.submit(1), self.submit(2)
+        self.submit(0, status='accepted')
+
+        claimed = [claim_next_submission(f'host:judge-{i}') for i in range(4)]
+        self.assertEqual([submission and submission.pk for submission in claimed], [oldest.pk, middle.pk, newest.pk, None])
+        oldest.refresh_from_db()
+        self.assertEqual((oldest.status, oldest.claimed_by, oldest.attempts), ('running', 'host:judge-0', 1))
+        self.assertIsNotNone(oldest.claimed_at)
+        self.assertEqual(queue_position(self.submit(4)), 0)
+
+    def test_stale_submissions_requeued_until_max_attempts(self):
+        stale_at = timezone.now() - timedelta(seconds=301)
+        retry = self.submit(1, status='running', claimed_at=stale_at, claimed_by='host:morto', attempts=2)
+        exhausted = self.submit(2, status='running', claimed_at=stale_at, claimed_by='host:morto', attempts=3)
+        alive = self.submit(3, status='running', claimed_at=timezone.now(), claimed_by='host:vivo', attempts=1)
+
+        self.assertEqual(requeue_stale_submissions(), (1, 1))
+        for submission in (retry, exhausted, alive):
+            submission.refresh_from_db()
+        self.assertEqual((retry.status, retry.claimed_by, retry.claimed_at), ('pending', '', None))
+        self.assertEqual(exhausted.status, 'runtime_error')
+        self.assertIsNotNone(exhausted.judged_at)
+        self.assertEqual(alive.status, 'running')
+
+        claimed = claim_next_submission('host:judge-1')
+        self.assertEqual((claimed.pk, claimed.attempts), (retry.pk, 3))  # Última tentativa
+        self.assertEqual(requeue_stale_submissions(), (0, 0))
+
+    def test_queue_used_only_with_live_worker(self):
+        self.assertFalse(judge_queue_available())  # Sem worker: a view avalia na requisição
+
+        record_heartbeat('host:judge-1')
+        self.assertTrue(judge_queue_available())
+
+        JudgeWorkerHeartbeat.objects.update(last_seen=timezone.now() - timedelta(seconds=61))
+        self.assertFalse(judge_queue_available())
+
+        record_heartbeat('host:judge-1')
+        clear_heartbeat('host:judge-1')  # Encerrado normalmente
+        self.assertFalse(judge_queue_available())
+
+
+class TestDataTests(TestCase):
+    def setUp(self):
+        self.directory = isolate_code_execution(self, VERDICT_CACHE={})
+        self.java = ProgrammingLanguage.objects.create(name='Java', extension='java')
+        self.challenge = Challenge.objects.create(
+            title='Importado', description='', difficulty='easy', points=10,
+            state=BrazilState.objects.create(name='Estado', abbreviation='ES', map_x_position=0, map_y_position=0, order=1),
+            language=self.java, input_description='', output_description='', example_input='', example_output='',
+        )
+        self.user = User.objects.create_user('aluno')
+
+    def test_java_submission_with_only_imported_test_cases(self):
+        submission = Submission.objects.create(
+            user=self.user, challenge=self.challenge, language=self.java, code='public class Main {}',
+        )
+        self.assertEqual(evaluate_java_submission(submission)['status'], 'evaluation_error')
+
+        (self.directory / '1.in').write_text('1 2\n')
+        (self.directory / '1.out').write_text('3\n')
+        import_test_cases(self.challenge, [(self.directory / '1.in', self.directory / '1.out')])
+        self.assertNotEqual(evaluate_java_submission(submission)['status'], 'evaluation_error')
+
+    def test_grading_reads_only_the_index(self):
+        self.challenge.test_cases = [{'input': '1 2', 'output': '3'}, {'input': '2 2', 'output': '4'}]
+        self.challenge.save()
+        version = self.challenge.test_set_version
+        self.assertEqual(version, compute_test_set_version(self.challenge))
+
+        challenge = Challenge.objects.defer('test_cases').get(pk=self.challenge.pk)
+        with mock.patch('challenges.test_data.TestDataStore.put', side_effect=AssertionError), \
+                self.assertNumQueries(1):
+            test_cases = load_test_cases(challenge)
+            self.assertEqual(test_set_version(challenge), version)  # Gravada no desafio, não recalculada
+        self.assertEqual([Path(case.output_path).read_text() for case in test_cases], ['3', '4'])
+        self.assertNotIn('test_cases', challenge.__dict__)
+
+        # Arquivo perdido: erro explícito, sem regravar na avaliação
+        Path(test_cases[0].output_path).unlink()
+        with self.assertRaises(TestDataMissing):
+            load_test_cases(challenge)
+
+    def test_version_refreshed_on_import_and_edit(self):
+        versions = [self.challenge.test_set_version]
+        (self.directory / '1.in').write_text('1 2\n')
+        (self.directory / '1.out').write_text('3\n')
+        import_test_cases(self.challenge, [(self.directory / '1.in', self.directory / '1.out')])
+        invalidate_challenge(self.challenge)  # Como o manage.py test_data import
+        versions.append(Challenge.objects.get(pk=self.challenge.pk).test_set_version)
+        self.challenge.time_limit = 2000
+        self.challenge.save()
+        versions.append(Challenge.objects.get(pk=self.challenge.pk).test_set_version)
+        self.assertEqual(len(set(versions)), 3)
+        self.assertEqual(versions[-1], compute_test_set_version(self.challenge))
+
+    def test_store_directory_is_required(self):
+        with override_settings(CODE_EXECUTION={**settings.CODE_EXECUTION, 'TEST_DATA': {}}):
+            with self.assertRaises(ImproperlyConfigured):
+                load_test_cases(self.challenge)
+            self.assertEqual([error.id for error in check_test_data_dir(None)], ['challenges.E001'])
+        self.assertEqual(check_test_data_dir(None), [])
+
+
+def compare_in_chunks(expected, actual, mode='exact', tolerance=None, size=1):
+    """Saída entregue ao comparador em blocos de size bytes (como a captura faz)"""
+    comparator = OutputComparator(expected, mode, tolerance)
+    data = actual.encode('utf-8')
+    for start in range(0, len(data), size):
+        if not comparator.feed(data[start:start + size]):
+            break
+    return comparator.finish(), comparator
+
+
+class OutputCompareTests(SimpleTestCase):
+    def test_exact_ignores_only_surrounding_whitespace(self):
+        self.assertIsNone(compare_output('1 2\n3\n', '\n  1 2\n3  \n\n'))
+        mismatch = compare_output('1 2\n3\n', '1 2\n4\n')
+        self.assertEqual((mismatch.line, mismatch.column, mismatch.expected, mismatch.actual), (2, 1, '3', '4\n'))
+        self.assertEqual(compare_output('1  2', '1 2').column, 3)
+        self.assertEqual(compare_output('1 2', '1 2 3').actual, '3')
+        self.assertEqual(compare_output('1 2 3', '1 2').actual, '')
+
+    def test_tokens_ignore_spacing(self):
+        self.assertIsNone(compare_output('1 2\n3', '1\t2 3\n', mode='tokens'))
+        self.assertEqual(compare_output('1 2 3', '1 2', mode='tokens').expected, '3')
+        self.assertEqual(compare_output('1 2', '1 2 3', mode='tokens').actual, '3')
+        mismatch = compare_output('ab cd', 'ab\ncx', mode='tokens')
+        self.assertEqual((mismatch.line, mismatch.column, mismatch.expected, mismatch.actual), (2, 1, 'cd', 'cx'))
+
+    def test_float_tolerance(self):
+        self.assertIsNone(compare_output('3.14159 x', '3.1416 x', mode='float', tolerance=1e-4))
+        self.assertIsNotNone(compare_output('3.14159', '3.1416', mode='float'))
+        self.assertIsNone(compare_output('1000000', '1000000.5', mode='float', tolerance=1e-6))  # Relativa
+        self.assertIsNotNone(compare_output('1.0 x', '1.0 y', mode='float', tolerance=1))
+        self.assertIsNotNone(compare_output('1.0', 'nan', mode='float', tolerance=1))
+        self.assertIsNotNone(compare_output('3,14', '3.14', mode='float', tolerance=1))
+
+    def test_chunk_boundaries_do_not_change_the_result(self):
+        cases = [
+            ('exact', 'olá mundo\n12 345\n', 'olá mundo\n12 345\n'),
+            ('exact', 'olá mundo\n12 345\n', 'olá mundo\n12 346\n'),
+            ('exact', 'ação', '  ação  \n'),
+            ('tokens', '123 456\nç', '123   456 ç'),
+            ('tokens', '123 456', '12 3456'),
+            ('float', '0.333333 2', '0.3333333333 2.0000001'),
+            ('float', '0.333333 2', '0.3334 2'),
+        ]
+        for mode, expected, actual in cases:
+            whole, comparator = compare_in_chunks(expected, actual, mode, size=len(actual.encode('utf-8')))
+            for size in (1, 2, 3, 5):
+                with self.subTest(mode=mode, actual=actual, size=size):
+                    chunked, chunked_comparator = compare_in_chunks(expected, actual, mode, size=size)
+                    # O trecho obtido é o resto do bloco em que a diferença apareceu
+                    self.assertEqual(
+                        chunked and (chunked.line, chunked.column, chunked.expected, chunked.actual[:1]),
+                        whole and (whole.line, whole.column, whole.expected, whole.actual[:1]),
+                    )
+                    if whole is None:
+                        self.assertEqual(chunked_comparator.output_hash, comparator.output_hash)
+
+    def test_expected_output_from_mmap(self):
+        with tempfile.TemporaryFile() as expected_file:
+            expected_file.write('1 2 3\n'.encode('utf-8') * 1000)
+            expected_file.flush()
+            with mmap.mmap(expected_file.fileno(), 0, access=mmap.ACCESS_READ) as expected:
+                self.assertIsNone(compare_in_chunks(expected, '1 2 3\n' * 1000, size=4096)[0])
+                self.assertEqual(compare_in_chunks(expected, '1 2 3\n' * 999 + '1 2 4\n', size=7)[0].line, 1000)
+
+
+@override_settings(CODE_EXECUTION={**settings.CODE_EXECUTION, 'PYTHON': {'FORK_SERVER': {'ENABLED': False}}})
+class ProcessRunnerTests(SimpleTestCase):
+    def setUp(self):
+        isolate_code_execution(self)
+
+    def run_python(self, code, time_limit_ms=1000, memory_limit_mb=0, wall_limit_ms=None, test_input=''):
+        run = run_process([sys.executable, '-c', code], test_input, time_limit_ms, memory_limit_mb, wall_limit_ms)
+        return run, program_result(run, time_limit_ms, memory_limit_mb)
+
+    def test_accepted_run_reports_usage(self):
+        run, result = self.run_python('print(sum(map(int, input().split())))', test_input='2 3\n')
+        self.assertTrue(result['success'])
+        self.assertEqual(result['output'], '5\n')
+        self.assertGreater(result['cpu_time'], 0)
+        self.assertLess(result['cpu_time'], 1000)
+
+    def test_time_limit_from_cpu_time(self):
+        run, result = self.run_python('while True: pass', time_limit_ms=300)
+        self.assertEqual(result['status'], 'time_limit')
+        self.assertGreater(run['cpu_time'], 300)
+        self.assertFalse(run['timed_out'])  # Pelo RLIMIT_CPU/rusage, não pelo relógio
+
+    def test_time_limit_from_wall_clock(self):
+        run, result = self.run_python('import time; time.sleep(10)', time_limit_ms=200, wall_limit_ms=500)
+        self.assertEqual(result['status'], 'time_limit')
+        self.assertTrue(run['timed_out'])
+        self.assertLess(run['wall_time'], 5000)
+
+    def test_memory_limit(self):
+        _, result = self.run_python('data = bytearray(512 * 1024 * 1024)', memory_limit_mb=128)
+        self.assertEqual(result['status'], 'memory_limit')
+
+    def test_output_limit_kills_the_child(self):
+        with override_settings(CODE_EXECUTION={**settings.CODE_EXECUTION, 'MAX_OUTPUT_SIZE': 4096}):
+            run, result = self.run_python('while True: print("x" * 100)', time_limit_ms=5000, wall_limit_ms=10000)
+        self.assertEqual(result['status'], 'output_limit')
+        self.assertEqual(run['signal'], signal.SIGKILL)
+        self.assertFalse(run['timed_out'])
+        self.assertLess(run['wall_time'], 5000)
+        self.assertLessEqual(len(run['stdout']), 4096)
+
+    def test_runtime_error(self):
+        _, result = self.run_python('print("antes"); 1 / 0')
+        self.assertEqual(result['status'], 'runtime_error')
+        self.assertIn('ZeroDivisionError', result['message'])
+        _, result = self.run_python('import sys; sys.exit(3)')
+        self.assertEqual(result['status'], 'runtime_error')
+
+    def test_verdict_precedence(self):
+        run = {'output_limit_exceeded': False, 'timed_out': False, 'cpu_time': 50, 'signal': None,
+               'max_rss_kb': 300 * 1024, 'exit_code': 0, 'stderr': ''}
+        self.assertEqual(resource_verdict(run, 1000, 256), 'memory_limit')
+        self.assertIsNone(resource_verdict(run, 1000, 256, check_rss=False))  # JVM: RSS inclui a máquina virtual
+        self.assertEqual(resource_verdict(dict(run, cpu_time=1500), 1000, 256), 'time_limit')
+        self.assertEqual(resource_verdict(dict(run, cpu_time=1500, output_limit_exceeded=True), 1000, 256), 'output_limit')
+        self.assertEqual(resource_verdict(dict(run, signal=signal.SIGXCPU, cpu_time=10), 1000), 'time_limit')
+
+
+class ForkServerTests(SimpleTestCase):
+    def setUp(self):
+        isolate_code_execution(
+            self, ADMISSION={'ENABLED': False}, PARALLEL_GRADING={'ENABLED': False},
+            PYTHON={**settings.CODE_EXECUTION['PYTHON'], 'FORK_SERVER': {'ENABLED': True}},
+        )
+        self.server = PythonForkServer(sys.executable)
+        self.addCleanup(self.server.stop)
+        server_patch = mock.patch('challenges.python_forkserver.get_fork_server', return_value=self.server)
+        server_patch.start()
+        self.addCleanup(server_patch.stop)
+
+    def evaluate(self, code):
+        return evaluate_code('python', code, [{'input': '', 'output': 'ok\n'}], ExecutionLimits(2000, 256))
+
+    def test_runs_in_the_zygote(self):
+        self.assertEqual(self.evaluate('print("ok")')['status'], 'accepted')
+        self.assertIsNotNone(self.server.process)
+
+    def test_unavailable_zygote_falls_back_to_subprocess(self):
+        broken = PythonForkServer(os.path.join(tempfile.gettempdir(), 'sem-python'))
+        self.addCleanup(broken.stop)
+        with mock.patch('challenges.python_forkserver.get_fork_server', return_value=broken):
+            # No subprocess o pai do programa é o próprio teste
+            result = self.evaluate(f'import os\nprint("ok" if os.getppid() == {os.getpid()} else "zigoto")')
+        self.assertEqual(result['status'], 'accepted')
+        self.assertIsNone(broken.process)
+
+    def test_output_limit_kills_the_child(self):
+        with override_settings(CODE_EXECUTION={**settings.CODE_EXECUTION, 'MAX_OUTPUT_SIZE': 4096}):
+            result = self.evaluate('while True: print("x" * 100)')
+        self.assertEqual(result['status'], 'output_limit')
+        self.assertLess(result['test_results'][0]['result']['execution_time'], 2000)
+
+    def test_failure_after_output_is_a_judge_error(self):
+        # O monitor morre depois de a saída ir para o comparador; no subprocess o pai é o teste
+        result = self.evaluate(
+            'import os, signal, sys\nprint("ok")\nsys.stdout.flush()\n'
+            f'if os.getppid() != {os.getpid()}:\n    os.kill(os.getppid(), signal.SIGKILL)\n'
+        )
+        self.assertEqual(result['status'], 'runtime_error')
+        self.assertTrue(result['judge_error'])
+
+
+class ParallelGradingTests(SimpleTestCase):
+    def setUp(self):
+        isolate_code_execution(self)
+
+    def fake_run(self, outcomes, killed):
+        """run_one simulado: outcomes[i - 1] = (duração em s, passou); testes cancelados param cedo"""
+        def run_one(index, test_case, cancel_token):
+            process = mock.Mock(kill=lambda: killed.append(index))
+            cancel_token.attach(process)
+            deadline = time.monotonic() + outcomes[index - 1][0]
+            while time.monotonic() < deadline and not cancel_token.cancelled:
+                time.sleep(0.005)
+            cancel_token.detach(process)
+            return {'success': outcomes[index - 1][1], 'test_case': index}
+        return run_one
+
+    def test_fail_fast_reports_the_same_failure_as_sequential(self):
+        scenarios = [
+            [(0.01, True)] * 6,
+            [(0.05, True), (0.2, False), (0.01, False), (0.5, True)],  # Falha posterior termina antes
+            [(0.2, False), (0.01, True), (0.01, False), (2, True)],
+            [(0.01, True), (0.01, True), (0.01, True), (0.1, False)],
+        ]
+        for outcomes in scenarios:
+            with self.subTest(outcomes=outcomes):
+                sequential = run_test_cases(outcomes, self.fake_run(outcomes, []))
+                killed = []
+                start = time.monotonic()
+                parallel = run_test_cases(outcomes, self.fake_run(outcomes, killed), max_workers=4)
+                self.assertEqual(parallel, sequential)
+                self.assertLess(time.monotonic() - start, 1.5)  # O teste de 2s é cancelado
+                if sequential[1]:
+                    self.assertTrue(all(index > sequential[1] for index in killed))
+
+    def test_on_result_never_reports_tests_after_the_failure(self):
+        outcomes = [(0.1, True), (0.01, False), (1, True), (1, False)]
+        reported = []
+        lock = threading.Lock()
+
+        def on_result(index, result):
+            with lock:
+                reported.append(index)
+
+        _, failed = run_test_cases(outcomes, self.fake_run(outcomes, []), max_workers=4, on_result=on_result)
+        self.assertEqual(failed, 2)
+        self.assertEqual(sorted(reported), [1, 2])
+
+    def test_engine_verdict_matches_sequential(self):
+        code = 'n = int(input())\nprint(n * 2 if n != 3 else -1)\n'
+        test_cases = [{'input': f'{n}\n', 'output': f'{n * 2}\n'} for n in range(1, 7)]
+        limits = ExecutionLimits(2000, 256)
+
+        def evaluate(enabled):
+            with override_settings(CODE_EXECUTION={
+                **settings.CODE_EXECUTION, 'ADMISSION': {'ENABLED': False},
+                'PYTHON': {**settings.CODE_EXECUTION['PYTHON'], 'FORK_SERVER': {'ENABLED': False}},
+                'PARALLEL_GRADING': {'ENABLED': enabled, 'MAX_WORKERS': 4},
+            }), mock.patch('challenges.parallel_grading.available_cores', return_value=4):
+                return evaluate_code('python', code, test_cases, limits)
+
+        sequential, parallel = evaluate(False), evaluate(True)
+        for key in ('status', 'message', 'failed_test_case', 'passed_tests', 'line', 'column', 'expected'):
+            self.assertEqual(parallel.get(key), sequential.get(key), key)
+        self.assertEqual(sequential['failed_test_case'], 3)
+        self.assertEqual(len(parallel['test_results']), 3)
+
+
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.controller = AdmissionController(
+            directory.name, run_slots=2, compile_slots=1, memory_units=2, memory_unit_mb=64, poll_interval=0.005,
+        )
+        self.admitted = []
+
+    def enqueue(self, label, kind='run', memory_mb=0, cancel_token=None):
+        """Entra na fila em uma thread e espera o arquivo da fila aparecer (a ordem de chegada fica definida)"""
+        queued = len(self.controller._queue_entries(kind))
+
+        def wait_turn():
+            try:
+                with self.controller.admit(kind, memory_mb, cancel_token):
+                    self.admitted.append(label)
+            except AdmissionCancelled:
+                self.admitted.append(f'{label} cancelado')
+
+        thread = threading.Thread(target=wait_turn)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        while len(self.controller._queue_entries(kind)) == queued:
+            time.sleep(0.001)
+        return thread
+
+    def test_waiting_requests_admitted_in_arrival_order(self):
+        holder = self.controller.acquire('compile')
+        threads = [self.enqueue(label, kind='compile') for label in 'abcde']
+        self.assertEqual(self.admitted, [])
+        self.assertEqual(self.controller.status()['compile']['queue_depth'], 5)
+        self.controller.release(holder)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(self.admitted, list('abcde'))
+
+    def test_later_small_request_does_not_overtake_the_head(self):
+        holder = self.controller.acquire('run', memory_mb=64)
+        large = self.enqueue('grande', memory_mb=128)
+        small = self.enqueue('pequeno', memory_mb=64)  # Caberia agora, mas não é o primeiro da fila
+        time.sleep(0.05)
+        self.assertEqual(self.admitted, [])
+        self.controller.release(holder)
+        large.join(5)
+        small.join(5)
+        self.assertEqual(self.admitted, ['grande', 'pequeno'])
+
+    def test_cancelled_request_leaves_the_queue(self):
+        holder = self.controller.acquire('compile')
+        token = CancellationToken()
+        cancelled = self.enqueue('a', kind='compile', cancel_token=token)
+        waiting = self.enqueue('b', kind='compile')
+        token.cancel()
+        cancelled.join(5)
+        self.assertEqual(self.admitted, ['a cancelado'])
+        self.controller.release(holder)
+        waiting.join(5)
+        self.assertEqual(self.admitted, ['a cancelado', 'b'])
+        self.assertEqual(self.controller._queue_entries('compile'), [])
+
+
+class ArtifactCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.work_dir = self.directory / 'work'
+        self.work_dir.mkdir()
+        # Cabem três entradas de 1000 bytes (+ meta.json)
+        self.cache = ArtifactCache(self.directory / 'cache', max_bytes=3 * 1200)
+
+    def store(self, name, age):
+        """Grava uma entrada com um binário de 1000 bytes, usada pela última vez há age segundos"""
+        key = self.cache.make_key('c', 'gcc 12', ['-O2'], 'main.c', name)
+        (self.work_dir / 'main').write_bytes(name.encode('utf-8') * (1000 // len(name)))
+        self.cache.store(key, {'success': True, 'output': ''}, self.work_dir, ['main'])
+        entry_dir = self.cache._entry_dir(key)
+        if entry_dir.exists():
+            os.utime(entry_dir, (time.time() - age, time.time() - age))
+        return key
+
+    def fetch(self, key):
+        dest_dir = tempfile.mkdtemp(dir=self.directory)
+        meta = self.cache.fetch(key, dest_dir)
+        return meta and (Path(dest_dir) / 'main').read_bytes()
+
+    def test_least_recently_used_entry_evicted_first(self):
+        keys = {name: self.store(name, age) for name, age in (('a', 300), ('b', 200), ('c', 100))}
+        self.assertEqual(self.fetch(keys['a']), b'a' * 1000)  # a passa a ser o mais recente
+
+        keys['d'] = self.store('d', 0)
+        self.assertIsNone(self.fetch(keys['b']))
+        for name in 'acd':
+            self.assertEqual(self.fetch(keys[name]), name.encode('utf-8') * 1000, name)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 3)
+        self.assertLessEqual(stats['size_bytes'], self.cache.max_bytes)
+        self.assertEqual((stats['hits'], stats['misses']), (4, 1))
+
+    def test_key_covers_toolchain_flags_and_source(self):
+        key = ArtifactCache.make_key('c', 'gcc 12', ['-O2'], 'main.c', 'int main(){}')
+        self.assertEqual(key, ArtifactCache.make_key('c', 'gcc 12', ['-O2'], 'main.c', b'int main(){}'))
+        for other in (
+            ('c', 'gcc 13', ['-O2'], 'main.c', 'int main(){}'),
+            ('c', 'gcc 12', ['-O0'], 'main.c', 'int main(){}'),
+            ('c', 'gcc 12', ['-O2'], 'main.c', 'int main(){ }'),
+            ('cpp', 'gcc 12', ['-O2'], 'main.c', 'int main(){}'),
+        ):
+            self.assertNotEqual(ArtifactCache.make_key(*other), key, other)
+
+    def test_fetched_artifact_is_a_private_copy(self):
+        key = self.store('a', 0)
+        dest_dir = tempfile.mkdtemp(dir=self.directory)
+        self.cache.fetch(key, dest_dir)
+        (Path(dest_dir) / 'main').write_bytes(b'alterado')
+        self.assertEqual(self.fetch(key), b'a' * 1000)
+
+
+class VerdictCacheTests(TestCase):
+    def setUp(self):
+        isolate_code_execution(self, VERDICT_CACHE={'ENABLED': True})
+        self.python = ProgrammingLanguage.objects.create(name='Python', extension='py')
+        self.challenge = Challenge.objects.create(
+            title='Soma', description='', difficulty='easy', points=10,
+            state=BrazilState.objects.create(name='Estado', abbreviation='ES', map_x_position=0, map_y_position=0, order=1),
+            language=self.python, input_description='', output_description='', example_input='', example_output='',
+            test_cases=[{'input': '1 2', 'output': '3'}],
+        )
+        self.user = User.objects.create_user('aluno')
+        self.evaluations = 0
+
+    def evaluate(self, code, result=None):
+        def evaluate():
+            self.evaluations += 1
+            return result or {'status': 'accepted', 'message': 'ok', 'test_results': [
+                {'test_case': 1, 'result': {'success': True, 'output': '3\n', 'execution_time': 10}},
+            ]}
+        submission = Submission.objects.create(
+            user=self.user, challenge=self.challenge, language=self.python, code=code,
+        )
+        return cached_evaluation(submission, evaluate)
+
+    def test_identical_code_reuses_the_verdict(self):
+        first = self.evaluate('print(3)')
+        self.assertNotIn('cached_verdict', first)
+        second = self.evaluate('print(3)')
+        self.assertTrue(second['cached_verdict'])
+        self.assertEqual(second['status'], 'accepted')
+        self.assertNotIn('output', second['test_results'][0]['result'])  # Saída do programa não é guardada
+        self.evaluate('print(1 + 2)')
+        self.assertEqual(self.evaluations, 2)
+        self.assertEqual(CachedVerdict.objects.get(source_hash=source_hash(self.python, 'print(3)')).hits, 1)
+
+    def test_judge_errors_are_not_cached(self):
+        judge_error = {'status': 'runtime_error', 'message': 'Erro crítico', 'judge_error': True}
+        self.evaluate('print(3)', judge_error)
+        self.evaluate('print(3)', judge_error)
+        self.assertEqual(self.evaluations, 2)
+        self.assertFalse(CachedVerdict.objects.exists())
+
+    def test_load_dependent_verdicts_are_always_rejudged(self):
+        for status in ('time_limit', 'memory_limit', 'runtime_error'):
+            with self.subTest(status=status):
+                evaluations = self.evaluations
+                verdict = {'status': status, 'message': 'Limite', 'test_results': []}
+                self.evaluate(f'# {status}', verdict)
+                self.assertNotIn('cached_verdict', self.evaluate(f'# {status}', verdict))
+                self.assertEqual(self.evaluations, evaluations + 2)
+        # Gravado antes desta regra: ignorado
+        self.evaluate('print(3)')
+        CachedVerdict.objects.update(status='time_limit')
+        self.assertNotIn('cached_verdict', self.evaluate('print(3)'))
+        self.assertFalse(CachedVerdict.objects.exclude(status='accepted').exists())
+
+    def test_editing_the_challenge_invalidates_verdicts(self):
+        self.evaluate('print(3)')
+        version = test_set_version(self.challenge)
+        for field, value in (('test_cases', [{'input': '1 2', 'output': '4'}]), ('time_limit', 500),
+                             ('comparison_mode', 'tokens')):
+            with self.subTest(field=field):
+                setattr(self.challenge, field, value)
+                self.challenge.save()
+                self.assertNotEqual(test_set_version(self.challenge), version)
+                self.assertFalse(CachedVerdict.objects.exclude(test_set_version=test_set_version(self.challenge)).exists())
+                evaluations = self.evaluations
+                self.assertNotIn('cached_verdict', self.evaluate('print(3)'))
+                self.assertEqual(self.evaluations, evaluations + 1)
+                version = test_set_version(self.challenge)
+
+    def test_source_hash_changes_with_the_toolchain(self):
+        backend = get_backend(self.python)
+        with mock.patch.object(backend, 'toolchain', return_value=['Python 3.11.2']):
+            before = source_hash(self.python, 'print(3)')
+        with mock.patch.object(backend, 'toolchain', return_value=['Python 3.12.0']):
+            after = source_hash(self.python, 'print(3)')
+            self.evaluate('print(3)')
+        self.assertNotEqual(before, after)
+        self.assertNotEqual(source_hash('python', 'print(4)'), source_hash('python', 'print(3)'))
+        with mock.patch.object(backend, 'toolchain', return_value=['Python 3.11.2']):
+            self.assertNotIn('cached_verdict', self.evaluate('print(3)'))
+        self.assertEqual(self.evaluations, 2)
+
+
+@override_settings(CODE_EXECUTION={
+    **settings.CODE_EXECUTION, 'GRADING_EVENTS': {'POLL_INTERVAL': 0.01, 'STREAM_LIFETIME': 1, 'KEEPALIVE': 15},
+})
+class GradingEventsTests(TestCase):
+    def setUp(self):
+        isolate_code_execution(self)
+        language = ProgrammingLanguage.objects.create(name='Python', extension='py')
+        challenge = Challenge.objects.create(
+            title='Eventos', description='', difficulty='easy', points=10,
+            state=BrazilState.objects.create(name='Estado', abbreviation='ES', map_x_position=0, map_y_position=0, order=1),
+            language=language, input_description='', output_description='', example_input='', example_output='',
+        )
+        self.user = User.objects.create_user('aluno')
+        self.submission = Submission.objects.create(
+            user=self.user, challenge=challenge, language=language, code='', status='running',
+        )
+        self.url = reverse('submission-events', args=[self.submission.id])
+
+    def record_grading(self, progress, results):
+        progress('judging_started')
+        progress('compile_started', language='Python')
+        progress('compile_finished', success=True, compile_time=0, cached=False)
+        on_result = test_result_reporter(progress, len(results))
+        for index, result in enumerate(results, 1):
+            on_result(index, result)
+
+    async def stream(self, last_event_id=None):
+        await self.async_client.aforce_login(self.user)
+        headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+        response = await self.async_client.get(self.url, headers=headers)
+        if response.status_code != 200:
+            return response.status_code, []
+        body = ''.join([chunk.decode('utf-8') async for chunk in response.streaming_content])
+        events = [
+            dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            for block in body.split('\n\n') if block.startswith('id:')
+        ]
+        return response.status_code, [(int(event['id']), event['event']) for event in events]
+
+    def test_sequence_continues_across_attempts(self):
+        self.record_grading(GradingProgress(self.submission), [{'success': True}])
+        # Reenfileirada pela fila: a nova tentativa continua a numeração
+        retry = GradingProgress(self.submission)
+        self.record_grading(retry, [{'success': False, 'status': 'wrong_answer'}])
+        retry('verdict', status='wrong_answer')
+
+        events = list(GradingEvent.objects.filter(submission=self.submission).order_by('seq').values_list('seq', 'kind'))
+        self.assertEqual([seq for seq, _ in events], list(range(1, 10)))
+        self.assertEqual(events[-1], (9, 'verdict'))
+        self.assertEqual(
+            GradingEvent.objects.get(submission=self.submission, seq=8).data,
+            {'test': 1, 'total': 1, 'passed': False, 'status': 'wrong_answer', 'execution_time': 0},
+        )
+
+    async def test_stream_sends_events_in_order_and_resumes(self):
+        progress = await sync_to_async(GradingProgress)(self.submission)
+        await sync_to_async(self.record_grading)(progress, [{'success': True}, {'success': True}])
+        await sync_to_async(progress)('verdict', status='accepted')
+
+        self.assertEqual(await self.stream(), (200, [
+            (1, 'judging_started'), (2, 'compile_started'), (3, 'compile_finished'),
+            (4, 'test_finished'), (5, 'test_finished'), (6, 'verdict'),
+        ]))
+        self.assertEqual(await self.stream(last_event_id=4), (200, [(5, 'test_finished'), (6, 'verdict')]))
+
+        await Submission.objects.filter(pk=self.submission.pk).aupdate(status='accepted', judged_at=timezone.now())
+        self.assertEqual(await self.stream(last_event_id=6), (204, []))  # Nada novo: o navegador para
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RejudgeTests(TestCase):
+    def setUp(self):
+        isolate_code_execution(
+            self, ADMISSION={'ENABLED': False}, PARALLEL_GRADING={'ENABLED': False},
+            PYTHON={**settings.CODE_EXECUTION['PYTHON'], 'FORK_SERVER': {'ENABLED': False}},
+        )
+        self.python = ProgrammingLanguage.objects.create(name='Python', extension='py')
+        self.challenges = [
+            Challenge.objects.create(
+                title=f'Soma {order}', description='', difficulty='easy', points=points,
+                state=BrazilState.objects.create(
+                    name=f'Estado {order}', abbreviation=f'E{order}', map_x_position=0, map_y_position=0, order=order,
+                ),
+                language=self.python, input_description='', output_description='', example_input='', example_output='',
+                test_cases=[{'input': '1 2', 'output': '3'}, {'input': '5 5', 'output': '10'}],
+            )
+            for order, points in ((1, 10), (2, 20))
+        ]
+        self.user = User.objects.create_user('aluno')
+
+    def submit(self, challenge, status, code='print(sum(map(int, input().split())))'):
+        return Submission.objects.create(
+            user=self.user, challenge=challenge, language=self.python, code=code, status=status,
+            judged_at=timezone.now(),
+        )
+
+    def test_batch_reconciles_profile_and_test_results(self):
+        lost = self.submit(self.challenges[0], 'accepted')
+        gained = self.submit(self.challenges[1], 'wrong_answer')
+        SubmissionTestResult.objects.create(submission=lost, test_index=1, verdict='accepted', wall_time=1)
+        self.user.profile.completed_challenges.add(self.challenges[0])
+        self.user.profile.total_points = 10
+        self.user.profile.save()
+
+        passed = {'success': True, 'execution_time': 5, 'output_hash': 'abc'}
+        apply_batch([
+            (lost, {'status': 'wrong_answer', 'message': 'Resposta incorreta', 'test_results': [
+                {'test_case': 1, 'result': {'success': False, 'status': 'wrong_answer', 'output_hash': 'x'}},
+            ]}),
+            (gained, {'status': 'accepted', 'execution_time': 10, 'test_results': [
+                {'test_case': 1, 'result': passed}, {'test_case': 2, 'result': passed},
+            ]}),
+        ])
+
+        self.user.profile.refresh_from_db()
+        self.assertEqual(list(self.user.profile.completed_challenges.all()), [self.challenges[1]])
+        self.assertEqual(self.user.profile.total_points, 20)
+        self.assertEqual(
+            list(SubmissionTestResult.objects.filter(submission=lost).values_list('verdict', flat=True)), ['wrong_answer'],
+        )
+        self.assertEqual(SubmissionTestResult.objects.filter(submission=gained).count(), 2)
+        standing = UserStanding.objects.get(user=self.user)
+        self.assertEqual((standing.total_points, standing.completed_challenges), (20, 1))
+
+    def test_interrupted_rejudge_resumes_from_checkpoint(self):
+        fixed = self.submit(self.challenges[0], 'wrong_answer')
+        broken = self.submit(self.challenges[1], 'accepted', code='print(0)')
+        last = self.submit(self.challenges[1], 'runtime_error')
+        filters = {'challenge': None, 'user': ['aluno']}
+
+        def interrupt(submission, old_status, result):
+            if submission.id == last.id:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            run_rejudge(Submission.objects.all(), batch_size=2, checkpoint=Checkpoint(filters), on_result=interrupt)
+
+        checkpoint = Checkpoint(filters)
+        self.assertTrue(checkpoint.load())
+        self.assertEqual(checkpoint.state, {'last_id': broken.id, 'processed': 2, 'changed': 2, 'errors': 0})
+        for submission, status in ((fixed, 'accepted'), (broken, 'wrong_answer'), (last, 'runtime_error')):
+            submission.refresh_from_db()
+            self.assertEqual(submission.status, status)
+
+        seen = []
+        state = run_rejudge(Submission.objects.all(), checkpoint=checkpoint,
+                            on_result=lambda submission, old_status, result: seen.append(submission.id))
+        self.assertEqual(seen, [last.id])
+        self.assertEqual(state, {'last_id': last.id, 'processed': 3, 'changed': 3, 'errors': 0})
+        last.refresh_from_db()
+        self.assertEqual(last.status, 'accepted')
+        self.assertEqual(SubmissionTestResult.objects.filter(submission=last).count(), 2)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.total_points, 30)
+        self.assertFalse(Checkpoint({'challenge': None}).load())  # Outros filtros, outro checkpoint
+
+
+class TestCaseMigrationTests(TransactionTestCase):
+    before = [('challenges', '0009_test_data_store')]
+    after = [('challenges', '0010_migrate_json_test_cases')]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(CODE_EXECUTION={
+            **settings.CODE_EXECUTION, 'TEST_DATA': {'DIR': Path(directory.name) / 'store'},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_json_test_cases_moved_to_the_store(self):
+        apps = self.migrate(self.before)
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes())
+        language = apps.get_model('challenges', 'ProgrammingLanguage').objects.create(name='Python', extension='py')
+        states = [
+            apps.get_model('challenges', 'BrazilState').objects.create(
+                name=f'Estado {order}', abbreviation=f'E{order}', map_x_position=0, map_y_position=0, order=order,
+            )
+            for order in (1, 2)
+        ]
+        fields = dict(description='', difficulty='easy', points=10, language=language, input_description='',
+                      output_description='', example_input='', example_output='')
+        Challenge = apps.get_model('challenges', 'Challenge')
+        with_cases = Challenge.objects.create(title='Soma', state=states[0], test_cases=[
+            {'input': '1 2\n', 'output': '3\n'}, {'input': 5, 'output': 'cinco'}, 'inválido',
+        ], **fields)
+        without_cases = Challenge.objects.create(title='Vazio', state=states[1], test_cases=[], **fields)
+
+        # A migração grava por conta própria: mudanças em test_data.py não a afetam
+        with mock.patch('challenges.test_data.TestDataStore.put', side_effect=AssertionError):
+            apps = self.migrate(self.after)
+        ChallengeTestCase = apps.get_model('challenges', 'ChallengeTestCase')
+        store = get_test_data_store()
+        rows = ChallengeTestCase.objects.filter(challenge_id=with_cases.id).order_by('position')
+        self.assertEqual(
+            [(row.position, row.imported, store.path(row.input_hash).read_text(), store.path(row.output_hash).read_text())
+             for row in rows],
+            [(1, False, '1 2\n', '3\n'), (2, False, '5', 'cinco'), (3, False, '', '')],
+        )
+        self.assertEqual([row.input_size for row in rows], [4, 1, 0])
+        self.assertFalse(ChallengeTestCase.objects.filter(challenge_id=without_cases.id).exists())
+
+        # Idempotente: rodar de novo não duplica o índice
+        self.assertEqual(sorted(path.name for path in store.root.glob('*/*')), sorted(
+            {row.input_hash for row in rows} | {row.output_hash for row in rows}
+        ))
+        self.migrate(self.before)
+        self.migrate(self.after)
+        self.assertEqual(ChallengeTestCase.objects.filter(challenge_id=with_cases.id).count(), 3)
+
+
+@override_settings(CODE_EXECUTION={
+    **settings.CODE_EXECUTION, 'JAVA': {**settings.CODE_EXECUTION['JAVA'], 'EXECUTION_MODE': 'pool'},
+})
+class JavaWorkerPoolTests(SimpleTestCase):
+    # Worker falso no lugar do `java JudgeWorker`: responde a cada execução com a saída até o limite pedido
+    FAKE_WORKER = (
+        'import struct, sys\n'
+        'stdin, stdout = sys.stdin.buffer, sys.stdout.buffer\n'
+        'stdout.write(struct.pack(">i", 0x4A554447)); stdout.flush()\n'
+        'while len(stdin.read(4)) == 4:\n'
+        '    for _ in range(2):\n'
+        '        stdin.read(struct.unpack(">H", stdin.read(2))[0])\n'
+        '    _, limit, _ = struct.unpack(">iii", stdin.read(12))\n'
+        '    stdin.read(struct.unpack(">i", stdin.read(4))[0])\n'
+        '    output = b"x" * limit\n'
+        '    stdout.write(struct.pack(">iiqqqi", 5, 1, 1000, 1000, 0, len(output)) + output + struct.pack(">i?", 0, False))\n'
+        '    stdout.flush()\n'
+    )
+
+    def setUp(self):
+        self.directory = isolate_code_execution(self)
+
+    def test_pool_disabled_outside_supported_jdks(self):
+        for major, enabled in ((8, True), (17, True), (23, True), (24, False), (25, False), (0, False)):
+            with self.subTest(major=major), mock.patch('challenges.jvm_pool.java_major_version', return_value=major):
+                self.assertEqual(worker_pool_enabled(), enabled)
+
+    def test_unsupported_jdk_runs_in_process_mode(self):
+        backend = get_backend('java')
+        build = {'classpath': '/tmp', 'class_name': 'Main'}
+        with mock.patch('challenges.jvm_pool.java_major_version', return_value=24), \
+                mock.patch('challenges.language_backends.run_in_worker_pool') as run_in_worker_pool, \
+                mock.patch.object(backend, 'run_command', return_value={'success': True}) as run_command:
+            self.assertEqual(backend.run(build, '', ExecutionLimits(1000, 128)), {'success': True})
+        run_in_worker_pool.assert_not_called()
+        self.assertEqual(run_command.call_args.args[0][:3], [backend.java, '-cp', '.'])
+
+    def test_java_limits_are_multiplied_not_offset(self):
+        backend = get_backend('java')
+        build = {'classpath': '/tmp', 'class_name': 'Main'}
+        java = {**settings.CODE_EXECUTION['JAVA'], 'EXECUTION_MODE': 'process', 'TIME_MULTIPLIER': 1.5}
+        with override_settings(CODE_EXECUTION={**settings.CODE_EXECUTION, 'JAVA': java}), \
+                mock.patch('challenges.language_backends.run_process', return_value={
+                    'exit_code': 0, 'signal': None, 'timed_out': False, 'output_limit_exceeded': False,
+                    'output_rejected': False, 'cpu_time': 1400, 'wall_time': 1500, 'max_rss_kb': None,
+                    'stdout': '', 'stderr': '',
+                }) as run_process:
+            result = backend.run(build, '', ExecutionLimits(1000, 128, 3000))
+            toolchain = backend.toolchain()
+        self.assertEqual(run_process.call_args.args[2], 1500)
+        self.assertEqual(run_process.call_args.kwargs['wall_limit_ms'], 4500)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['cpu_time'], 1400)  # Medido, sem desconto
+        self.assertIn('time x1.5', toolchain)
+
+    def fake_pool_run(self, test_input, max_output_size):
+        """Executa no pool com o worker falso; run_command é o modo processo"""
+        java = self.directory / 'java'
+        java.write_text(f'#!{sys.executable}\n{self.FAKE_WORKER}')
+        java.chmod(0o755)
+        backend = get_backend('java')
+        with override_settings(CODE_EXECUTION={
+            **settings.CODE_EXECUTION, 'MAX_OUTPUT_SIZE': 4096,
+            'JAVA': {
+                **settings.CODE_EXECUTION['JAVA'], 'RUNTIME_PATH': str(java), 'CLASS_DATA_SHARING': {'ENABLED': False},
+                'WORKER_POOL': {'MAX_INPUT_SIZE': 1024, 'MAX_OUTPUT_SIZE': max_output_size},
+            },
+        }), mock.patch('challenges.jvm_pool.java_major_version', return_value=17), \
+                mock.patch('challenges.jvm_pool.ensure_worker_classes', return_value=str(self.directory)), \
+                mock.patch.object(backend, 'run_command', return_value={'success': True}) as run_command:
+            result = backend.run({'classpath': '/tmp', 'class_name': 'Main'}, test_input, ExecutionLimits(1000, 128))
+        for pool in jvm_pool._pools.values():
+            pool.shutdown()
+        return result, run_command.called
+
+    def test_large_input_skips_the_pool(self):
+        with mock.patch('challenges.jvm_pool.get_worker_pool') as get_worker_pool:
+            self.assertEqual(self.fake_pool_run('1\n' * 1024, 4096), ({'success': True}, True))
+        get_worker_pool.assert_not_called()
+
+    def test_output_over_the_pool_limit_reruns_in_process_mode(self):
+        self.assertEqual(self.fake_pool_run('1\n', 1024), ({'success': True}, True))
+
+    def test_output_over_the_global_limit_is_judged_in_the_pool(self):
+        result, process_mode = self.fake_pool_run('1\n', 8192)  # Limite do pool acima do geral: vale o geral
+        self.assertEqual(result['status'], 'output_limit')
+        self.assertFalse(process_mode)
+
+
+class PrecompiledHeaderTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = isolate_code_execution(self)
+        self.include_dir = str(self.directory / 'pch')
+        flags_patch = mock.patch(
+            'challenges.language_backends.precompiled_header_flags', return_value=['-I', self.include_dir],
+        )
+        flags_patch.start()
+        self.addCleanup(flags_patch.stop)
+        self.backend = get_backend('cpp')
+
+    def compile(self, code):
+        source = self.directory / 'sol.cpp'
+        source.write_text(code)
+        with mock.patch.object(self.backend, 'compile_with_flags', wraps=self.backend.compile_with_flags) as compile_fn:
+            build = self.backend.compile(str(source))
+        return build, [call.args[1] for call in compile_fn.call_args_list]
+
+    def test_rejected_pch_retries_without_include_dir(self):
+        real_run = subprocess.run
+
+        def reject_pch(command, **kwargs):
+            if '-I' in command:
+                return subprocess.CompletedProcess(command, 1, '', (
+                    f"sol.cpp:1:10: error: {self.include_dir}/bits/stdc++.h.gch: not a PCH file\n"
+                    "cc1plus: error: one or more PCH files were found, but they were invalid\n"
+                ))
+            return real_run(command, **kwargs)
+
+        with mock.patch('challenges.language_backends.subprocess.run', side_effect=reject_pch):
+            build, attempts = self.compile('#include <bits/stdc++.h>\nint main() { return 0; }\n')
+        self.assertTrue(build['success'])
+        self.assertEqual(attempts, [self.backend.compile_flags + ['-I', self.include_dir], self.backend.compile_flags])
+
+    def test_pch_text_in_the_source_is_a_compilation_error(self):
+        build, attempts = self.compile(
+            '#include <bits/stdc++.h>\n'
+            '#error precompiled header: one or more PCH files were found\n'
+            'int main() { return "can\'t read PCH file"; }\n'
+        )
+        self.assertFalse(build['success'])
+        self.assertIn('precompiled header', build['message'])
+        self.assertEqual(len(attempts), 1)
+
+
+class TestResultsTests(TestCase):
+    def setUp(self):
+        language = ProgrammingLanguage.objects.create(name='Python', extension='py')
+        challenge = Challenge.objects.create(
+            title='Resultados', description='', difficulty='easy', points=10,
+            state=BrazilState.objects.create(name='Estado', abbreviation='ES', map_x_position=0, map_y_position=0, order=1),
+            language=language, input_description='', output_description='', example_input='', example_output='',
+        )
+        self.submission = Submission.objects.create(
+            user=User.objects.create_user('aluno'), challenge=challenge, language=language, code='', status='running',
+        )
+
+    def test_results_written_in_one_insert(self):
+        record_test_results(self.submission, [{'test_case': 1, 'result': {'success': True, 'output': 'velho'}}])
+        results = [
+            {'test_case': i, 'result': {'success': True, 'output': f'{i}\n', 'cpu_time': 1.5, 'execution_time': 2}}
+            for i in range(1, 50)
+        ] + [{'test_case': 50, 'result': {'success': False, 'status': 'time_limit_exceeded'}}]
+
+        with CaptureQueriesContext(connection) as queries:
+            record_test_results(self.submission, results)
+        inserts = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('submissiontestresult', inserts[0])
+
+        rows = list(SubmissionTestResult.objects.filter(submission=self.submission).order_by('test_index'))
+        self.assertEqual([row.test_index for row in rows], list(range(1, 51)))
+        self.assertEqual(rows[-1].verdict, 'time_limit')
+        self.assertNotEqual(rows[0].output_hash, rows[1].output_hash)
+
+
+class JavaFallbackTests(SimpleTestCase):
+    def setUp(self):
+        isolate_code_execution(self, JAVA={
+            **settings.CODE_EXECUTION['JAVA'], 'EXECUTION_MODE': 'process',
+            'CLASS_DATA_SHARING': {'ENABLED': True}, 'COMPILER_DAEMON': {'ENABLED': True},
+        })
+        failed_patch = mock.patch.object(jvm_cds, '_failed', set())
+        failed_patch.start()
+        self.addCleanup(failed_patch.stop)
+        self.backend = get_backend('java')
+
+    def java_command(self):
+        """Linha de comando do `java` que o backend usaria, sem executá-la"""
+        build = {'classpath': '/tmp', 'class_name': 'Main'}
+        with mock.patch.object(self.backend, 'run_command', return_value={'success': True}) as run_command:
+            self.backend.run(build, '', ExecutionLimits(1000, 128))
+        return run_command.call_args.args[0]
+
+    def test_runs_without_cds_when_the_archive_cannot_be_built(self):
+        with mock.patch('challenges.jvm_cds.build_archive', return_value=None) as build_archive:
+            first, second = self.java_command(), self.java_command()
+        for command in (first, second):
+            self.assertFalse([flag for flag in command if 'SharedArchiveFile' in flag])
+            self.assertEqual(command[-1], 'Main')
+        build_archive.assert_called_once()  # Uma falha não é repetida a cada execução
+
+    def test_missing_archive_is_not_passed_to_the_jvm(self):
+        archive = Path(tempfile.gettempdir()) / 'sem-arquivo' / 'judge.jsa'
+        jvm_cds._archives[self.backend.java] = str(archive)
+        with mock.patch('challenges.jvm_cds.build_archive', return_value=None):
+            command = self.java_command()
+        self.assertNotIn(f'-XX:SharedArchiveFile={archive}', command)
+        self.assertNotIn(self.backend.java, jvm_cds._archives)
+
+    def compile_with_javac(self, daemon):
+        """Compila com o daemon simulado; o javac de linha de comando só grava o .class"""
+        directory = Path(tempfile.mkdtemp(dir=settings.CODE_EXECUTION['TEMP_DIR']))
+        source = directory / 'Main.java'
+        source.write_text('public class Main { public static void main(String[] a) {} }')
+        javac_runs = []
+        real_run = subprocess.run
+
+        def fake_javac(command, **kwargs):
+            if command[0] != self.backend.javac or '-version' in command:
+                return real_run(command, **kwargs)
+            javac_runs.append(command)
+            (Path(kwargs['cwd']) / 'Main.class').write_bytes(b'\xca\xfe\xba\xbe')
+            return subprocess.CompletedProcess(command, 0, '', '')
+
+        with mock.patch('challenges.javac_daemon._get_daemon', **daemon), \
+                mock.patch('challenges.language_backends.subprocess.run', side_effect=fake_javac):
+            build = self.backend.compile(str(source))
+        return build, javac_runs
+
+    def test_unavailable_compiler_daemon_falls_back_to_javac(self):
+        build, javac_runs = self.compile_with_javac({'side_effect': WorkerUnavailable('sem compilador')})
+        self.assertTrue(build['success'])
+        self.assertEqual(build['class_name'], 'Main')
+        self.assertEqual(len(javac_runs), 1)
+
+    def test_crashed_compiler_daemon_falls_back_to_javac(self):
+        daemon = mock.Mock(compile=mock.Mock(side_effect=WorkerCrashed('morreu')))
+        with mock.patch('challenges.javac_daemon._discard_daemon') as discard:
+            build, javac_runs = self.compile_with_javac({'return_value': daemon})
+        self.assertTrue(build['success'])
+        self.assertEqual(len(javac_runs), 1)
+        discard.assert_called_once()  # O próximo compile inicia um daemon novo
@@ -15,9 +15,18 @@ urlpatterns = [
     # Ver resultado de uma submissão específica
     path('submission/<int:submission_id>/', views.submission_result, name='submission-result'),
     
+    # Andamento da submissão na fila de avaliação (polling via AJAX)
+    path('submission/<int:submission_id>/status/', views.submission_status, name='submission-status'),
+    
+    # Progresso da avaliação em tempo real (Server-Sent Events)
+    path('submission/<int:submission_id>/events/', views.submission_events, name='submission-events'),
+    
     # URLs adicionais úteis (opcionais)
     path('submissions/', views.user_submissions, name='user-submissions'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('leaderboard/api/', views.leaderboard_api, name='leaderboard-api'),
+    path('leaderboard/region/<str:region>/', views.region_leaderboard, name='region-leaderboard'),
+    path('leaderboard/challenge/<int:pk>/', views.challenge_leaderboard, name='challenge-leaderboard'),
     
     # NOVA URL para tela de parabéns
     path('congratulations/', views.congratulations, name='congratulations'),
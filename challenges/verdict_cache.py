@@ -0,0 +1,210 @@
+# challenges/verdict_cache.py
+#
+# Cache de vereditos: o mesmo código, na mesma linguagem, contra a mesma
+# versão dos casos de teste de um desafio tem sempre o mesmo veredito.
+#
+# A chave é (desafio, source_hash, test_set_version): source_hash cobre a
+# linguagem, a configuração do backend (compilador, flags), a versão do
+# compilador/runtime instalado e o código;
+# test_set_version cobre os casos de teste (pelos hashes do índice do
+# armazenamento), os limites e o modo de comparação; é gravada no desafio
+# quando ele ou os casos mudam, e a avaliação só a lê.
+# Editar o desafio muda a versão, então vereditos antigos nunca são usados
+# (e são apagados no post_save do Challenge). Só vereditos determinísticos
+# são cacheados: um tempo limite de uma máquina sobrecarregada não pode ser
+# repetido para sempre.
+#
+# Submissões idênticas simultâneas compartilham uma única avaliação
+# (single-flight): quem chega primeiro trava a chave com flock e avalia; os
+# demais esperam a trava e leem o veredito gravado. A Submission de cada
+# tentativa continua sendo criada e recebe o veredito normalmente.
+
+import copy
+import fcntl
+import hashlib
+import json
+import os
+import logging
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .grading_events import test_result_reporter
+from .language_backends import get_backend
+from .models import CachedVerdict, Challenge
+
+logger = logging.getLogger(__name__)
+
+
+# Vereditos que não dependem da carga da máquina
+CACHEABLE_STATUSES = ('accepted', 'wrong_answer', 'compilation_error')
+
+
+def get_verdict_cache_settings():
+    config = settings.CODE_EXECUTION.get('VERDICT_CACHE', {})
+    return {
+        'enabled': config.get('ENABLED', False),
+        'max_age': config.get('MAX_AGE', 30 * 24 * 3600),  # segundos
+        'dir': Path(config.get('DIR') or Path(settings.CODE_EXECUTION['TEMP_DIR']) / 'verdict_cache'),
+    }
+
+
+def _digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def source_hash(language, code):
+    """Hash do código com a linguagem, a configuração e o toolchain do backend que o compila/executa"""
+    backend = get_backend(language)
+    return _digest(['v2', backend.key, backend.config, backend.toolchain(), code])
+
+
+def compute_test_set_version(challenge):
+    """
+    Hash de tudo no desafio que influencia o veredito: os casos de teste pelo
+    índice do armazenamento (hashes do conteúdo, sem ler o JSON), os limites e
+    o modo de comparação.
+    """
+    cases = challenge.stored_test_cases.values_list('imported', 'position', 'input_hash', 'output_hash')
+    return _digest([
+        'v3', [list(case) for case in cases], challenge.time_limit, challenge.memory_limit,
+        challenge.comparison_mode, challenge.float_tolerance,
+    ])
+
+
+def test_set_version(challenge):
+    """Versão gravada no desafio a cada alteração (invalidate_challenge); calculada se ainda não houver"""
+    return challenge.test_set_version or compute_test_set_version(challenge)
+
+
+def is_cacheable(result):
+    """
+    Só vereditos determinísticos do código. Limites de tempo/memória (e erros
+    de execução, que podem ser um processo morto por falta de recurso)
+    dependem da carga da máquina e são sempre reavaliados, assim como falhas
+    do juiz (ou execuções canceladas).
+    """
+    if result.get('status') not in CACHEABLE_STATUSES or result.get('judge_error'):
+        return False
+    return not any(entry['result'].get('judge_error') for entry in result.get('test_results') or [])
+
+
+class _KeyLock:
+    """flock exclusivo por chave (arquivos em faixas: sem um arquivo por código)"""
+
+    def __init__(self, root, key):
+        self.path = Path(root) / f'{key[:3]}.lock'
+        self.fd = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+def lookup(challenge, source, version):
+    """Resultado cacheado (cópia) ou None"""
+    max_age = get_verdict_cache_settings()['max_age']
+    entry = CachedVerdict.objects.filter(
+        challenge=challenge, source_hash=source, test_set_version=version, status__in=CACHEABLE_STATUSES,
+        created_at__gte=timezone.now() - timedelta(seconds=max_age),
+    ).first()
+    if entry is None:
+        return None
+    CachedVerdict.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+    return copy.deepcopy(entry.result)
+
+
+def store(challenge, source, version, result):
+    # Sem a saída dos programas: o veredito, os tempos e os hashes bastam
+    result = dict(result, test_results=[
+        {'test_case': entry['test_case'], 'result': {k: v for k, v in entry['result'].items() if k != 'output'}}
+        for entry in result.get('test_results') or []
+    ])
+    result.pop('output', None)
+    try:
+        CachedVerdict.objects.update_or_create(
+            challenge=challenge, source_hash=source, test_set_version=version,
+            defaults={'status': result['status'], 'result': result, 'created_at': timezone.now()},
+        )
+    except (IntegrityError, TypeError, ValueError) as e:
+        logger.warning(f"[VERDICT-CACHE] Could not store verdict: {e}")
+
+
+def replay_progress(progress, language, result):
+    """Eventos de progresso de uma avaliação cacheada (o navegador vê a mesma sequência)"""
+    if progress is None:
+        return
+    progress('compile_started', language=getattr(language, 'name', language))
+    progress(
+        'compile_finished',
+        success=result['status'] != 'compilation_error',
+        compile_time=round(result.get('compile_time', 0), 2),
+        cached=True,
+    )
+    on_result = test_result_reporter(progress, result.get('total_tests', 0))
+    for entry in result.get('test_results') or []:
+        on_result(entry['test_case'], entry['result'])
+
+
+def cached_evaluation(submission, evaluate, progress=None):
+    """
+    Veredito cacheado da submissão ou evaluate() (uma só avaliação por chave
+    em andamento). O resultado vindo do cache tem 'cached_verdict': True.
+    """
+    config = get_verdict_cache_settings()
+    if not config['enabled']:
+        return evaluate()
+
+    challenge = submission.challenge
+    try:
+        source = source_hash(submission.language, submission.code)
+    except ValueError:
+        return evaluate()  # Linguagem sem backend: o motor reporta o erro
+    version = test_set_version(challenge)
+
+    with _KeyLock(config['dir'], source):
+        result = lookup(challenge, source, version)
+        if result is not None:
+            logger.info(f"[VERDICT-CACHE] Hit for submission {submission.id}: {result['status']}")
+            replay_progress(progress, submission.language, result)
+            result['cached_verdict'] = True
+            return result
+
+        result = evaluate()
+        if is_cacheable(result):
+            store(challenge, source, version, result)
+        return result
+
+
+def invalidate_challenge(challenge):
+    """
+    Grava a versão atual dos casos de teste no desafio e remove os vereditos
+    das versões antigas. Chamado sempre que o desafio ou o índice mudam.
+    """
+    challenge.test_set_version = compute_test_set_version(challenge)
+    Challenge.objects.filter(pk=challenge.pk).update(test_set_version=challenge.test_set_version)
+    deleted, _ = CachedVerdict.objects.filter(challenge=challenge).exclude(
+        test_set_version=challenge.test_set_version
+    ).delete()
+    if deleted:
+        logger.info(f"[VERDICT-CACHE] Invalidated {deleted} verdicts of challenge {challenge.id}")
+    return deleted
+
+
+def purge_expired_verdicts():
+    """Remove vereditos mais antigos que MAX_AGE"""
+    cutoff = timezone.now() - timedelta(seconds=get_verdict_cache_settings()['max_age'])
+    deleted, _ = CachedVerdict.objects.filter(created_at__lt=cutoff).delete()
+    if deleted:
+        logger.info(f"[VERDICT-CACHE] Purged {deleted} expired verdicts")
+    return deleted
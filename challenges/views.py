@@ -3,23 +3,28 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.core.exceptions import ValidationError
-from .models import Challenge, Submission, BrazilState
+from .models import Challenge, Submission, BrazilState, GradingEvent, UserStanding
 from accounts.models import UserProfile
 from .java_executor import evaluate_java_submission
+from .execution_engine import run_submission
+from .judge_queue import judge_queue_available, queue_position
+from .test_results import record_test_results
+from .test_data import count_test_cases
+from .leaderboards import challenge_standings, entry_of, national_summary, region_page, region_standings
+from .standings import parse_page_size, rank_position, standing_entry, standings_page
+from .grading_events import GradingProgress, format_sse, get_events_settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+import asyncio
 import json
-import subprocess
-import tempfile
-import os
 import time
 import logging
 import traceback
-from django.views.decorators.csrf import csrf_exempt
-from django.core.exceptions import ValidationError
-import traceback
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -69,8 +74,6 @@ def submit_solution_ajax(request, pk):
     """
     View AJAX corrigida com verificação SEMPRE
     """
-    import traceback
-    
     try:
         logger.info(f"[SUBMIT] Starting AJAX submit for challenge {pk} by user {request.user.username}")
         
@@ -114,32 +117,78 @@ def submit_solution_ajax(request, pk):
                 'error': f'Erro ao criar submissão: {str(e)}'
             })
         
-        # 4. Avaliar submissão
-        try:
-            logger.info(f"[SUBMIT] Starting evaluation...")
-            result = evaluate_submission_safe(submission)
-            logger.info(f"[SUBMIT] Evaluation completed: {result.get('status')}")
-            
-        except Exception as e:
-            logger.error(f"[SUBMIT] Error in evaluation: {e}")
-            logger.error(f"[SUBMIT] Traceback: {traceback.format_exc()}")
+        # 4. Avaliar: pela fila (manage.py judge_worker) ou na própria requisição
+        if judge_queue_available():
+            logger.info(f"[SUBMIT] Submission {submission.id} queued for judging")
             return JsonResponse({
-                'success': False,
-                'error': f'Erro na avaliação: {str(e)}'
+                'success': True,
+                'status': 'pending',
+                'message': 'Submissão na fila de avaliação',
+                'submission_id': submission.id,
+                'status_url': reverse('submission-status', args=[submission.id]),
+                'events_url': reverse('submission-events', args=[submission.id]),
+                'queue_position': queue_position(submission),
             })
         
-        # 5. Processar resultado aceito
-        if result['status'] == 'accepted':
-            try:
-                logger.info(f"[SUBMIT] Processing accepted result...")
-                
-                # Buscar ou criar perfil
+        return JsonResponse(judge_submission(submission))
+            
+    except Exception as e:
+        logger.error(f"[SUBMIT] Critical error: {e}")
+        logger.error(f"[SUBMIT] Full traceback: {traceback.format_exc()}")
+        return JsonResponse({
+            'success': False,
+            'error': f'Erro interno: {str(e)}'
+        })   
+
+
+def judge_submission(submission):
+    """
+    Avalia a submissão, processa o resultado (pontos, desbloqueio) e grava a
+    resposta para o cliente em submission.result_data.
+    Usado pelo judge_worker e pela avaliação inline.
+    """
+    progress = GradingProgress(submission)
+    try:
+        logger.info(f"[SUBMIT] Starting evaluation...")
+        progress('judging_started', total_tests=count_test_cases(submission.challenge))
+        result = evaluate_submission_safe(submission, progress)
+        logger.info(f"[SUBMIT] Evaluation completed: {result.get('status')}")
+        response_data = build_submission_response(submission, result)
+    except Exception as e:
+        logger.error(f"[SUBMIT] Error in evaluation: {e}")
+        logger.error(f"[SUBMIT] Traceback: {traceback.format_exc()}")
+        if submission.status in ('pending', 'running'):
+            submission.status = 'runtime_error'
+            submission.error_message = f'Erro interno: {str(e)}'
+        response_data = {
+            'success': False,
+            'error': f'Erro na avaliação: {str(e)}'
+        }
+    
+    submission.result_data = response_data
+    submission.judged_at = timezone.now()
+    submission.save()
+    progress('verdict', **response_data)
+    return response_data
+
+
+def build_submission_response(submission, result):
+    """Processa o resultado da avaliação e monta a resposta para o cliente"""
+    challenge = submission.challenge
+    
+    # 5. Processar resultado aceito
+    if result['status'] == 'accepted':
+        try:
+            logger.info(f"[SUBMIT] Processing accepted result...")
+            
+            with transaction.atomic():
+                # Buscar ou criar perfil (bloqueado: dois aceites simultâneos não somam pontos em dobro)
                 try:
-                    profile = UserProfile.objects.get(user=request.user)
+                    profile = UserProfile.objects.select_for_update().get(user=submission.user)
                 except UserProfile.DoesNotExist:
                     initial_state = BrazilState.objects.filter(order=1).first()
                     profile = UserProfile.objects.create(
-                        user=request.user,
+                        user=submission.user,
                         current_state=initial_state
                     )
                 
@@ -203,56 +252,157 @@ def submit_solution_ajax(request, pk):
                         'completed_count': completed_challenges,
                         'total_count': total_challenges,
                     }
-                
-                # VERIFICAR SE DEVE REDIRECIONAR PARA PARABÉNS (SEMPRE)
-                if all_completed:
-                    logger.info(f"[DEBUG] ✅ ALL CHALLENGES COMPLETED! Adding redirect to congratulations!")
-                    response_data.update({
-                        'redirect_to': '/challenges/congratulations/',
-                        'message': '🎉 PARABÉNS! Você completou todos os desafios do Brasil! 🇧🇷',
-                        'show_congratulations': True,
-                        'completion_type': 'full_completion'
-                    })
-                
-                logger.info(f"[DEBUG] Final response data: {response_data}")
-                return JsonResponse(response_data)
-                    
-            except Exception as e:
-                logger.error(f"[SUBMIT] Error processing accepted result: {e}")
-                logger.error(f"[SUBMIT] Traceback: {traceback.format_exc()}")
-                return JsonResponse({
-                    'success': False,
-                    'error': f'Erro ao processar resultado: {str(e)}'
+            
+            # VERIFICAR SE DEVE REDIRECIONAR PARA PARABÉNS (SEMPRE)
+            if all_completed:
+                logger.info(f"[DEBUG] ✅ ALL CHALLENGES COMPLETED! Adding redirect to congratulations!")
+                response_data.update({
+                    'redirect_to': '/challenges/congratulations/',
+                    'message': '🎉 PARABÉNS! Você completou todos os desafios do Brasil! 🇧🇷',
+                    'show_congratulations': True,
+                    'completion_type': 'full_completion'
                 })
-        else:
-            # Resultado não aceito
-            logger.info(f"[SUBMIT] Solution not accepted: {result['status']}")
-            return JsonResponse({
-                'success': True,
-                'status': result['status'],
-                'message': result.get('message', 'Erro na execução'),
-                'error_details': result.get('error_details'),
-            })
             
-    except Exception as e:
-        logger.error(f"[SUBMIT] Critical error: {e}")
-        logger.error(f"[SUBMIT] Full traceback: {traceback.format_exc()}")
-        return JsonResponse({
-            'success': False,
-            'error': f'Erro interno: {str(e)}'
-        })   
+            logger.info(f"[DEBUG] Final response data: {response_data}")
+            return response_data
+                
+        except Exception as e:
+            logger.error(f"[SUBMIT] Error processing accepted result: {e}")
+            logger.error(f"[SUBMIT] Traceback: {traceback.format_exc()}")
+            return {
+                'success': False,
+                'error': f'Erro ao processar resultado: {str(e)}'
+            }
+    else:
+        # Resultado não aceito
+        logger.info(f"[SUBMIT] Solution not accepted: {result['status']}")
+        return {
+            'success': True,
+            'status': result['status'],
+            'message': result.get('message', 'Erro na execução'),
+            'error_details': result.get('error_details'),
+        }
+
 
+SUBMISSION_STATUS_FIELDS = (
+    'id', 'user_id', 'status', 'result_data', 'error_message',
+    'submitted_at', 'claimed_at', 'judged_at'
+)
+
+
+@login_required
+def submission_status(request, submission_id):
+    """Consulta leve do andamento de uma submissão (polling da fila)"""
+    submission = get_object_or_404(
+        Submission.objects.only(*SUBMISSION_STATUS_FIELDS),
+        pk=submission_id,
+        user=request.user
+    )
+    return JsonResponse(submission_status_data(submission))
 
-# ===== NOVA FUNÇÃO evaluate_submission_safe =====
-# Adicione esta função no seu views.py:
 
-def evaluate_submission_safe(submission):
+def submission_status_data(submission):
+    """Andamento/resultado de uma submissão, como enviado ao cliente"""
+    # Vinda da fila, só está pronta quando o worker gravou a resposta (pontos etc.)
+    done = submission.judged_at is not None or (submission.is_final and submission.claimed_at is None)
+    
+    if done:
+        data = dict(submission.result_data) if submission.result_data else {
+            'success': True,
+            'status': submission.status,
+            'message': submission.error_message or submission.get_status_display(),
+        }
+        data['done'] = True
+    else:
+        data = {
+            'success': True,
+            'status': submission.status,
+            'done': False,
+        }
+        if submission.status == 'pending':
+            data['queue_position'] = queue_position(submission)
+    
+    data['submission_id'] = submission.id
+    return data
+
+
+@login_required
+async def submission_events(request, submission_id):
+    """
+    Stream SSE (text/event-stream) do progresso da avaliação: compilação,
+    cada caso de teste e o veredito. Reconexões retomam a partir do
+    Last-Event-ID; o stream tem duração limitada e o navegador reconecta.
+    """
+    user = await request.auser()
+    try:
+        submission = await Submission.objects.only(*SUBMISSION_STATUS_FIELDS).aget(pk=submission_id, user=user)
+    except Submission.DoesNotExist:
+        raise Http404("Submissão não encontrada")
+    
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or 0)
+    except ValueError:
+        last_seq = 0
+    
+    config = get_events_settings()
+    
+    async def new_events(after_seq):
+        return [
+            event async for event in GradingEvent.objects.filter(
+                submission_id=submission.id, seq__gt=after_seq
+            ).order_by('seq').values('seq', 'kind', 'data')
+        ]
+    
+    # Já avaliada e o cliente viu tudo: 204 faz o EventSource parar de reconectar
+    pending_events = await new_events(last_seq)
+    if submission.judged_at is not None and not pending_events and last_seq:
+        return HttpResponse(status=204)
+    
+    async def stream():
+        nonlocal last_seq
+        events = pending_events
+        started = time.monotonic()
+        last_sent = started
+        yield f"retry: {int(config['poll_interval'] * 1000) + 1000}\n\n"
+        
+        while True:
+            for event in events:
+                last_seq = event['seq']
+                last_sent = time.monotonic()
+                yield format_sse(event['seq'], event['kind'], event['data'])
+                if event['kind'] == 'verdict':
+                    return
+            
+            if not events:
+                current = await Submission.objects.only(*SUBMISSION_STATUS_FIELDS).aget(pk=submission.id)
+                data = await sync_to_async(submission_status_data)(current)
+                if data['done']:
+                    # Avaliada sem eventos (ex.: antes desta versão ou eventos já expirados)
+                    yield format_sse(last_seq + 1, 'verdict', data)
+                    return
+                if time.monotonic() - last_sent >= config['keepalive']:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+            
+            if time.monotonic() - started >= config['stream_lifetime']:
+                return
+            await asyncio.sleep(config['poll_interval'])
+            events = await new_events(last_seq)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # proxies não devem segurar o stream
+    return response
+
+
+def evaluate_submission_safe(submission, progress=None):
     """
-    Função de avaliação SEM uso de signal (que não funciona em threads)
+    Avalia a submissão no motor de execução (challenges/execution_engine.py),
+    com timeouts do subprocess (sem signal, que não funciona em threads).
+    progress(kind, **data), se informado, recebe o andamento (compilação, cada teste)
     """
     try:
         challenge = submission.challenge
-        language = submission.language
         
         # Validações básicas
         if not submission.code.strip():
@@ -261,7 +411,7 @@ def evaluate_submission_safe(submission):
             submission.save()
             return {'status': 'compilation_error', 'message': 'Código vazio'}
         
-        if not challenge.test_cases:
+        if not count_test_cases(challenge):
             submission.status = 'runtime_error'
             submission.error_message = 'Nenhum caso de teste encontrado'
             submission.save()
@@ -271,290 +421,23 @@ def evaluate_submission_safe(submission):
         submission.status = 'running'
         submission.save()
         
-        logger.info(f"[EVAL] Starting evaluation for submission {submission.id} - Language: {language.name}")
-        
-        # CORREÇÃO: Usar timeout do subprocess ao invés de signal
-        if language.name.lower() == 'java':
-            return evaluate_java_submission_safe(submission)
-        else:
-            return evaluate_other_languages_safe(submission)
-            
-    except Exception as e:
-        logger.error(f"[EVAL] Critical error in evaluate_submission_safe: {e}")
-        submission.status = 'runtime_error'
-        submission.error_message = f'Erro crítico: {str(e)}'
-        submission.save()
-        return {'status': 'runtime_error', 'message': f'Erro crítico: {str(e)}'}
-
-
-# ===== FUNÇÃO JAVA CORRIGIDA =====
-# Adicione esta função no seu views.py:
-
-def evaluate_java_submission_safe(submission):
-    """
-    Avaliação Java SEM signal timeout
-    """
-    from .java_executor import JavaCodeExecutor
-    
-    try:
-        challenge = submission.challenge
-        
-        # Criar executor com timeouts internos (sem signal)
-        executor = JavaCodeExecutor(
-            time_limit=challenge.time_limit,
-            memory_limit=128
-        )
-        
-        # Avaliar submissão
-        result = executor.evaluate_submission(
-            submission.code,
-            challenge.test_cases
-        )
+        logger.info(f"[EVAL] Starting evaluation for submission {submission.id} - Language: {submission.language.name}")
         
-        # Mapear status
-        status_mapping = {
-            'accepted': 'accepted',
-            'compilation_error': 'compilation_error',
-            'compilation_timeout': 'compilation_error',
-            'runtime_error': 'runtime_error',
-            'time_limit_exceeded': 'time_limit',
-            'wrong_answer': 'wrong_answer',
-            'evaluation_error': 'runtime_error',
-            'test_error': 'runtime_error'
-        }
+        result = run_submission(submission, progress)
+        logger.info(f"[EVAL] Evaluation completed: {submission.status} - timings {result.get('timings')}")
         
-        submission.status = status_mapping.get(result['status'], 'runtime_error')
-        submission.execution_time = result.get('execution_time', 0)
-        submission.error_message = result.get('message', '')
-        
-        if result.get('failed_test_case'):
-            submission.error_message += f" (Falha no caso de teste {result['failed_test_case']})"
-        
-        submission.save()
-        
-        logger.info(f"[EVAL] Java evaluation completed: {submission.status}")
+        # Resultado de cada teste em uma única inserção em lote
+        record_test_results(submission, result.get('test_results'))
         return result
-        
-    except Exception as e:
-        logger.error(f"[EVAL] Error in Java evaluation: {e}")
-        submission.status = 'runtime_error'
-        submission.error_message = f'Erro na avaliação Java: {str(e)}'
-        submission.save()
-        
-        return {
-            'status': 'runtime_error',
-            'message': f'Erro na avaliação Java: {str(e)}'
-        }
-
-
-# ===== FUNÇÃO OUTRAS LINGUAGENS CORRIGIDA =====
-# Adicione esta função no seu views.py:
-
-def evaluate_other_languages_safe(submission):
-    """
-    Avaliação para Python, C, C++ SEM signal timeout
-    """
-    import subprocess
-    import tempfile
-    import os
-    import time
-    
-    challenge = submission.challenge
-    language = submission.language
-    code = submission.code
-    
-    temp_files = []
-    
-    try:
-        logger.info(f"[EVAL] Evaluating {language.name} code - {len(challenge.test_cases)} test cases")
-        
-        start_time = time.time()
-        
-        for i, test_case in enumerate(challenge.test_cases, 1):
-            test_input = str(test_case.get('input', ''))
-            expected_output = str(test_case.get('output', '')).strip()
             
-            # Criar arquivo temporário
-            with tempfile.NamedTemporaryFile(
-                suffix=f'.{language.extension}', 
-                delete=False,
-                mode='w',
-                encoding='utf-8'
-            ) as temp_file:
-                temp_file.write(code)
-                temp_file_path = temp_file.name
-                temp_files.append(temp_file_path)
-            
-            # Executar baseado na linguagem
-            try:
-                if language.name.lower() == 'python':
-                    result = run_python_safe(temp_file_path, test_input, challenge.time_limit)
-                elif language.name.lower() == 'c':
-                    result = run_c_safe(temp_file_path, test_input, challenge.time_limit)
-                elif language.name.lower() in ['c++', 'cpp']:
-                    result = run_cpp_safe(temp_file_path, test_input, challenge.time_limit)
-                else:
-                    raise ValueError(f"Linguagem não suportada: {language.name}")
-                
-                # Verificar resultado
-                if not result['success']:
-                    submission.status = result['status']
-                    submission.error_message = result['message']
-                    submission.save()
-                    return result
-                
-                # Comparar saída
-                actual_output = result['output'].strip()
-                
-                if actual_output != expected_output:
-                    submission.status = 'wrong_answer'
-                    submission.save()
-                    
-                    return {
-                        'status': 'wrong_answer', 
-                        'message': f'Resposta incorreta no teste {i}',
-                        'test_case': i,
-                        'expected': expected_output,
-                        'actual': actual_output
-                    }
-                
-            except Exception as e:
-                logger.error(f"[EVAL] Error in test case {i}: {e}")
-                submission.status = 'runtime_error'
-                submission.error_message = f'Erro no teste {i}: {str(e)}'
-                submission.save()
-                return {'status': 'runtime_error', 'message': f'Erro no teste {i}: {str(e)}'}
-        
-        # Todos os testes passaram
-        execution_time = (time.time() - start_time) * 1000
-        submission.status = 'accepted'
-        submission.execution_time = execution_time
-        submission.save()
-        
-        return {
-            'status': 'accepted', 
-            'message': f'Todos os {len(challenge.test_cases)} testes passaram',
-            'execution_time': execution_time,
-            'passed_tests': len(challenge.test_cases),
-            'total_tests': len(challenge.test_cases)
-        }
-    
     except Exception as e:
-        logger.error(f"[EVAL] Critical error in language evaluation: {e}")
+        logger.error(f"[EVAL] Critical error in evaluate_submission_safe: {e}")
         submission.status = 'runtime_error'
         submission.error_message = f'Erro crítico: {str(e)}'
         submission.save()
         return {'status': 'runtime_error', 'message': f'Erro crítico: {str(e)}'}
-    
-    finally:
-        # Cleanup
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-                if temp_file.endswith(('.c', '.cpp')):
-                    out_file = temp_file + '.out'
-                    if os.path.exists(out_file):
-                        os.unlink(out_file)
-            except:
-                pass
 
 
-# ===== FUNÇÕES AUXILIARES =====
-# Adicione estas funções no seu views.py:
-
-def run_python_safe(file_path, test_input, time_limit_ms):
-    """Executa Python com timeout do subprocess"""
-    try:
-        proc = subprocess.run(
-            ['python3', file_path],
-            input=test_input,
-            capture_output=True,
-            text=True,
-            timeout=max(time_limit_ms / 1000, 5)  # Mínimo 5 segundos
-        )
-        
-        if proc.returncode != 0:
-            error_msg = proc.stderr.strip() or "Erro de execução"
-            return {'success': False, 'status': 'runtime_error', 'message': error_msg}
-        
-        return {'success': True, 'output': proc.stdout}
-        
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido'}
-    except Exception as e:
-        return {'success': False, 'status': 'runtime_error', 'message': str(e)}
-
-def run_c_safe(file_path, test_input, time_limit_ms):
-    """Compila e executa C com timeout"""
-    try:
-        # Compilar
-        compile_proc = subprocess.run(
-            ['gcc', file_path, '-o', f'{file_path}.out', '-std=c11', '-Wall', '-lm'],
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        
-        if compile_proc.returncode != 0:
-            error_msg = compile_proc.stderr.strip() or "Erro de compilação"
-            return {'success': False, 'status': 'compilation_error', 'message': error_msg}
-        
-        # Executar
-        proc = subprocess.run(
-            [f'{file_path}.out'],
-            input=test_input,
-            capture_output=True,
-            text=True,
-            timeout=max(time_limit_ms / 1000, 5)
-        )
-        
-        if proc.returncode != 0:
-            error_msg = proc.stderr.strip() or "Erro de execução"
-            return {'success': False, 'status': 'runtime_error', 'message': error_msg}
-        
-        return {'success': True, 'output': proc.stdout}
-        
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido'}
-    except Exception as e:
-        return {'success': False, 'status': 'runtime_error', 'message': str(e)}
-
-def run_cpp_safe(file_path, test_input, time_limit_ms):
-    """Compila e executa C++ com timeout"""
-    try:
-        # Compilar
-        compile_proc = subprocess.run(
-            ['g++', file_path, '-o', f'{file_path}.out', '-std=c++17', '-Wall', '-O2', '-lm'],
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        
-        if compile_proc.returncode != 0:
-            error_msg = compile_proc.stderr.strip() or "Erro de compilação"
-            return {'success': False, 'status': 'compilation_error', 'message': error_msg}
-        
-        # Executar
-        proc = subprocess.run(
-            [f'{file_path}.out'],
-            input=test_input,
-            capture_output=True,
-            text=True,
-            timeout=max(time_limit_ms / 1000, 5)
-        )
-        
-        if proc.returncode != 0:
-            error_msg = proc.stderr.strip() or "Erro de execução"
-            return {'success': False, 'status': 'runtime_error', 'message': error_msg}
-        
-        return {'success': True, 'output': proc.stdout}
-        
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido'}
-    except Exception as e:
-        return {'success': False, 'status': 'runtime_error', 'message': str(e)}
-
 # CORREÇÃO: View legacy melhorada
 @login_required
 def submit_solution(request, challenge_id):
@@ -577,6 +460,10 @@ def submit_solution(request, challenge_id):
                 status='pending'
             )
             
+            if judge_queue_available():
+                messages.info(request, "Submissão enviada! O resultado aparecerá nesta página.")
+                return redirect('submission-result', submission_id=submission.id)
+            
             # Avalia submissão
             result = evaluate_submission(submission)
             
@@ -603,286 +490,8 @@ def submit_solution(request, challenge_id):
     return redirect('challenge-detail', pk=challenge_id)
 
 def evaluate_submission(submission):
-    """
-    Função principal de avaliação com melhor tratamento de erros
-    CORREÇÃO: Timeout e validação melhorada
-    """
-    try:
-        challenge = submission.challenge
-        language = submission.language
-        
-        # Validações básicas
-        if not submission.code.strip():
-            submission.status = 'compilation_error'
-            submission.error_message = 'Código vazio'
-            submission.save()
-            return {'status': 'compilation_error', 'message': 'Código vazio'}
-        
-        if not challenge.test_cases:
-            submission.status = 'runtime_error'
-            submission.error_message = 'Nenhum caso de teste encontrado'
-            submission.save()
-            return {'status': 'runtime_error', 'message': 'Nenhum caso de teste encontrado'}
-        
-        # Status inicial
-        submission.status = 'running'
-        submission.save()
-        
-        logger.info(f"[EVAL] Starting evaluation for submission {submission.id} - Language: {language.name}")
-        
-        # Avaliação por linguagem
-        if language.name.lower() == 'java':
-            from .java_executor_render import evaluate_java_submission_render
-            return evaluate_java_submission_render(submission)
-        else:
-            return evaluate_other_languages_improved(submission)
-            
-    except Exception as e:
-        logger.error(f"[EVAL] Critical error in evaluate_submission: {e}")
-        logger.error(f"[EVAL] Traceback: {traceback.format_exc()}")
-        submission.status = 'runtime_error'
-        submission.error_message = f'Erro crítico: {str(e)}'
-        submission.save()
-        return {'status': 'runtime_error', 'message': f'Erro crítico: {str(e)}'}
-
-def evaluate_other_languages_improved(submission):
-    """
-    CORREÇÃO: Avaliação melhorada para Python, C, C++
-    """
-    challenge = submission.challenge
-    language = submission.language
-    code = submission.code
-    
-    temp_files = []  # Lista para cleanup
-    
-    try:
-        logger.info(f"[EVAL] Evaluating {language.name} code - {len(challenge.test_cases)} test cases")
-        
-        start_time = time.time()
-        
-        for i, test_case in enumerate(challenge.test_cases, 1):
-            logger.debug(f"[EVAL] Running test case {i}/{len(challenge.test_cases)}")
-            
-            test_input = test_case.get('input', '')
-            expected_output = test_case.get('output', '').strip()
-            
-            # CORREÇÃO: Melhor tratamento de casos de teste
-            if not isinstance(test_input, str):
-                test_input = str(test_input)
-            if not isinstance(expected_output, str):
-                expected_output = str(expected_output)
-            
-            # Criar arquivo temporário com nome único
-            import uuid
-            temp_id = str(uuid.uuid4())[:8]
-            temp_file = tempfile.NamedTemporaryFile(
-                suffix=f'_{temp_id}.{language.extension}', 
-                delete=False,
-                mode='w',
-                encoding='utf-8'
-            )
-            
-            try:
-                temp_file.write(code)
-                temp_file.flush()
-                temp_file_path = temp_file.name
-                temp_files.append(temp_file_path)
-                
-            finally:
-                temp_file.close()
-            
-            # Executar baseado na linguagem
-            try:
-                if language.name.lower() == 'python':
-                    result = run_python_code(temp_file_path, test_input, challenge.time_limit)
-                elif language.name.lower() == 'c':
-                    result = run_c_code(temp_file_path, test_input, challenge.time_limit)
-                elif language.name.lower() in ['c++', 'cpp']:
-                    result = run_cpp_code(temp_file_path, test_input, challenge.time_limit)
-                else:
-                    raise ValueError(f"Linguagem não suportada: {language.name}")
-                
-                # Verificar resultado
-                if not result['success']:
-                    submission.status = result['status']
-                    submission.error_message = result['message']
-                    submission.save()
-                    return result
-                
-                # Comparar saída
-                actual_output = result['output'].strip()
-                
-                if actual_output != expected_output:
-                    submission.status = 'wrong_answer'
-                    submission.save()
-                    
-                    debug_msg = f"Teste {i}: Esperado '{expected_output}', Obtido '{actual_output}'"
-                    logger.info(f"[EVAL] Wrong answer: {debug_msg}")
-                    
-                    return {
-                        'status': 'wrong_answer', 
-                        'message': f'Resposta incorreta no teste {i}',
-                        'test_case': i,
-                        'expected': expected_output,
-                        'actual': actual_output
-                    }
-                
-                logger.debug(f"[EVAL] Test case {i} passed")
-                
-            except Exception as e:
-                logger.error(f"[EVAL] Error in test case {i}: {e}")
-                submission.status = 'runtime_error'
-                submission.error_message = f'Erro no teste {i}: {str(e)}'
-                submission.save()
-                return {'status': 'runtime_error', 'message': f'Erro no teste {i}: {str(e)}'}
-        
-        # Todos os testes passaram
-        execution_time = (time.time() - start_time) * 1000
-        submission.status = 'accepted'
-        submission.execution_time = execution_time
-        submission.save()
-        
-        logger.info(f"[EVAL] All tests passed - Execution time: {execution_time:.2f}ms")
-        
-        return {
-            'status': 'accepted', 
-            'message': f'Todos os {len(challenge.test_cases)} testes passaram',
-            'execution_time': execution_time,
-            'passed_tests': len(challenge.test_cases),
-            'total_tests': len(challenge.test_cases)
-        }
-    
-    except Exception as e:
-        logger.error(f"[EVAL] Critical error in language evaluation: {e}")
-        logger.error(f"[EVAL] Traceback: {traceback.format_exc()}")
-        submission.status = 'runtime_error'
-        submission.error_message = f'Erro crítico: {str(e)}'
-        submission.save()
-        return {'status': 'runtime_error', 'message': f'Erro crítico: {str(e)}'}
-    
-    finally:
-        # CORREÇÃO: Cleanup garantido
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-                # Cleanup de arquivos compilados
-                if temp_file.endswith('.c') or temp_file.endswith('.cpp'):
-                    out_file = temp_file + '.out'
-                    if os.path.exists(out_file):
-                        os.unlink(out_file)
-            except:
-                pass
-
-def run_python_code(file_path, test_input, time_limit_ms):
-    """Executa código Python com timeout"""
-    try:
-        proc = subprocess.Popen(
-            ['python3', file_path],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        stdout, stderr = proc.communicate(
-            input=test_input, 
-            timeout=time_limit_ms / 1000
-        )
-        
-        if proc.returncode != 0:
-            error_msg = stderr.strip() or "Erro de execução"
-            return {'success': False, 'status': 'runtime_error', 'message': error_msg}
-        
-        return {'success': True, 'output': stdout}
-        
-    except subprocess.TimeoutExpired:
-        proc.kill()
-        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido'}
-    except Exception as e:
-        return {'success': False, 'status': 'runtime_error', 'message': str(e)}
-
-def run_c_code(file_path, test_input, time_limit_ms):
-    """Compila e executa código C"""
-    try:
-        # Compilar
-        compile_proc = subprocess.run(
-            ['gcc', file_path, '-o', f'{file_path}.out', '-std=c11', '-Wall', '-lm'],
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        
-        if compile_proc.returncode != 0:
-            error_msg = compile_proc.stderr.strip() or "Erro de compilação"
-            return {'success': False, 'status': 'compilation_error', 'message': error_msg}
-        
-        # Executar
-        proc = subprocess.Popen(
-            [f'{file_path}.out'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        stdout, stderr = proc.communicate(
-            input=test_input,
-            timeout=time_limit_ms / 1000
-        )
-        
-        if proc.returncode != 0:
-            error_msg = stderr.strip() or "Erro de execução"
-            return {'success': False, 'status': 'runtime_error', 'message': error_msg}
-        
-        return {'success': True, 'output': stdout}
-        
-    except subprocess.TimeoutExpired:
-        proc.kill()
-        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido'}
-    except Exception as e:
-        return {'success': False, 'status': 'runtime_error', 'message': str(e)}
-
-def run_cpp_code(file_path, test_input, time_limit_ms):
-    """Compila e executa código C++"""
-    try:
-        # Compilar
-        compile_proc = subprocess.run(
-            ['g++', file_path, '-o', f'{file_path}.out', '-std=c++17', '-Wall', '-O2', '-lm'],
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        
-        if compile_proc.returncode != 0:
-            error_msg = compile_proc.stderr.strip() or "Erro de compilação"
-            return {'success': False, 'status': 'compilation_error', 'message': error_msg}
-        
-        # Executar
-        proc = subprocess.Popen(
-            [f'{file_path}.out'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        stdout, stderr = proc.communicate(
-            input=test_input,
-            timeout=time_limit_ms / 1000
-        )
-        
-        if proc.returncode != 0:
-            error_msg = stderr.strip() or "Erro de execução"
-            return {'success': False, 'status': 'runtime_error', 'message': error_msg}
-        
-        return {'success': True, 'output': stdout}
-        
-    except subprocess.TimeoutExpired:
-        proc.kill()
-        return {'success': False, 'status': 'time_limit', 'message': 'Tempo limite excedido'}
-    except Exception as e:
-        return {'success': False, 'status': 'runtime_error', 'message': str(e)}
+    """Avaliação da view legacy: o mesmo motor de evaluate_submission_safe, sem eventos de progresso"""
+    return evaluate_submission_safe(submission)
 
 # Views restantes mantidas como estavam
 @login_required
@@ -892,6 +501,8 @@ def submission_result(request, submission_id):
     context = {
         'submission': submission,
         'challenge': submission.challenge,
+        'test_results': list(submission.test_results.all()),
+        'total_tests': count_test_cases(submission.challenge),
     }
     
     return render(request, 'challenges/results.html', context)
@@ -907,175 +518,67 @@ def user_submissions(request):
     
     return render(request, 'challenges/user_submissions.html', context)
 
-# Adicione esta função no seu challenges/views.py
+UNRANKED_USER_STATS = {
+    'position': None,
+    'total_points': 0,
+    'completed_challenges': 0,
+    'completion_percentage': 0,
+    'total_attempts': 0,
+    'success_rate': 0,
+}
 
-# VERSÃO SIMPLIFICADA PARA DEBUG
-# Substitua temporariamente a view leaderboard por esta versão
 
-# VIEW LEADERBOARD CORRIGIDA
-# Substitua a função leaderboard por esta versão
+def leaderboard_data(request):
+    """
+    Página do ranking pedida em request (?cursor=, ?page_size=), posição do
+    usuário logado e totais (em cache compartilhado). Nada aqui carrega o
+    ranking inteiro.
+    """
+    summary = national_summary()
+    total_challenges = summary['total_challenges']
+    page_size = parse_page_size(request.GET.get('page_size'))
+    cursor = request.GET.get('cursor') or None
+    rows, start, next_cursor = standings_page(cursor, page_size)
+    users_data = [
+        standing_entry(standing, total_challenges, position)
+        for position, standing in enumerate(rows, start)
+    ]
 
-# VIEW LEADERBOARD COMPLETA COM CRITÉRIOS DE DESEMPATE
-# Substitua a função leaderboard no seu challenges/views.py
+    # Estatísticas do usuário atual
+    user_stats = None
+    if request.user.is_authenticated:
+        standing = UserStanding.objects.select_related('user').filter(user=request.user).first()
+        position = rank_position(standing)
+        if position is not None:
+            user_stats = standing_entry(standing, total_challenges, position)
+        else:
+            user_stats = dict(UNRANKED_USER_STATS)
+
+    return {
+        'users': users_data,
+        'user_stats': user_stats,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
+        'regions': BrazilState.REGION_CHOICES,
+        **summary,
+    }
 
-from django.shortcuts import render
-from django.contrib.auth.models import User
-from django.db.models import Sum, Count, Q, Min, Max
-from django.utils import timezone
-from datetime import datetime
-from .models import Challenge, Submission
 
 def leaderboard(request):
     """
-    View completa para ranking com critérios de desempate
+    View completa para ranking com critérios de desempate (paginada por cursor)
     """
     try:
-        print("DEBUG: Iniciando leaderboard com critérios de desempate...")
-        
-        # Buscar usuários com submissões aceitas
-        users_with_submissions = User.objects.filter(
-            submissions__status='accepted'
-        ).distinct()
-        
-        print(f"DEBUG: Encontrados {users_with_submissions.count()} usuários com submissões aceitas")
-        
-        total_challenges = Challenge.objects.count()
-        users_data = []
-        
-        for user in users_with_submissions:
-            print(f"DEBUG: Processando usuário {user.username}...")
-            
-            # Submissões aceitas do usuário
-            accepted_submissions = Submission.objects.filter(
-                user=user,
-                status='accepted'
-            )
-            
-            # Calcular pontos totais (evitando duplicatas por desafio)
-            unique_challenges = {}
-            for submission in accepted_submissions:
-                challenge_id = submission.challenge.id
-                if challenge_id not in unique_challenges:
-                    unique_challenges[challenge_id] = submission.challenge.points or 0
-            
-            total_points = sum(unique_challenges.values())
-            completed_challenges = len(unique_challenges)
-            completion_percentage = round((completed_challenges / total_challenges) * 100) if total_challenges > 0 else 0
-            
-            # ==== NOVOS CAMPOS PARA CRITÉRIOS DE DESEMPATE ====
-            
-            # 1. Data de conclusão (última submissão aceita)
-            last_accepted = accepted_submissions.order_by('-submitted_at').first()
-            completion_date = last_accepted.submitted_at if last_accepted else timezone.now()
-            
-            # 2. Total de tentativas (todas as submissões do usuário)
-            total_attempts = Submission.objects.filter(user=user).count()
-            
-            # 3. Data da primeira submissão (quando começou)
-            first_submission = Submission.objects.filter(user=user).order_by('submitted_at').first()
-            first_attempt_date = first_submission.submitted_at if first_submission else timezone.now()
-            
-            # 4. Taxa de sucesso (aceitos / total)
-            success_rate = round((accepted_submissions.count() / total_attempts) * 100) if total_attempts > 0 else 0
-            
-            # 5. Tempo para completar (diferença entre primeira e última submissão aceita)
-            if first_submission and last_accepted and completed_challenges == total_challenges:
-                completion_time_days = (last_accepted.submitted_at - first_submission.submitted_at).days
-            else:
-                completion_time_days = 999999  # Valor alto para quem não completou
-            
-            print(f"DEBUG: {user.username}: {total_points}pts, {completed_challenges}desafios, {total_attempts}tentativas, {success_rate}%sucesso")
-            
-            users_data.append({
-                'user': user,
-                'total_points': total_points,
-                'completed_challenges': completed_challenges,
-                'completion_percentage': completion_percentage,
-                # Campos para desempate
-                'completion_date': completion_date,
-                'total_attempts': total_attempts,
-                'first_attempt_date': first_attempt_date,
-                'success_rate': success_rate,
-                'completion_time_days': completion_time_days,
-                # Campos extras para exibição
-                'accepted_count': accepted_submissions.count(),
-            })
-        
-        # ==== ORDENAÇÃO COM CRITÉRIOS DE DESEMPATE ====
-        print("DEBUG: Aplicando critérios de desempate...")
-        
-        users_data.sort(key=lambda x: (
-            -x['total_points'],                    # 1º: Mais pontos (decrescente)
-            -x['completed_challenges'],            # 2º: Mais desafios completados (decrescente)
-            x['completion_time_days'],             # 3º: Completou mais rápido (crescente)
-            x['total_attempts'],                   # 4º: Menos tentativas totais (crescente)
-            -x['success_rate'],                    # 5º: Maior taxa de sucesso (decrescente)
-            x['first_attempt_date'],               # 6º: Começou primeiro (crescente)
-            x['user'].username.lower(),            # 7º: Ordem alfabética (crescente)
-        ))
-        
-        # Log dos primeiros 5 para debug
-        print("DEBUG: Top 5 após ordenação:")
-        for i, user_data in enumerate(users_data[:5]):
-            print(f"  {i+1}º: {user_data['user'].username} - {user_data['total_points']}pts, "
-                  f"{user_data['completed_challenges']}desafios, {user_data['total_attempts']}tentativas, "
-                  f"{user_data['completion_time_days']}dias")
-        
-        # Estatísticas do usuário atual
-        user_stats = None
-        if request.user.is_authenticated:
-            print(f"DEBUG: Buscando posição do usuário {request.user.username}...")
-            
-            for index, user_data in enumerate(users_data):
-                if user_data['user'] == request.user:
-                    user_stats = user_data.copy()
-                    user_stats['position'] = index + 1
-                    print(f"DEBUG: {request.user.username} está na {user_stats['position']}ª posição")
-                    break
-            
-            if not user_stats:
-                print(f"DEBUG: {request.user.username} não encontrado no ranking")
-                user_stats = {
-                    'position': None,
-                    'total_points': 0,
-                    'completed_challenges': 0,
-                    'completion_percentage': 0,
-                    'total_attempts': 0,
-                    'success_rate': 0,
-                }
-        
-        # Estatísticas gerais
-        total_users = users_with_submissions.count()
-        completed_users = len([u for u in users_data if u['completed_challenges'] == total_challenges])
-        total_submissions = Submission.objects.count()
-        total_points_distributed = sum(u['total_points'] for u in users_data)
-        
-        # Estatísticas adicionais
-        avg_completion_rate = round(sum(u['completion_percentage'] for u in users_data) / len(users_data)) if users_data else 0
-        avg_attempts_per_user = round(total_submissions / total_users) if total_users > 0 else 0
-        
-        print(f"DEBUG: Estatísticas - {total_users} usuários, {completed_users} finalistas, "
-              f"{total_submissions} submissões, {avg_completion_rate}% média")
-        
-        context = {
-            'users': users_data,
-            'user_stats': user_stats,
-            'total_users': total_users,
-            'completed_users': completed_users,
-            'total_submissions': total_submissions,
-            'total_points': total_points_distributed,
-            'avg_completion_rate': avg_completion_rate,
-            'avg_attempts_per_user': avg_attempts_per_user,
-        }
-        
-        print("DEBUG: Context criado com sucesso!")
+        context = leaderboard_data(request)
         return render(request, 'challenges/leaderboard.html', context)
-        
+
+    except ValueError:
+        return redirect('leaderboard')  # Cursor inválido: volta ao início
+
     except Exception as e:
-        print(f"DEBUG: ERRO na view leaderboard: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
-        
+        logger.error(f"Erro na view leaderboard: {e}\n{traceback.format_exc()}")
+
         context = {
             'users': [],
             'user_stats': None,
@@ -1087,9 +590,88 @@ def leaderboard(request):
             'avg_attempts_per_user': 0,
             'error_message': f"Erro: {str(e)}",
         }
-        
+
         return render(request, 'challenges/leaderboard.html', context)
 
+
+def region_leaderboard(request, region):
+    """Ranking de uma região (Norte, Nordeste, ...), com os desafios dos estados dela; em cache"""
+    try:
+        data = region_standings(region)
+    except ValueError:
+        raise Http404("Região não encontrada")
+
+    page_size = parse_page_size(request.GET.get('page_size'))
+    cursor = request.GET.get('cursor') or None
+    try:
+        users_data, next_cursor = region_page(data, cursor, page_size)
+    except ValueError:
+        return redirect('region-leaderboard', region=region)  # Cursor inválido: volta ao início
+
+    user_stats = None
+    if request.user.is_authenticated:
+        user_stats = entry_of(data, request.user) or dict(UNRANKED_USER_STATS)
+
+    context = {
+        'users': users_data,
+        'user_stats': user_stats,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
+        'region': region,
+        'region_name': dict(BrazilState.REGION_CHOICES)[region],
+        'regions': BrazilState.REGION_CHOICES,
+        **data['summary'],
+    }
+    return render(request, 'challenges/leaderboard.html', context)
+
+
+def challenge_leaderboard(request, pk):
+    """Mais rápidos de um desafio (menor tempo aceito de cada usuário); em cache"""
+    challenge = get_object_or_404(Challenge.objects.select_related('state'), pk=pk)
+    data = challenge_standings(challenge.id)
+    context = {
+        'challenge': challenge,
+        'users': data['entries'][:parse_page_size(request.GET.get('page_size'))],
+        'user_stats': entry_of(data, request.user),
+    }
+    return render(request, 'challenges/challenge_leaderboard.html', context)
+
+
+def leaderboard_entry_json(entry):
+    user = entry['user']
+    return {
+        'position': entry['position'],
+        'username': user.username,
+        'name': f"{user.first_name} {user.last_name}".strip() or user.username,
+        'total_points': entry['total_points'],
+        'completed_challenges': entry['completed_challenges'],
+        'completion_percentage': entry['completion_percentage'],
+        'total_attempts': entry['total_attempts'],
+        'success_rate': entry['success_rate'],
+        'completion_time_days': entry['completion_time_days'],
+        'first_attempt_date': entry['first_attempt_date'].isoformat() if entry['first_attempt_date'] else None,
+        'completion_date': entry['completion_date'].isoformat() if entry['completion_date'] else None,
+    }
+
+
+def leaderboard_api(request):
+    """Ranking em JSON: mesma paginação (?cursor=, ?page_size=) e posição do usuário logado em 'me'"""
+    try:
+        data = leaderboard_data(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    me = data['user_stats']
+    return JsonResponse({
+        'success': True,
+        'results': [leaderboard_entry_json(entry) for entry in data['users']],
+        'next_cursor': data['next_cursor'],
+        'page_size': data['page_size'],
+        'total_users': data['total_users'],
+        'me': leaderboard_entry_json(me) if me and me['position'] else None,
+    })
+
 @login_required
 def test_congratulations(request):
     """View temporária para testar a página de parabéns"""
@@ -1576,7 +1158,15 @@ def debug_environment(request):
             }
     except Exception as e:
         env_info['db_error'] = str(e)
-    
+
+    # Orçamento de compilações/execuções e filas de espera
+    try:
+        from .admission import get_admission_controller
+        controller = get_admission_controller()
+        env_info['admission'] = controller.status() if controller else None
+    except Exception as e:
+        env_info['admission_error'] = str(e)
+
     return JsonResponse(env_info)
 
 @login_required
@@ -1623,7 +1213,6 @@ def test_challenge_253(request):
         )
         
         # Avaliar
-        from .java_executor import evaluate_java_submission
         result = evaluate_java_submission(submission)
         
         return JsonResponse({
@@ -2,13 +2,36 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required  # Adicione esta linha
 from challenges.models import BrazilState, Challenge
+from challenges.leaderboards import get_leaderboard_settings
+from challenges.shared_cache import cached, MAP_NAMESPACE
 from accounts.models import UserProfile
 
+
+def map_states():
+    """Estados do mapa com o desafio de cada um (invalidado pelos sinais de BrazilState e Challenge)"""
+    states_data = []
+    for state in BrazilState.objects.select_related('challenge').order_by('order'):
+        try:
+            challenge = state.challenge
+        except Challenge.DoesNotExist:
+            challenge = None  # Estado sem desafio associado
+        states_data.append({
+            'id': state.id,
+            'name': state.name,
+            'abbreviation': state.abbreviation,
+            'map_x_position': state.map_x_position,
+            'map_y_position': state.map_y_position,
+            'order': state.order,
+            'challenge_id': challenge.id if challenge else None,
+            'challenge_title': challenge.title if challenge else 'Desafio não disponível',
+            'difficulty': challenge.difficulty if challenge else 'unknown',
+        })
+    return states_data
+
+
 @login_required
 def home(request):
     """Página inicial com o mapa do Brasil"""
-    states = BrazilState.objects.all().order_by('order')
-    
     # Obtém o perfil do usuário ou cria um se não existir
     profile, created = UserProfile.objects.get_or_create(user=request.user)
     
@@ -18,48 +41,18 @@ def home(request):
         profile.current_state = initial_state
         profile.save()
     
-    # Prepara os dados dos estados para o mapa
+    # Prepara os dados dos estados para o mapa (a parte comum a todos fica no cache compartilhado)
     states_data = []
-    for state in states:
-        # Estado está disponível se é o atual ou se o usuário já completou desafios anteriores
-        is_available = (state == profile.current_state) or (state.order < profile.current_state.order)
-        # Estado está completo se o usuário já passou dele
-        is_completed = state.order < profile.current_state.order
-        # Estado é o atual
-        is_current = state == profile.current_state
-        
-        try:
-            challenge = state.challenge
-            states_data.append({
-                'id': state.id,
-                'name': state.name,
-                'abbreviation': state.abbreviation,
-                'map_x_position': state.map_x_position,
-                'map_y_position': state.map_y_position,
-                'is_available': is_available,
-                'is_completed': is_completed,
-                'is_current': is_current,
-                'order': state.order,
-                'challenge_id': challenge.id,
-                'challenge_title': challenge.title,
-                'difficulty': challenge.difficulty,
-            })
-        except Challenge.DoesNotExist:
-            # Estado sem desafio associado
-            states_data.append({
-                'id': state.id,
-                'name': state.name,
-                'abbreviation': state.abbreviation,
-                'map_x_position': state.map_x_position,
-                'map_y_position': state.map_y_position,
-                'is_available': is_available,
-                'is_completed': is_completed,
-                'is_current': is_current,
-                'order': state.order,
-                'challenge_id': None,
-                'challenge_title': 'Desafio não disponível',
-                'difficulty': 'unknown',
-            })
+    for state in cached(MAP_NAMESPACE, 'states', map_states, get_leaderboard_settings()['cache_timeout']):
+        states_data.append(dict(
+            state,
+            # Estado está disponível se é o atual ou se o usuário já completou desafios anteriores
+            is_available=(state['id'] == profile.current_state.id) or (state['order'] < profile.current_state.order),
+            # Estado está completo se o usuário já passou dele
+            is_completed=state['order'] < profile.current_state.order,
+            # Estado é o atual
+            is_current=state['id'] == profile.current_state.id,
+        ))
     
     context = {
         'states_data': states_data,
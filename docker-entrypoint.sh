@@ -1,14 +1,45 @@
 
 #!/bin/bash
 
+# Configuração de produção (ex.: TEST_DATA_DIR persistente); erros impedem a subida
+python manage.py check --deploy --fail-level ERROR || exit 1
+
 # Executar migrações
 python manage.py migrate
 
+# Tabela do cache compartilhado (só usada com CACHE_BACKEND=db; não faz nada se já existe)
+python manage.py createcachetable
+
 # Popular banco se vazio
 python populate_data.py
 
+# Casos de Challenge.test_cases que faltem no armazenamento (ex.: volume novo) são regravados
+python manage.py test_data sync
+
+# Classificação materializada consistente com as submissões (grava só o que mudou)
+python manage.py standings rebuild
+
 # Coletar arquivos estáticos
 python manage.py collectstatic --noinput
 
+# Pré-compilar bits/stdc++.h (não recompila se o compilador/flags não mudaram)
+python manage.py build_pch
+
+# Arquivo CDS das classes do JDK (não regera se o JDK não mudou)
+python manage.py build_cds
+
+# Iniciar avaliadores da fila de submissões em segundo plano, reiniciados se
+# morrerem (sem nenhum vivo, as views avaliam na própria requisição)
+supervise_judge_worker() {
+    while true; do
+        python manage.py judge_worker --worker-id "$1"
+        echo "judge_worker $1 terminou (código $?); reiniciando em 5s" >&2
+        sleep 5
+    done
+}
+for i in $(seq 1 ${JUDGE_WORKERS:-1}); do
+    supervise_judge_worker "$(hostname):judge-$i" &
+done
+
 # Iniciar aplicação
-exec gunicorn maratona_brasil.wsgi:application --bind 0.0.0.0:${PORT:-10000}
\ No newline at end of file
+exec gunicorn maratona_brasil.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:${PORT:-10000}
\ No newline at end of file
@@ -207,6 +207,43 @@ CODE_EXECUTION = {
         'CLASSPATH': '.',
         'POLICY_FILE': BASE_DIR / 'java.policy',
         'TIMEOUT': 10,  # Aumentado de 5 para 10 segundos
+        
+        # Motor de execução (challenges/language_backends.py). Com pouca memória
+        # (ex.: Render): JAVA_MAX_HEAP_MB=32 e COMPILE_FLAGS ['-J-Xmx32m', '-Xlint:none']
+        'MAX_HEAP_MB': int(os.environ.get('JAVA_MAX_HEAP_MB', 128)),  # Teto do -Xmx por execução
+        'COMPILE_FLAGS': [],
+        'RUN_FLAGS': ['-Xms16m', '-XX:+UseSerialGC', '-Dfile.encoding=UTF-8'],
+        # Limite de tempo do Java = time_limit do desafio x TIME_MULTIPLIER (CPU e relógio). O tempo reportado é
+        # o medido: no modo 'process' o rusage da JVM inteira (inicialização, JIT e GC incluídos), no 'pool' a
+        # CPU da thread main da submissão. Mudar o multiplicador invalida os vereditos cacheados de Java
+        'TIME_MULTIPLIER': float(os.environ.get('JAVA_TIME_MULTIPLIER', 2)),
+        
+        # 'pool': JVMs aquecidas reutilizadas entre execuções (challenges/jvm_pool.py)
+        # 'process': um processo java por execução (recomendado com pouca memória, ex.: Render)
+        'EXECUTION_MODE': os.environ.get('JAVA_EXECUTION_MODE', 'pool'),
+        'WORKER_POOL': {
+            'SIZE': int(os.environ.get('JAVA_WORKER_POOL_SIZE', 2)),  # JVMs por processo Django
+            'MAX_RUNS': 50,  # Recicla o worker após N execuções
+            # JDKs em que o JudgeWorker roda: ele precisa do SecurityManager, removido no JDK 24 (JEP 486).
+            # Fora da faixa o pool é desligado e a execução usa o modo 'process'
+            'SUPPORTED_JDK': (8, 23),
+            # O worker troca entrada e saída inteiras em memória: testes maiores que isso rodam no modo 'process'
+            # (saída acima de MAX_OUTPUT_SIZE é repetida nele; nunca passa do MAX_OUTPUT_SIZE geral)
+            'MAX_INPUT_SIZE': 256 * 1024,
+            'MAX_OUTPUT_SIZE': 256 * 1024,
+        },
+        # javac residente (challenges/javac_daemon.py): compila em memória sem iniciar uma JVM por submissão.
+        # Mantém uma JVM de HEAP_MB por processo Django (gunicorn e cada judge_worker): só com memória sobrando,
+        # JAVA_COMPILER_DAEMON=true
+        'COMPILER_DAEMON': {
+            'ENABLED': os.environ.get('JAVA_COMPILER_DAEMON', 'false').lower() == 'true',
+            'HEAP_MB': int(os.environ.get('JAVA_COMPILER_DAEMON_HEAP_MB', 256)),
+            'MAX_COMPILES': 500,  # Recicla o daemon após N compilações
+        },
+        # Arquivo CDS com as classes do JDK usadas pelas submissões (challenges/jvm_cds.py, manage.py build_cds)
+        'CLASS_DATA_SHARING': {
+            'ENABLED': os.environ.get('JAVA_CLASS_DATA_SHARING', 'true').lower() == 'true',
+        },
         'JVM_ARGS': [
             '-Xmx128m',
             '-Xss1m',
@@ -219,19 +256,93 @@ CODE_EXECUTION = {
     'PYTHON': {
         'INTERPRETER_PATH': 'python3',
         'TIMEOUT': 5,
+        # Zygote pré-inicializado que faz fork por execução (challenges/python_forkserver.py)
+        'FORK_SERVER': {
+            'ENABLED': os.environ.get('PYTHON_FORK_SERVER', 'true').lower() == 'true',
+            'MEMORY_LIMIT_MB': 256,  # RLIMIT_AS do processo da submissão
+        },
     },
     
     'C': {
         'COMPILER_PATH': 'gcc',
-        'COMPILER_FLAGS': ['-O2', '-std=c99', '-lm'],  # Adicionado -lm para bibliotecas matemáticas
+        'COMPILER_FLAGS': ['-std=c11', '-Wall'],
+        'LINK_FLAGS': ['-lm'],  # Biblioteca matemática
+        'COMPILE_TIMEOUT': 15,  # segundos
         'TIMEOUT': 5,
     },
     
     'CPP': {
         'COMPILER_PATH': 'g++',
-        'COMPILER_FLAGS': ['-O2', '-std=c++17', '-lm'],  # Adicionado -lm para bibliotecas matemáticas
+        'COMPILER_FLAGS': ['-std=c++17', '-Wall', '-O2'],  # Também identificam o PCH
+        'LINK_FLAGS': ['-lm'],  # Biblioteca matemática
+        'COMPILE_TIMEOUT': 15,  # segundos
         'TIMEOUT': 5,
-    }
+        # bits/stdc++.h pré-compilado (challenges/precompiled_header.py, manage.py build_pch)
+        'PRECOMPILED_HEADER': {
+            'ENABLED': os.environ.get('CPP_PRECOMPILED_HEADER', 'true').lower() == 'true',
+        },
+    },
+    
+    # Casos de teste em arquivos endereçados por conteúdo (challenges/test_data.py, manage.py test_data).
+    # Precisa ser um diretório persistente (ex.: disco do Render): os casos importados só existem nele.
+    # Sem TEST_DATA_DIR só há padrão com DEBUG; em produção `check --deploy` falha
+    'TEST_DATA': {
+        'DIR': os.environ.get('TEST_DATA_DIR') or (BASE_DIR / 'test_data' if DEBUG else None),
+    },
+    
+    # Cache de binários/.class/erros de compilação (challenges/artifact_cache.py)
+    'ARTIFACT_CACHE': {
+        'ENABLED': os.environ.get('ARTIFACT_CACHE', 'true').lower() == 'true',
+        'MAX_SIZE_MB': int(os.environ.get('ARTIFACT_CACHE_MAX_MB', 256)),  # Despejo LRU acima disso
+    },
+    
+    # Vereditos de código idêntico contra os mesmos testes (challenges/verdict_cache.py)
+    'VERDICT_CACHE': {
+        'ENABLED': os.environ.get('VERDICT_CACHE', 'true').lower() == 'true',
+        'MAX_AGE': 30 * 24 * 3600,  # segundos até o veredito ser descartado pelo judge_worker
+    },
+    
+    # Fila de avaliação no banco (challenges/judge_queue.py); usada enquanto algum `manage.py judge_worker` está vivo
+    'JUDGE_QUEUE': {
+        'ENABLED': os.environ.get('JUDGE_QUEUE', 'true').lower() == 'true',
+        'POLL_INTERVAL': 1.0,  # segundos entre consultas com a fila vazia
+        'STALE_AFTER': 600,    # segundos em 'running' até a submissão voltar para a fila
+        'MAX_ATTEMPTS': 3,     # tentativas antes de desistir de uma submissão
+        'HEARTBEAT_INTERVAL': 10,  # segundos entre sinais de vida de cada worker
+        'HEARTBEAT_TIMEOUT': 60,   # sem sinal de nenhum worker há tanto tempo: a view avalia na requisição
+    },
+    
+    # Progresso da avaliação via SSE (challenges/grading_events.py)
+    'GRADING_EVENTS': {
+        'POLL_INTERVAL': 0.3,     # segundos entre leituras de eventos novos no stream
+        'STREAM_LIFETIME': 60,    # segundos até o stream encerrar (o navegador reconecta)
+        'KEEPALIVE': 15,          # segundos sem eventos até enviar um comentário keepalive
+        'RETENTION': 24 * 3600,   # segundos até os eventos serem apagados pelo judge_worker
+    },
+    
+    # Limites por execução medidos via wait4 (challenges/process_runner.py)
+    'RESOURCE_LIMITS': {
+        'MEMORY_LIMIT_MB': 256,     # Padrão quando o desafio não define memory_limit
+        'WALL_TIME_FACTOR': 2.0,    # Limite de relógio = time_limit (CPU) x fator...
+        'MIN_WALL_TIME_MS': 1000,   # ...e pelo menos time_limit + esta folga
+    },
+    
+    # Execução paralela dos casos de teste (challenges/parallel_grading.py)
+    'PARALLEL_GRADING': {
+        'ENABLED': os.environ.get('PARALLEL_GRADING', 'true').lower() == 'true',
+        'MAX_WORKERS': int(os.environ.get('PARALLEL_GRADING_MAX_WORKERS', 0)),  # 0 = núcleos disponíveis
+    },
+    
+    # Orçamento global de compilações/execuções simultâneas (challenges/admission.py),
+    # compartilhado por todos os processos; o excesso espera na fila em ordem de chegada
+    'ADMISSION': {
+        'ENABLED': os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true',
+        'RUN_SLOTS': int(os.environ.get('ADMISSION_RUN_SLOTS', 0)),          # 0 = núcleos disponíveis
+        'COMPILE_SLOTS': int(os.environ.get('ADMISSION_COMPILE_SLOTS', 0)),  # 0 = metade dos núcleos
+        'MEMORY_MB': int(os.environ.get('ADMISSION_MEMORY_MB', 0)),          # 0 = MEMORY_FRACTION da RAM/cgroup
+        'MEMORY_FRACTION': 0.75,
+        'MEMORY_UNIT_MB': 64,
+    },
 }
 
 # Configurações de logging (simplificadas para produção)
@@ -279,11 +390,48 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = False     # Render não força HTTPS internamente
 
 # Configurações de cache
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Compartilhado por todos os workers do gunicorn e avaliadores (challenges/shared_cache.py):
+#   file   - arquivos em CACHE_DIR (padrão; um volume comum serve a vários processos)
+#   db     - tabela 'shared_cache' no banco (SQLite por padrão; `manage.py createcachetable`)
+#   redis  - qualquer servidor compatível com Redis em REDIS_URL (Redis, Valkey, KeyDB...)
+#   locmem - só para desenvolvimento: cada processo teria o seu
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+        }
     }
+elif CACHE_BACKEND in ('db', 'sqlite'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'shared_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR') or CODE_EXECUTION['TEMP_DIR'] / 'shared_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Rankings por região e por desafio e totais do ranking nacional
+# (challenges/leaderboards.py): invalidados a cada veredito; o timeout limita a
+# defasagem do que muda sem veredito (tentativas pendentes)
+LEADERBOARD_SETTINGS = {
+    'CACHE_TIMEOUT': int(os.environ.get('LEADERBOARD_CACHE_TIMEOUT', 300)),  # segundos
 }
 
 # Configurações específicas para o sistema de quiz